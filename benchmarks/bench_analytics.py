@@ -0,0 +1,96 @@
+"""Cross-section statistics over a synthetic summaries aggregate.
+
+Compares the vectorized Summaries against plain loops over the payload.
+
+    python benchmarks/bench_analytics.py
+"""
+import random
+import time
+
+from cryptowatch.analytics import Summaries
+
+EXCHANGES = 40
+ASSETS = 300
+QUOTES = ('usd', 'eur', 'btc', 'eth', 'usdt')
+
+
+class PairCatalog(object):
+    """Stands in for a loaded Catalog."""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+    def pair_assets(self, pair):
+        return self.pairs.get(pair)
+
+
+def payload():
+    rng = random.Random(0)
+    pairs = {}
+    result = {}
+    for asset in range(ASSETS):
+        for quote in QUOTES:
+            pair = 'a%d%s' % (asset, quote)
+            pairs[pair] = ('a%d' % asset, quote)
+            for exchange in rng.sample(range(EXCHANGES), 4):
+                last = rng.uniform(1, 100)
+                result['x%d:%s' % (exchange, pair)] = {
+                    'price': {'last': last, 'high': last * 1.1,
+                              'low': last * 0.9,
+                              'change': {'percentage': rng.uniform(-.2, .2),
+                                         'absolute': 1.0}},
+                    'volume': rng.uniform(0, 1000)}
+    return {'result': result}, PairCatalog(pairs)
+
+
+def loops(response, catalog):
+    rows = []
+    for key, summary in response['result'].items():
+        exchange, _, pair = key.partition(':')
+        rows.append((key, pair, catalog.pair_assets(pair), summary))
+    movers = sorted(rows, key=lambda r: -r[3]['price']['change']['percentage'])[:10]
+    index = {}
+    for key, pair, (base, quote), summary in rows:
+        if quote == 'usd':
+            total = index.setdefault(base, [0.0, 0.0])
+            total[0] += summary['price']['last'] * summary['volume']
+            total[1] += summary['volume']
+    index = {base: n / v for base, (n, v) in index.items() if v}
+    prices = {}
+    for key, pair, _, summary in rows:
+        prices.setdefault(pair, []).append(summary['price']['last'])
+    spread = {}
+    for pair, values in prices.items():
+        mean = sum(values) / len(values)
+        std = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+        spread[pair] = ((max(values) - min(values)) / mean, std)
+    return movers, index, spread
+
+
+def vectorized(response, catalog):
+    summaries = Summaries(response, catalog)
+    return (summaries.top_movers(10), summaries.index_prices('usd'),
+            summaries.dispersion())
+
+
+def main():
+    response, catalog = payload()
+    for name, run in (('loops', loops), ('vectorized', vectorized)):
+        start = time.perf_counter()
+        for _ in range(10):
+            run(response, catalog)
+        print('%-12s %7.2f ms per cross-section of %d markets'
+              % (name, (time.perf_counter() - start) * 100,
+                 len(response['result'])))
+    summaries = Summaries(response, catalog)
+    start = time.perf_counter()
+    for _ in range(100):
+        summaries.top_movers(10)
+        summaries.index_prices('usd')
+        summaries.dispersion()
+    print('%-12s %7.2f ms excluding the decode'
+          % ('statistics', (time.perf_counter() - start) * 10))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Per-snapshot cost of the arbitrage scanner on a synthetic catalog.
+
+    python benchmarks/bench_arbitrage.py
+"""
+import random
+import time
+
+from cryptowatch.arbitrage import ArbitrageScanner
+
+EXCHANGES = 30
+ASSETS = 60
+PAIRS_PER_EXCHANGE = 400
+
+
+class SyntheticCatalog(object):
+    """Stands in for a loaded Catalog."""
+
+    def __init__(self):
+        rng = random.Random(0)
+        assets = ['a%d' % i for i in range(ASSETS)]
+        self.pairs = {}
+        self.listed = {}
+        for exchange in range(EXCHANGES):
+            listed = set()
+            while len(listed) < PAIRS_PER_EXCHANGE:
+                base, quote = rng.sample(assets, 2)
+                self.pairs[base + quote] = (base, quote)
+                listed.add(base + quote)
+            self.listed['x%d' % exchange] = frozenset(listed)
+        self.listed_exchanges = frozenset(self.listed)
+
+    def markets_by_exchange(self, exchange, active=False):
+        return self.listed[exchange]
+
+    def pair_assets(self, pair):
+        return self.pairs.get(pair)
+
+
+def main():
+    catalog = SyntheticCatalog()
+    start = time.perf_counter()
+    scanner = ArbitrageScanner(catalog, fee=0.001)
+    print('setup: %d markets, %d triangles in %.0f ms'
+          % (len(scanner.markets), len(scanner.cycles),
+             (time.perf_counter() - start) * 1e3))
+    rng = random.Random(1)
+    snapshots = [{'result': {key: rng.uniform(0.5, 2.0)
+                             for key in scanner.markets}} for _ in range(10)]
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        scanner.scan(snapshot, min_profit=0.01, limit=20)
+    print('scan: %.2f ms per snapshot'
+          % ((time.perf_counter() - start) / len(snapshots) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Throughput of trade to bar aggregation over many markets.
+
+    python benchmarks/bench_bars.py
+"""
+import time
+
+import numpy as np
+
+from cryptowatch.bars import TradeAggregator
+
+MARKETS = 500
+BATCHES = 20
+BATCH = 200
+
+
+def main():
+    rng = np.random.default_rng(0)
+    specs = {'time': 5, 'tick': 100, 'volume': 50.0, 'dollar': 50000.0}
+    aggregators = [[TradeAggregator(kind, size) for kind, size in specs.items()]
+                   for _ in range(MARKETS)]
+    batches = []
+    for index in range(BATCHES):
+        times = np.sort(rng.integers(index * 60, (index + 1) * 60, BATCH))
+        batches.append({'id': np.arange(BATCH, dtype=np.int64),
+                        'timestamp': times,
+                        'price': 1000 + rng.normal(size=BATCH),
+                        'amount': rng.random(BATCH)})
+    start = time.perf_counter()
+    for trades in batches:
+        for market in aggregators:
+            for aggregator in market:
+                aggregator.consume(trades)
+    seconds = time.perf_counter() - start
+    count = MARKETS * BATCHES * BATCH
+    print('%d markets x %d bar kinds: %.2f M trades/s'
+          % (MARKETS, len(specs), count / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main()
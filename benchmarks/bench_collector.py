@@ -0,0 +1,40 @@
+"""Collector throughput against local stand-in servers.
+
+Each request returns 1000 trades; throughput should grow with the number
+of worker processes until the servers or the cores are saturated.
+
+    python benchmarks/bench_collector.py
+"""
+import random
+import time
+
+import local_server
+from cryptowatch.api_client import Client
+from cryptowatch.collector import Collector
+
+MARKETS = [('exchange%d' % (i % 20), 'pair%d' % i) for i in range(800)]
+
+
+def main():
+    urls, stop = local_server.start(local_server.trades_body(), processes=4)
+
+    class LocalClient(Client):
+        def __init__(self):
+            super(LocalClient, self).__init__()
+            self.API_URL = random.choice(urls)
+
+    try:
+        for processes in (1, 2, 4, 8):
+            collector = Collector(MARKETS, route='trades', processes=processes,
+                                  client_class=LocalClient)
+            start = time.perf_counter()
+            rows = sum(len(trades['price']) for _, _, trades in collector.run())
+            seconds = time.perf_counter() - start
+            print('%d processes: %6.0f requests/s, %5.2f M trades/s'
+                  % (processes, len(MARKETS) / seconds, rows / seconds / 1e6))
+    finally:
+        stop()
+
+
+if __name__ == '__main__':
+    main()
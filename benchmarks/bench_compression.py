@@ -0,0 +1,81 @@
+"""Compressed versus identity transfers of large bodies, on a local server.
+
+Loopback has no bandwidth limit, so the download time of each body at
+``MBITS`` is estimated from the bytes received and added to the measured
+time, which includes the decompression.
+
+    python benchmarks/bench_compression.py
+"""
+import json
+import random
+import time
+
+from local_server import start
+
+from cryptowatch.api_client import Client
+
+MBITS = 50.0
+RUNS = 5
+
+
+def summaries_body(markets=6000):
+    rng = random.Random(0)
+    result = {}
+    for index in range(markets):
+        last = rng.uniform(1, 100)
+        result['exchange%d:pair%d' % (index % 40, index)] = {
+            'price': {'last': last, 'high': last * 1.1, 'low': last * 0.9,
+                      'change': {'percentage': rng.uniform(-.2, .2),
+                                 'absolute': rng.uniform(-1, 1)}},
+            'volume': rng.uniform(0, 1000),
+            'volumeQuote': rng.uniform(0, 100000)}
+    return json.dumps({'result': result, 'allowance': {'cost': 1}}).encode()
+
+
+def ohlc_body(candles=6000):
+    rng = random.Random(0)
+    result = {}
+    for period in ('60', '3600'):
+        close = 10000.0
+        rows = []
+        for index in range(candles):
+            close *= rng.uniform(0.99, 1.01)
+            rows.append([1600000000 + index * int(period), close, close * 1.01,
+                         close * 0.99, close, rng.uniform(0, 10),
+                         rng.uniform(0, 100000)])
+        result[period] = rows
+    return json.dumps({'result': result, 'allowance': {'cost': 1}}).encode()
+
+
+def measure(client, url, route):
+    client._request('get', url, route)  # connect
+    seconds = []
+    for _ in range(RUNS):
+        start_time = time.perf_counter()
+        client._request('get', url, route)
+        seconds.append(time.perf_counter() - start_time)
+    stats = client.transfer_stats[route]
+    return min(seconds), stats['compressed'] / stats['responses']
+
+
+def main():
+    print('%-10s %-9s %10s %10s %14s' % ('route', 'encoding', 'KB', 'ms',
+                                         'ms at %g Mbit/s' % MBITS))
+    for route, body in (('summaries', summaries_body()), ('ohlc', ohlc_body())):
+        urls, stop = start(body, compress=True)
+        url = urls[0] + '/markets/' + route
+        try:
+            for name, compression in (('identity', False), ('gzip', True)):
+                client = Client(compression=compression)
+                seconds, size = measure(client, url, route)
+                client.close()
+                download = size * 8 / (MBITS * 1e6)
+                print('%-10s %-9s %10.0f %10.1f %14.1f'
+                      % (route, name, size / 1e3, seconds * 1e3,
+                         (seconds + download) * 1e3))
+        finally:
+            stop()
+
+
+if __name__ == '__main__':
+    main()
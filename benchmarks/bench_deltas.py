@@ -0,0 +1,65 @@
+"""Price snapshot archive: delta log versus one JSON line per snapshot.
+
+    python benchmarks/bench_deltas.py
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+from cryptowatch.deltas import DeltaLog, DeltaWriter
+
+MARKETS = 3000
+SECONDS = 3600
+CHANGED = 0.05
+
+
+def snapshots():
+    random.seed(1)
+    keys = ['exchange%d:pair%d' % (i % 30, i) for i in range(MARKETS)]
+    prices = {key: random.uniform(1, 1000) for key in keys}
+    for _ in range(SECONDS):
+        for key in random.sample(keys, int(MARKETS * CHANGED)):
+            prices[key] *= random.uniform(0.99, 1.01)
+        yield prices
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    log_path = os.path.join(directory, 'prices.log')
+    json_path = os.path.join(directory, 'prices.ndjson')
+
+    start = time.perf_counter()
+    with DeltaWriter(log_path, keyframe_interval=60) as log:
+        for second, prices in enumerate(snapshots()):
+            log.append(prices, timestamp=second)
+    write = time.perf_counter() - start
+    with open(json_path, 'w') as handle:
+        for prices in snapshots():
+            handle.write(json.dumps(prices) + '\n')
+
+    start = time.perf_counter()
+    log = DeltaLog(log_path)
+    opening = time.perf_counter() - start
+    start = time.perf_counter()
+    for second in range(0, SECONDS, 97):
+        log.at(second + 0.5)
+    lookup = (time.perf_counter() - start) / len(range(0, SECONDS, 97))
+    start = time.perf_counter()
+    for _ in log.replay():
+        pass
+    replay = time.perf_counter() - start
+
+    print('%d markets, %d snapshots, %d%% changing each second'
+          % (MARKETS, SECONDS, CHANGED * 100))
+    print('ndjson     %8.1f MB' % (os.path.getsize(json_path) / 1e6))
+    print('delta log  %8.1f MB' % (os.path.getsize(log_path) / 1e6))
+    print('append     %8.1f us / snapshot' % (write / SECONDS * 1e6))
+    print('open       %8.1f ms' % (opening * 1e3))
+    print('at()       %8.2f ms' % (lookup * 1e3))
+    print('replay     %8.1f ms for the hour' % (replay * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""DataFrame construction: fast paths versus naive list comprehensions.
+
+    python benchmarks/bench_frames.py
+"""
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from cryptowatch.api_client import Response
+
+COUNT = 200000
+
+
+def naive_trades(response):
+    rows = [{'id': t[0], 'timestamp': t[1], 'price': t[2], 'amount': t[3]}
+            for t in response['result']]
+    frame = pd.DataFrame(rows)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+    return frame
+
+
+def naive_summaries(response):
+    rows = []
+    for key, summary in response['result'].items():
+        exchange, pair = key.split(':')
+        rows.append({'exchange': exchange, 'pair': pair,
+                     'last': summary['price']['last'],
+                     'high': summary['price']['high'],
+                     'low': summary['price']['low'],
+                     'change_percentage': summary['price']['change']['percentage'],
+                     'change_absolute': summary['price']['change']['absolute'],
+                     'volume': summary['volume']})
+    return pd.DataFrame(rows)
+
+
+def measure(function, response):
+    function(response)  # warm up, importing pandas or pyarrow
+    seconds = []
+    for _ in range(3):
+        start = time.perf_counter()
+        function(response)
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(response)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(seconds), peak
+
+
+def main():
+    rng = random.Random(0)
+    trades = Response({'result': [[i, 1600000000 + i, rng.uniform(1, 2), rng.random()]
+                                  for i in range(COUNT)]}, 'trades')
+    summaries = Response({'result': {
+        'x%d:p%d' % (i % 50, i): {'price': {'last': 1.0, 'high': 2.0, 'low': 0.5,
+                                            'change': {'percentage': 0.1,
+                                                       'absolute': 0.1}},
+                                  'volume': 3.0}
+        for i in range(20000)}}, 'summaries')
+    for name, response, naive in (('trades', trades, naive_trades),
+                                  ('summaries', summaries, naive_summaries)):
+        for label, function in (('naive', naive),
+                                ('to_pandas', Response.to_pandas),
+                                ('to_arrow', Response.to_arrow)):
+            seconds, peak = measure(function, response)
+            print('%-10s %-10s %8.1f ms %8.1f MB peak'
+                  % (name, label, seconds * 1e3, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Cold start cost of importing the package and creating a client.
+
+Each statement runs in a fresh interpreter; the interpreter start-up
+itself (``pass``) is reported first and subtracted from the others.
+
+    python benchmarks/bench_import.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+REPEAT = 15
+STATEMENTS = [
+    'import cryptowatch',
+    'from cryptowatch.api_client import Client; Client()',
+    'from cryptowatch.api_client import Client; Client().session',
+    'import cryptowatch.cli',
+    'import requests',
+]
+
+
+def measure(statement, env):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement], env=env)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    measure('import cryptowatch.cli, requests', env)  # warm the file cache
+    baseline = measure('pass', env)
+    print('%7.1f ms  interpreter start-up' % (baseline * 1e3))
+    for statement in STATEMENTS:
+        seconds = measure(statement, env)
+        print('%7.1f ms  %s' % ((seconds - baseline) * 1e3, statement))
+
+
+if __name__ == '__main__':
+    main()
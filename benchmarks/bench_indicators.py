@@ -0,0 +1,74 @@
+"""Indicators over many markets: incremental updates versus full recomputes.
+
+    python benchmarks/bench_indicators.py
+"""
+import time
+
+import numpy as np
+
+from cryptowatch.indicators import (
+    ATR,
+    EMA,
+    RSI,
+    VWAP,
+    Bollinger,
+    IndicatorSet
+)
+
+MARKETS = 500
+HISTORY = 1000
+SAMPLE = 50  # markets recomputed one by one, scaled up to MARKETS
+
+
+def candles():
+    random = np.random.RandomState(1)
+    close = 100 + np.cumsum(random.normal(size=(MARKETS, HISTORY + 1)), axis=1)
+    spread = random.uniform(0.1, 1.0, size=close.shape)
+    return {
+        'close_time': np.broadcast_to(np.arange(1, HISTORY + 2) * 60, close.shape),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': random.uniform(1, 10, size=close.shape),
+    }
+
+
+def make():
+    return IndicatorSet(fast=EMA(12), slow=EMA(26), rsi=RSI(14), atr=ATR(14),
+                        bands=Bollinger(20, 2.0), vwap=VWAP(86400))
+
+
+def best(function, runs=3):
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def main():
+    columns = candles()
+    history = {field: column[:, :HISTORY] for field, column in columns.items()}
+    latest = {field: column[:, HISTORY] for field, column in columns.items()}
+
+    batch = best(lambda: make().batch(history))
+
+    def per_market():
+        for market in range(SAMPLE):
+            make().batch({field: column[market] for field, column in history.items()})
+
+    recompute = best(per_market, runs=1) * MARKETS / SAMPLE
+
+    live = make()
+    live.batch(history)
+    update = best(lambda: live.update(latest), runs=20)
+
+    print('%d markets, %d candles, 6 indicators' % (MARKETS, HISTORY))
+    print('recompute per market  %9.1f ms' % (recompute * 1e3))
+    print('batch, all markets    %9.1f ms' % (batch * 1e3))
+    print('update one candle     %9.3f ms' % (update * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Adaptive versus fixed interval polling of trades, on a simulated clock.
+
+Trades arrive as Poisson processes whose rates span several orders of
+magnitude. Both pollers get the same request rate; a market is fresh while
+no trade arrived since its last poll, and its staleness is the number of
+trades not seen yet, both averaged over time.
+
+    python benchmarks/bench_polling.py
+"""
+import numpy as np
+
+from cryptowatch.polling import AdaptivePoller
+from cryptowatch.scheduler import Job, Scheduler
+
+MARKETS = 200
+RATE = 5.0          # requests per second
+DURATION = 4 * 3600.0
+WARMUP = 1800.0     # excluded from the measures
+LIMIT = 50          # trades per response
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SimulatedClient(object):
+    """Serves the trades arrived so far, the last ``LIMIT`` of them."""
+
+    def __init__(self, clock, arrivals):
+        self.clock = clock
+        self.arrivals = arrivals
+
+    def prepare_market(self, exchange, pair, route, params=None):
+        times = self.arrivals[(exchange, pair)]
+        clock = self.clock
+
+        class Route(object):
+            def fetch(self):
+                end = np.searchsorted(times, clock.now, side='right')
+                return {'result': [[i, t, 1.0, 1.0] for i, t in enumerate(
+                    times[max(end - LIMIT, 0):end].tolist(),
+                    max(end - LIMIT, 0))]}
+
+        return Route()
+
+    def get_aggregates(self, route):
+        # 24 hour volume, one unit per trade, at the long run rate.
+        return {'result': {'%s:%s' % market: {'volume': len(times) * 86400
+                                              / DURATION}
+                           for market, times in self.arrivals.items()}}
+
+
+def arrivals():
+    random = np.random.RandomState(7)
+    rates = np.exp(random.normal(np.log(0.05), 2.0, MARKETS))
+    markets = [('exchange', 'pair%d' % i) for i in range(MARKETS)]
+    return {market: np.cumsum(random.exponential(1 / rate,
+                                                 int(rate * DURATION * 1.5) + 10))
+            for market, rate in zip(markets, rates)}
+
+
+def measure(polls, times):
+    """Return time averaged freshness and unseen trades after the warm up."""
+    polls = np.asarray([p for p in polls if p >= WARMUP] + [DURATION])
+    times = times[(times > polls[0]) & (times <= DURATION)]
+    fresh = 0.0
+    unseen = 0.0
+    for start, end in zip(polls[:-1], polls[1:]):
+        lo, hi = np.searchsorted(times, [start, end], side='right')
+        fresh += (times[lo] if hi > lo else end) - start
+        unseen += float(np.sum(end - times[lo:hi]))
+    span = DURATION - polls[0]
+    return fresh / span, unseen / span
+
+
+def run(adaptive, markets):
+    clock = Clock()
+    client = SimulatedClient(clock, markets)
+    polls = {market: [] for market in markets}
+
+    def record(job, response):
+        polls[job.market].append(clock.now)
+
+    if adaptive:
+        poller = AdaptivePoller(client, list(markets), RATE, callback=record,
+                                clock=clock, sleep=clock.sleep)
+        poller.run(DURATION)
+    else:
+        scheduler = Scheduler(client, clock=clock, sleep=clock.sleep)
+        for market in markets:
+            scheduler.add(Job('trades', market, interval=MARKETS / RATE,
+                              callback=record))
+        scheduler.run(DURATION)
+    results = np.array([measure(polls[m], markets[m]) for m in markets])
+    weights = np.array([len(t) for t in markets.values()], float)
+    return (results[:, 0].mean(), np.average(results[:, 0], weights=weights),
+            results[:, 1].sum(), sum(len(p) for p in polls.values()) / DURATION)
+
+
+def main():
+    markets = arrivals()
+    print('%d markets, %.0f requests/s, %.0f h simulated'
+          % (MARKETS, RATE, DURATION / 3600))
+    print('%-9s %10s %16s %14s %10s' % ('', 'freshness', 'trade weighted',
+                                       'unseen trades', 'req/s'))
+    for name, adaptive in (('fixed', False), ('adaptive', True)):
+        print('%-9s %10.3f %16.3f %14.1f %10.2f'
+              % ((name,) + run(adaptive, markets)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Throughput of resampling minute candles into longer periods.
+
+    python benchmarks/bench_resample.py
+"""
+import timeit
+
+import numpy as np
+
+from cryptowatch.resample import Resampler, resample
+
+COUNT = 2000000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    close_time = np.arange(60, 60 * (COUNT + 1), 60, dtype=np.int64)
+    # Drop 1% of the candles to exercise the gap handling.
+    close_time = close_time[rng.random(COUNT) > 0.01]
+    price = 1000 + np.cumsum(rng.normal(size=len(close_time)))
+    candles = {
+        'close_time': close_time,
+        'open': price,
+        'high': price + 1,
+        'low': price - 1,
+        'close': price,
+        'volume': rng.random(len(close_time)),
+        'quote_volume': rng.random(len(close_time)),
+    }
+    for period in (2 * 3600, 4 * 3600, 12 * 3600):
+        seconds = min(timeit.repeat(lambda: resample(candles, 60, period),
+                                    number=1, repeat=3))
+        print('resample to %5ds  %8.1f M candles/s'
+              % (period, len(close_time) / seconds / 1e6))
+
+    resampler = Resampler(60, 4 * 3600)
+    batches = [{field: values[i:i + 1] for field, values in candles.items()}
+               for i in range(10000)]
+    seconds = timeit.timeit(lambda: [resampler.update(b) for b in batches],
+                            number=1)
+    print('incremental update  %8.1f us/candle' % (seconds / len(batches) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
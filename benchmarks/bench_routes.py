@@ -0,0 +1,34 @@
+"""Per-call overhead of get_markets versus a prepared MarketRoute.
+
+The session is bypassed so only the request building is measured.
+
+    python benchmarks/bench_routes.py
+"""
+import timeit
+
+from cryptowatch.api_client import Client
+
+NUMBER = 200000
+
+
+def main():
+    client = Client()
+    client._request = lambda method, uri, route=None: uri
+    data = {
+        'exchange': 'gdax',
+        'pair': 'btcusd',
+        'route': 'ohlc',
+        'params': {'after': 1594087200, 'periods': '60,3600'}
+    }
+    route = client.prepare_market(data['exchange'], data['pair'],
+                                  data['route'], data['params'])
+    assert client.get_markets(data=data) == route.fetch()
+
+    for name, call in (('get_markets', lambda: client.get_markets(data=data)),
+                       ('MarketRoute.fetch', route.fetch)):
+        seconds = min(timeit.repeat(call, number=NUMBER, repeat=3))
+        print('%-20s %8.3f us/call' % (name, seconds / NUMBER * 1e6))
+
+
+if __name__ == '__main__':
+    main()
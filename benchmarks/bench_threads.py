@@ -0,0 +1,58 @@
+"""Client throughput across threads, by session mode, on a local server.
+
+    python benchmarks/bench_threads.py
+"""
+import threading
+import time
+
+from local_server import start, trades_body
+
+from cryptowatch.api_client import Client
+
+REQUESTS = 3000
+THREADS = (1, 8, 32, 128, 256)
+MODES = (
+    ('shared, pool 10', {}),
+    ('shared, pool 32', {'pool_size': 32}),
+    ('shared, unbounded', {'pool_block': False}),
+    ('per thread', {'sessions': 'thread'}),
+)
+
+
+def throughput(client, url, threads):
+    per_thread = REQUESTS // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        for _ in range(per_thread):
+            client._request('get', url)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start_time)
+
+
+def main():
+    urls, stop = start(trades_body(100))
+    url = urls[0] + '/markets/gdax/btcusd/trades'
+    try:
+        print('%-18s' % 'requests/s' + ''.join('%9d' % t for t in THREADS))
+        for name, options in MODES:
+            row = []
+            for threads in THREADS:
+                client = Client(**options)
+                row.append(throughput(client, url, threads))
+                client.close()
+            print('%-18s' % name + ''.join('%9.0f' % r for r in row))
+    finally:
+        stop()
+
+
+if __name__ == '__main__':
+    main()
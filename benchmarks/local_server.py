@@ -0,0 +1,75 @@
+"""A local stand-in for the API, serving canned JSON bodies.
+
+Used by the benchmarks which need real HTTP round trips.
+"""
+import gzip
+import json
+import multiprocessing
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def trades_body(count=1000):
+    rng = random.Random(0)
+    return json.dumps({
+        'result': [[i, 1600000000 + i, rng.uniform(9000, 11000), rng.random()]
+                   for i in range(count)],
+        'allowance': {'cost': 1, 'remaining': 1000000}}).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = b'{}'
+    gzipped = None
+
+    def do_GET(self):
+        body = self.body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if self.gzipped and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = self.gzipped
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(body, ready, port, compress):
+    Handler.body = body
+    if compress:
+        Handler.gzipped = gzip.compress(body, 6)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    port.value = server.server_address[1]
+    ready.set()
+    server.serve_forever()
+
+
+def start(body, processes=1, compress=False):
+    """Serve ``body`` from ``processes`` server processes.
+
+    With ``compress`` the body is gzipped for clients accepting it.
+
+    :returns: ``(urls, stop)``
+    """
+    urls = []
+    servers = []
+    for _ in range(processes):
+        ready = multiprocessing.Event()
+        port = multiprocessing.Value('i', 0)
+        server = multiprocessing.Process(
+            target=_serve, args=(body, ready, port, compress), daemon=True)
+        server.start()
+        ready.wait()
+        urls.append('http://127.0.0.1:%d' % port.value)
+        servers.append(server)
+
+    def stop():
+        for server in servers:
+            server.terminate()
+            server.join()
+
+    return urls, stop
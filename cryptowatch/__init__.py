@@ -1,3 +1,30 @@
 """An unofficial Python wrapper for the Cryptowatch public API
 .. moduleauthor:: uoshvis
 """
+
+from importlib import import_module
+
+# Public names resolved on first access, so importing the package does not
+# pull in requests, numpy or multiprocessing.
+_LAZY = {
+    'Client': 'cryptowatch.api_client',
+    'Catalog': 'cryptowatch.catalog',
+    'MarketRoute': 'cryptowatch.routes',
+    'RateBudget': 'cryptowatch.budget',
+    'CryptowatchAPIException': 'cryptowatch.exceptions',
+    'CryptowatchResponseException': 'cryptowatch.exceptions',
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,132 @@
+"""Module related to cross-market statistics over aggregate summaries.
+
+The ``summaries`` aggregate is decoded once into columns, with exchange,
+pair and asset symbols replaced by integer codes, so every statistic is a
+vectorized group-by over those codes.
+"""
+
+import numpy as np
+
+from cryptowatch import columnar
+
+
+class Summaries(object):
+    """Columnar decode of a ``get_aggregates('summaries')`` response.
+
+    ``exchanges``, ``pairs`` and ``assets`` hold the distinct symbols; the
+    ``*_code`` columns index into them, one row per market.
+
+    .. code-block:: python
+
+        summaries = Summaries(client.get_aggregates('summaries'), catalog)
+        summaries.top_movers(10)
+        summaries.index_prices('usd')
+        summaries.dispersion()
+
+    :param catalog: a loaded :class:`cryptowatch.catalog.Catalog` providing
+        the base and quote of each pair; markets whose pair it does not list
+        are dropped
+    """
+
+    FIELDS = columnar.SUMMARY_FIELDS
+
+    def __init__(self, response, catalog):
+        keys, columns = columnar.decode_summaries(response)
+        exchanges, exchange_code, pairs, pair_code = columnar.market_codes(keys)
+        pair_assets = [catalog.pair_assets(pair) for pair in pairs]
+        assets = sorted(set(a for known in pair_assets if known for a in known))
+        asset_index = {asset: index for index, asset in enumerate(assets)}
+        base_of = np.array([asset_index[known[0]] if known else -1
+                            for known in pair_assets], dtype=np.int64)
+        quote_of = np.array([asset_index[known[1]] if known else -1
+                             for known in pair_assets], dtype=np.int64)
+        base_code = base_of[pair_code]
+        quote_code = quote_of[pair_code]
+        listed = base_code >= 0
+
+        self.exchanges = exchanges
+        self.pairs = pairs
+        self.assets = np.array(assets, dtype=str)
+        self.markets = np.array(keys, dtype=str)[listed]
+        self.exchange_code = exchange_code[listed]
+        self.pair_code = pair_code[listed]
+        self.base_code = base_code[listed]
+        self.quote_code = quote_code[listed]
+        self.columns = columnar.take(columns, listed)
+
+    def __len__(self):
+        return len(self.markets)
+
+    def top_movers(self, count=10, min_volume=0.0, ascending=False):
+        """Return the markets with the largest 24h change.
+
+        :param min_volume: ignore markets trading less base volume
+        :param ascending: return the largest losses instead
+        :returns: dict with ``market`` and ``change_percentage`` columns
+        """
+        change = self.columns['change_percentage']
+        candidates = np.flatnonzero((self.columns['volume'] >= min_volume)
+                                    & np.isfinite(change))
+        keys = change[candidates] if ascending else -change[candidates]
+        if count < len(candidates):
+            candidates = candidates[np.argpartition(keys, count)[:count]]
+            keys = change[candidates] if ascending else -change[candidates]
+        candidates = candidates[np.argsort(keys, kind='stable')]
+        return {'market': self.markets[candidates],
+                'change_percentage': change[candidates]}
+
+    def index_prices(self, quote):
+        """Return the volume weighted last price of each asset in ``quote``.
+
+        :returns: dict with ``asset``, ``price``, ``volume`` and
+            ``markets`` columns, for the assets traded against ``quote``
+        """
+        where = np.flatnonzero(self.assets == quote)
+        if not len(where):
+            return {'asset': np.empty(0, str), 'price': np.empty(0),
+                    'volume': np.empty(0), 'markets': np.empty(0, np.int64)}
+        last = self.columns['last']
+        volume = self.columns['volume']
+        rows = (self.quote_code == where[0]) & np.isfinite(last) & (volume > 0)
+        base = self.base_code[rows]
+        size = len(self.assets)
+        weights = np.bincount(base, volume[rows], size)
+        notional = np.bincount(base, last[rows] * volume[rows], size)
+        markets = np.bincount(base, minlength=size)
+        present = np.flatnonzero(markets)
+        return {'asset': self.assets[present],
+                'price': notional[present] / weights[present],
+                'volume': weights[present],
+                'markets': markets[present]}
+
+    def dispersion(self, min_exchanges=2):
+        """Return the spread of the last price of each pair across exchanges.
+
+        :returns: dict with ``pair``, ``exchanges``, ``min``, ``max``,
+            ``mean``, ``std`` and ``spread`` (``(max - min) / mean``) columns
+        """
+        last = self.columns['last']
+        rows = np.flatnonzero(np.isfinite(last))
+        rows = rows[np.argsort(self.pair_code[rows], kind='stable')]
+        codes = self.pair_code[rows]
+        prices = last[rows]
+        if not len(rows):
+            result = {field: np.empty(0) for field in
+                      ('min', 'max', 'mean', 'std', 'spread')}
+            result.update(pair=np.empty(0, str),
+                          exchanges=np.empty(0, np.int64))
+            return result
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        counts = np.diff(np.r_[starts, len(codes)])
+        mean = np.add.reduceat(prices, starts) / counts
+        square = np.add.reduceat(prices * prices, starts) / counts
+        low = np.minimum.reduceat(prices, starts)
+        high = np.maximum.reduceat(prices, starts)
+        keep = counts >= min_exchanges
+        return {'pair': self.pairs[codes[starts]][keep],
+                'exchanges': counts[keep],
+                'min': low[keep],
+                'max': high[keep],
+                'mean': mean[keep],
+                'std': np.sqrt(np.maximum(square - mean * mean, 0))[keep],
+                'spread': ((high - low) / mean)[keep]}
@@ -1,58 +1,213 @@
 """Module related to the client interface to cryptowat.ch API."""
 
+import json
+import threading
+import weakref
 from urllib.parse import quote_plus, urlencode
-import requests
 from cryptowatch.exceptions import (
     CryptowatchAPIException,
     CryptowatchResponseException
 )
+from cryptowatch.routes import MarketRoute
+
+
+class Response(dict):
+    """A decoded API response, aware of the route it was returned by.
+
+    It is the response ``dict`` itself, with tabular routes (``trades``,
+    ``ohlc``, ``orderbook``, ``price``, ``summary``, ``prices`` and
+    ``summaries``) also convertible to a DataFrame or an Arrow table, see
+    :mod:`cryptowatch.frames`.
+    """
+
+    def __init__(self, data, route=None):
+        super(Response, self).__init__(data)
+        self.route = route
+
+    def to_pandas(self):
+        """Return the result as a ``pandas.DataFrame``."""
+        from cryptowatch import frames
+        return frames.to_pandas(self, self.route)
+
+    def to_arrow(self):
+        """Return the result as a ``pyarrow.Table``."""
+        from cryptowatch import frames
+        return frames.to_arrow(self, self.route)
 
 
 class Client(object):
-    """The public client to the cryptowat.ch api."""
+    """The public client to the cryptowat.ch api.
+
+    A client may be shared by any number of threads. By default they share
+    one session whose connection pool keeps at most ``pool_size``
+    connections per host: a thread finding every connection busy waits for
+    one to be released rather than opening a connection which the full pool
+    would then discard. With ``sessions='thread'`` each thread gets its own
+    session and connection instead.
+    """
 
     API_URL = 'https://api.cryptowat.ch'
     ROUTES_MARKET = ['price', 'summary', 'orderbook', 'trades', 'ohlc']
     ROUTES_PARAMS = ['trades', 'ohlc']
     ROUTES_AGGREGATE = ['prices', 'summaries']
+    PARAMS = {'trades': ('limit', 'since'),
+              'ohlc': ('before', 'after', 'periods')}
 
-    def __init__(self):
-        self.uri = 'https://api.cryptowat.ch'
-        self.session = self._init_session()
+    SESSIONS = ('shared', 'thread')
+    ENCODINGS = ('zstd', 'br', 'gzip', 'deflate')
 
-    @staticmethod
-    def _init_session():
+    def __init__(self, cache=None, sessions='shared', pool_size=10,
+                 pool_block=True, compression=True):
+        """
+        :param cache: optional :class:`cryptowatch.cache.SWRCache` serving
+            repeated requests of the same url
+        :param sessions: ``'shared'`` for one session used by every thread,
+            ``'thread'`` for a session per thread
+        :param pool_size: connections kept per host by the shared session
+        :param pool_block: whether threads wait for a connection of the
+            shared pool when all are in use, instead of opening extra ones
+        :param compression: ``True`` to accept every available encoding,
+            ``False`` for uncompressed responses, or the encodings to accept
+        """
+        if sessions not in self.SESSIONS:
+            raise ValueError('Sessions must be one of %s, not "%s"'
+                             % (', '.join(self.SESSIONS), sessions))
+        if pool_size < 1:
+            raise ValueError('Pool size must be positive')
+        if compression not in (True, False):
+            compression = tuple(compression)
+            unknown = set(compression) - set(self.ENCODINGS)
+            if unknown:
+                raise ValueError('Unknown encodings: %s'
+                                 % ', '.join(sorted(unknown)))
+        self.uri = 'https://api.cryptowat.ch'
+        self.sessions = sessions
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.compression = compression
+        self.transfer_stats = {}
+        self._session = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Sessions of the threads are dropped along with the threads.
+        self._sessions = weakref.WeakSet()
+        self.cache = cache
+        if cache is not None:
+            cache.start()
+
+    @property
+    def session(self):
+        """The ``requests`` session, created on first use.
+
+        Neither ``requests`` is imported nor the session built until the
+        first request, which keeps instantiating a client cheap for
+        short-lived processes. In ``'thread'`` mode this is the session of
+        the calling thread, closed once the thread exits.
+        """
+        if self.sessions == 'thread':
+            session = getattr(self._local, 'session', None)
+            if session is None:
+                session = self._local.session = self._init_session()
+                with self._lock:
+                    self._sessions.add(session)
+            return session
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._init_session()
+                    self._sessions.add(self._session)
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        if self.sessions == 'thread':
+            self._local.session = session
+        else:
+            self._session = session
+
+    def _init_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
         session = requests.Session()
         session.headers.update({'Accept': 'application/json',
+                                'Accept-Encoding': self._accept_encoding(),
                                 'User-Agent': 'cryptowatch/python'})
+        if self.sessions == 'thread':
+            # A thread makes one request at a time.
+            adapter = HTTPAdapter(pool_maxsize=1)
+        else:
+            adapter = HTTPAdapter(pool_maxsize=self.pool_size,
+                                  pool_block=self.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        # Close the connections of a session dropped without close().
+        weakref.finalize(session, adapter.close)
         return session
 
-    @staticmethod
-    def _encode_params(**kwargs):
+    def _accept_encoding(self):
+        from urllib3.util.request import ACCEPT_ENCODING
+        available = ACCEPT_ENCODING.split(',')
+        if self.compression is False:
+            return 'identity'
+        if self.compression is True:
+            return ', '.join(e for e in self.ENCODINGS if e in available)
+        missing = [e for e in self.compression if e not in available]
+        if missing:
+            # Brotli comes with the compression extra, zstd with urllib3 2.
+            raise ValueError('The installed urllib3 cannot decode %s'
+                             % ', '.join(missing))
+        return ', '.join(self.compression)
+
+    def close(self):
+        """Close every session of the client and their connections.
+
+        The next request opens a new session.
+        """
+        with self._lock:
+            sessions, self._sessions = list(self._sessions), weakref.WeakSet()
+            self._session = None
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
+
+    @classmethod
+    def _encode_params(cls, **kwargs):
         data = kwargs.get('data', None)
+        params = data.get('params', {})
         payload = {}
-        if "params" in data and 'apikey' in data['params']:
-            payload['apikey'] =  data['params']['apikey']
-        if data['route'] == 'trades':
-            params = data['params']
-            if 'limit' in params:
-                payload['limit'] = params['limit']
-            if 'since' in params:
-                payload['since'] = params['since']
-        elif data['route'] == 'ohlc':
-            params = data['params']
-            if 'before' in params:
-                payload['before'] = params['before']
-            if 'after' in params:
-                payload['after'] = params['after']
-            if 'periods' in params:
-                payload['periods'] = params['periods']
+        if 'apikey' in params:
+            payload['apikey'] = params['apikey']
+        for name in cls.PARAMS.get(data['route'], ()):
+            if name in params:
+                payload[name] = params[name]
 
         return urlencode(payload, quote_via=quote_plus)
 
-    def _request(self, method, uri):
-        response = getattr(self.session, method)(uri)
-        return self._handle_response(response)
+    def _request(self, method, uri, route=None):
+        if self.cache is not None and method == 'get':
+            return self.cache.get(uri, lambda: self._fetch(method, uri, route))
+        return self._fetch(method, uri, route)
+
+    def _fetch(self, method, uri, route=None):
+        response = getattr(self.session, method)(uri, stream=True)
+        data = self._handle_response(response)
+        self._count_transfer(route, uri, response)
+        return Response(data, route) if isinstance(data, dict) else data
+
+    def _count_transfer(self, route, uri, response):
+        if route is None:
+            # Index endpoints are counted under their first path segment.
+            path = uri[len(self.API_URL):].split('?')[0].split('/')
+            route = path[1] if uri.startswith(self.API_URL) and len(path) > 1 \
+                else 'other'
+        with self._lock:
+            stats = self.transfer_stats.get(route)
+            if stats is None:
+                stats = self.transfer_stats[route] = {
+                    'responses': 0, 'compressed': 0, 'uncompressed': 0}
+            stats['responses'] += 1
+            stats['compressed'] += response.raw.tell()
+            stats['uncompressed'] += len(response.content)
 
     def _create_uri(self, path, symbol):
         uri = self.API_URL + '/' + path
@@ -60,19 +215,58 @@ class Client(object):
             uri += '/' + symbol
         return uri
 
-    def _request_api(self, method, path, symbol):
+    def _request_api(self, method, path, symbol, route=None):
         uri = self._create_uri(path, symbol)
-        return self._request(method, uri)
+        return self._request(method, uri, route)
 
-    def _get(self, path, symbol=None):
-        return self._request_api('get', path, symbol)
+    def _get(self, path, symbol=None, route=None):
+        return self._request_api('get', path, symbol, route)
+
+    @staticmethod
+    def _read(response):
+        """Read the body of a streamed response.
+
+        :raises requests.RequestException: the one ``requests`` raises for
+            the ``urllib3`` error, which would not derive from ``OSError``
+        """
+        from requests import exceptions
+        from urllib3.exceptions import (
+            DecodeError,
+            HTTPError,
+            ProtocolError,
+            ReadTimeoutError,
+            SSLError
+        )
+        try:
+            return response.raw.read(decode_content=True)
+        except HTTPError as error:
+            response.close()
+            if isinstance(error, ProtocolError):
+                raise exceptions.ChunkedEncodingError(error)
+            if isinstance(error, DecodeError):
+                raise exceptions.ContentDecodingError(error)
+            if isinstance(error, ReadTimeoutError):
+                raise exceptions.ConnectionError(error)
+            if isinstance(error, SSLError):
+                raise exceptions.SSLError(error)
+            raise exceptions.RequestException(error)
 
     @staticmethod
     def _handle_response(response):
         if not str(response.status_code).startswith('2'):
+            # Read the body of the streamed response, which releases its
+            # connection to the pool and keeps it readable on the exception.
+            try:
+                response.content  # pylint: disable=pointless-statement
+            finally:
+                response.close()
             raise CryptowatchAPIException(response)
+        # Decompress straight from the socket and parse the bytes, sparing
+        # the chunks and text copies of the body made by response.json().
+        response._content = Client._read(response)
+        response._content_consumed = True
         try:
-            return response.json()
+            return json.loads(response.content)
         except ValueError:
             raise CryptowatchResponseException('Invalid Response: %s' % response.text)
 
@@ -672,20 +866,49 @@ class Client(object):
         """
 
         data = kwargs.get('data', None)
+        route = None
         if data and isinstance(data, dict):
             if 'exchange' in data:
                 path = data['exchange']
                 if 'pair' in data:
                     path += '/' + data['pair']
                     if 'route' in data and data['route'] in self.ROUTES_MARKET:
-                        path += '/' + data['route']
-                        if data['route'] in self.ROUTES_PARAMS and 'params' in data:
+                        route = data['route']
+                        path += '/' + route
+                        if route in self.ROUTES_PARAMS and 'params' in data:
                             path += '?' + self._encode_params(path=path, data=data)
         if path:
-            return self._get('markets', path)
+            return self._get('markets', path, route)
 
         return self._get('markets')
 
+    def prepare_market(self, exchange, pair, route=None, params=None,
+                       catalog=None):
+        """Validate a market request once so it can be reissued cheaply.
+
+        :param exchange: required
+        :type exchange: str
+        :param pair: required
+        :type pair: str
+        :param route: one of ``ROUTES_MARKET``
+        :type route: str
+        :param params: params supported by the route, see :meth:`get_markets`
+        :type params: dict
+        :param catalog: also check the market is listed in this catalog
+        :type catalog: cryptowatch.catalog.Catalog
+
+        .. code-block:: python
+
+          route = client.prepare_market('gdax', 'btcusd', 'ohlc',
+                                        params={'periods': '60'})
+          route.fetch()
+
+        :returns: :class:`cryptowatch.routes.MarketRoute`
+        :raises ValueError: on invalid input
+
+        """
+        return MarketRoute(self, exchange, pair, route, params, catalog)
+
     def get_aggregates(self, *args):
         """Retrieves the prices and summaries of all markets
         on the site in a single request.
@@ -754,4 +977,4 @@ class Client(object):
         """
         if not args or args[0] not in self.ROUTES_AGGREGATE:
             raise ValueError('Use either "prices", or "summaries"')
-        return self._get('markets', args[0])
+        return self._get('markets', args[0], args[0])
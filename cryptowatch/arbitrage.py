@@ -0,0 +1,154 @@
+"""Module related to scanning price snapshots for arbitrage.
+
+Candidate opportunities are derived once from the catalog; each snapshot
+of ``get_aggregates('prices')`` is then evaluated against all of them with
+a handful of array operations.
+"""
+
+from collections import namedtuple
+from itertools import combinations
+
+import numpy as np
+
+Opportunity = namedtuple('Opportunity', ['profit', 'path', 'markets'])
+Opportunity.__doc__ = """A ranked opportunity.
+
+``profit`` is the relative gain after fees. For a triangle, ``path`` is
+the cycle of assets traded, e.g. ``('usd', 'btc', 'eth', 'usd')``, and
+``markets`` the three markets in trading order. For a cross-venue spread,
+``path`` holds the pair and ``markets`` the market to buy on, then the
+one to sell on.
+"""
+
+
+class ArbitrageScanner(object):
+    """Triangular and cross-venue arbitrage over price snapshots.
+
+    .. code-block:: python
+
+        scanner = ArbitrageScanner(catalog, fee=0.001)
+        while True:
+            found = scanner.scan(client.get_aggregates('prices'))
+            found['triangles'][:5]
+
+    :param catalog: a loaded :class:`cryptowatch.catalog.Catalog`, only its
+        active markets are considered
+    :param fee: relative fee paid on every trade
+    """
+
+    def __init__(self, catalog, fee=0.0):
+        self.fee = fee
+        markets = []
+        edges = {}
+        for exchange in sorted(catalog.listed_exchanges):
+            for pair in sorted(catalog.markets_by_exchange(exchange, active=True)):
+                assets = catalog.pair_assets(pair)
+                if assets is None:
+                    continue
+                edges.setdefault(exchange, {})[assets] = len(markets)
+                markets.append((exchange, pair, assets))
+        self.markets = ['%s:%s' % (exchange, pair) for exchange, pair, _ in markets]
+
+        cycles = []
+        legs = []
+        signs = []
+        for exchange_edges in edges.values():
+            for cycle, cycle_legs, cycle_signs in _triangles(exchange_edges):
+                cycles.append(cycle)
+                legs.append(cycle_legs)
+                signs.append(cycle_signs)
+        self.cycles = cycles
+        self._legs = np.array(legs, dtype=np.int64).reshape(-1, 3)
+        self._signs = np.array(signs, dtype=float).reshape(-1, 3)
+
+        pairs = np.array([pair for _, pair, _ in markets], dtype=str)
+        self._by_pair = np.argsort(pairs, kind='stable')
+        sorted_pairs = pairs[self._by_pair]
+        self._pair_starts = np.flatnonzero(
+            np.r_[len(pairs) > 0, sorted_pairs[1:] != sorted_pairs[:-1]])
+        self._pairs = sorted_pairs[self._pair_starts]
+
+    def prices(self, response):
+        """Return the snapshot prices aligned on ``markets``, ``nan`` if missing."""
+        result = response['result']
+        return np.fromiter((result.get(key, np.nan) for key in self.markets),
+                           float, len(self.markets))
+
+    def triangles(self, prices, min_profit=0.0, limit=None):
+        """Return the triangular opportunities of one exchange, best first."""
+        if not len(self._legs):
+            return []
+        with np.errstate(invalid='ignore', divide='ignore'):
+            logs = np.log(prices)
+        growth = (self._signs * logs[self._legs]).sum(axis=1)
+        keep = 3 * np.log1p(-self.fee)
+        # A cycle traded backwards earns the inverse of the forward rate.
+        profit = np.expm1(np.abs(growth) + keep)
+        candidates = np.flatnonzero(profit > min_profit)
+        candidates = candidates[np.argsort(-profit[candidates], kind='stable')]
+        found = []
+        for index in candidates[:limit]:
+            cycle, legs = self.cycles[index], self._legs[index]
+            if growth[index] < 0:
+                cycle, legs = cycle[::-1], legs[::-1]
+            found.append(Opportunity(float(profit[index]), cycle,
+                                     tuple(self.markets[leg] for leg in legs)))
+        return found
+
+    def cross_venue(self, prices, min_profit=0.0, limit=None):
+        """Return the best buy low, sell high spread of each pair, best first."""
+        if not len(self._pair_starts):
+            return []
+        grouped = prices[self._by_pair]
+        low = np.fmin.reduceat(grouped, self._pair_starts)
+        high = np.fmax.reduceat(grouped, self._pair_starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profit = high / low * (1 - self.fee) ** 2 - 1
+        candidates = np.flatnonzero(profit > min_profit)
+        candidates = candidates[np.argsort(-profit[candidates], kind='stable')]
+        ends = np.r_[self._pair_starts[1:], len(grouped)]
+        found = []
+        for index in candidates[:limit]:
+            members = self._by_pair[self._pair_starts[index]:ends[index]]
+            values = prices[members]
+            buy = members[np.nanargmin(values)]
+            sell = members[np.nanargmax(values)]
+            found.append(Opportunity(float(profit[index]), (self._pairs[index],),
+                                     (self.markets[buy], self.markets[sell])))
+        return found
+
+    def scan(self, response, min_profit=0.0, limit=None):
+        """Evaluate every candidate against a ``prices`` aggregate response.
+
+        :returns: dict with ``triangles`` and ``cross_venue`` lists of
+            :class:`Opportunity`
+        """
+        prices = self.prices(response)
+        return {'triangles': self.triangles(prices, min_profit, limit),
+                'cross_venue': self.cross_venue(prices, min_profit, limit)}
+
+
+def _triangles(edges):
+    """Yield ``(cycle, legs, signs)`` for every triangle of one exchange.
+
+    Trading ``a`` for ``b`` on a market whose base is ``a`` multiplies by
+    its price, on one whose base is ``b`` divides by it.
+    """
+    neighbours = {}
+    for base, quote in edges:
+        neighbours.setdefault(base, set()).add(quote)
+        neighbours.setdefault(quote, set()).add(base)
+
+    def leg(source, target):
+        if (source, target) in edges:
+            return edges[(source, target)], 1.0
+        return edges[(target, source)], -1.0
+
+    for first in sorted(neighbours):
+        later = sorted(n for n in neighbours[first] if n > first)
+        for second, third in combinations(later, 2):
+            if third not in neighbours[second]:
+                continue
+            cycle = (first, second, third, first)
+            legs = [leg(cycle[i], cycle[i + 1]) for i in range(3)]
+            yield cycle, [l for l, _ in legs], [s for _, s in legs]
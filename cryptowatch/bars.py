@@ -0,0 +1,223 @@
+"""Module related to aggregating trades into bars.
+
+Trades are the columns decoded by :mod:`cryptowatch.columnar`. A bar is
+closed either by time (``'time'``, every ``size`` seconds) or once it holds
+``size`` trades (``'tick'``), ``size`` base volume (``'volume'``) or
+``size`` quote volume (``'dollar'``). Bars are emitted as the columns of
+``columnar.BAR_FIELDS``, with their volume weighted average price.
+"""
+
+import numpy as np
+
+from cryptowatch import columnar
+
+KINDS = ('time', 'tick', 'volume', 'dollar')
+
+
+class TradeAggregator(object):
+    """Streaming trade to bar aggregator.
+
+    Each batch of trades is reduced in a single vectorized pass and only the
+    bar still open is kept between batches, so memory stays bounded however
+    long the aggregator runs.
+
+    Volume and dollar bars are cut on a fixed grid of ``size``: a trade
+    crossing a boundary belongs to the bar it closes and the overshoot is
+    credited to the next bar, so bars average exactly ``size``.
+
+    .. code-block:: python
+
+        aggregator = TradeAggregator('time', 5)
+        bars = aggregator.consume_response(
+            client.get_markets(data={'exchange': 'gdax', 'pair': 'btcusd',
+                                     'route': 'trades'}))
+
+    :raises ValueError: for an unknown kind or a size which is not positive
+    """
+
+    def __init__(self, kind, size):
+        if kind not in KINDS:
+            raise ValueError('Unknown bar kind "%s", use one of %s'
+                             % (kind, ', '.join(KINDS)))
+        if size <= 0:
+            raise ValueError('Bar size must be positive')
+        self.kind = kind
+        self.size = size
+        self.bar = None
+        self._key = 0
+        self._progress = 0.0
+        self._last_time = None
+        self._last_trades = set()
+
+    def _dedupe(self, trades):
+        times = trades['timestamp']
+        order = np.argsort(times, kind='stable')
+        trades = columnar.take(trades, order)
+        if self._last_time is None:
+            return trades
+        times = trades['timestamp']
+        keep = times > self._last_time
+        for index in np.flatnonzero(times == self._last_time):
+            row = tuple(trades[field][index].item()
+                        for field in columnar.TRADE_FIELDS)
+            keep[index] = row not in self._last_trades
+        return columnar.take(trades, keep)
+
+    def _remember(self, trades):
+        times = trades['timestamp']
+        last = times[-1].item()
+        if last != self._last_time:
+            self._last_trades = set()
+            self._last_time = last
+        first = int(np.searchsorted(times, last, 'left'))
+        self._last_trades.update(zip(*(trades[field][first:].tolist()
+                                       for field in columnar.TRADE_FIELDS)))
+
+    def _keys(self, trades):
+        """Return the bar key of every trade and the progress of the last bar."""
+        if self.kind == 'time':
+            return trades['timestamp'] // self.size, 0.0
+        if self.kind == 'tick':
+            measure = np.ones(len(trades['price']))
+        elif self.kind == 'volume':
+            measure = trades['amount']
+        else:
+            measure = trades['price'] * trades['amount']
+        total = self._progress + np.cumsum(measure)
+        keys = np.floor((total - measure) / self.size).astype(np.int64)
+        return keys + self._key, total[-1] - (keys[-1] * self.size)
+
+    def consume(self, trades):
+        """Add a batch of trades, returning the bars it closed.
+
+        Trades already seen, e.g. from overlapping ``since`` polls, are
+        skipped.
+
+        :returns: closed bar columns, possibly empty
+        """
+        trades = self._dedupe({field: np.asarray(trades[field],
+                                                 columnar.dtype_of(field))
+                               for field in columnar.TRADE_FIELDS})
+        if not len(trades['timestamp']):
+            return columnar.empty(columnar.BAR_FIELDS)
+        self._remember(trades)
+
+        keys, progress = self._keys(trades)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        price = trades['price']
+        amount = trades['amount']
+        times = trades['timestamp']
+        bars = {
+            'open_time': times[starts],
+            'close_time': times[ends - 1],
+            'open': price[starts],
+            'high': np.maximum.reduceat(price, starts),
+            'low': np.minimum.reduceat(price, starts),
+            'close': price[ends - 1],
+            'volume': np.add.reduceat(amount, starts),
+            'dollar_volume': np.add.reduceat(price * amount, starts),
+            'count': ends - starts,
+        }
+        keys = keys[starts]
+        if self.kind == 'time':
+            bars['close_time'] = (keys + 1) * self.size
+
+        previous = None
+        if self.bar is not None and keys[0] != self._key:
+            # A time bar left open by the previous batch ended meanwhile.
+            previous = self.flush()
+        elif self.bar is not None:
+            bar = self.bar
+            bars['open_time'][0] = bar['open_time']
+            bars['open'][0] = bar['open']
+            bars['high'][0] = max(bars['high'][0], bar['high'])
+            bars['low'][0] = min(bars['low'][0], bar['low'])
+            bars['volume'][0] += bar['volume']
+            bars['dollar_volume'][0] += bar['dollar_volume']
+            bars['count'][0] += bar['count']
+        bars['vwap'] = bars['dollar_volume'] / bars['volume']
+
+        closed = len(keys) - 1
+        if self.kind == 'time':
+            self._key = keys[-1]
+        elif progress >= self.size:
+            closed += 1
+            self._key = keys[-1] + 1
+            progress -= self.size
+        else:
+            self._key = keys[-1]
+        self._progress = progress
+        self.bar = None
+        if closed < len(keys):
+            self.bar = {field: values[-1].item() for field, values in bars.items()}
+        if previous is not None:
+            return {field: np.concatenate((previous[field], bars[field][:closed]))
+                    for field in columnar.BAR_FIELDS}
+        return {field: bars[field][:closed] for field in columnar.BAR_FIELDS}
+
+    def consume_response(self, response):
+        """Add the trades of a ``trades`` route response."""
+        return self.consume(columnar.decode_trades(response))
+
+    def flush(self, now=None):
+        """Close the open bar.
+
+        :param now: for time bars, only close the open bar once ``now`` is
+            past its end
+        :returns: bar columns holding the closed bar, possibly empty
+        """
+        bar = self.bar
+        if bar is None or (now is not None and self.kind == 'time'
+                           and now < bar['close_time']):
+            return columnar.empty(columnar.BAR_FIELDS)
+        self.bar = None
+        self._key += 1
+        self._progress = 0.0
+        return {field: np.array([bar[field]], columnar.dtype_of(field))
+                for field in columnar.BAR_FIELDS}
+
+
+class MarketBars(object):
+    """Bar aggregators for many markets, fed by polling their trades.
+
+    .. code-block:: python
+
+        bars = MarketBars({'time': 5, 'volume': 10.0})
+        bars.add('gdax', 'btcusd')
+        for (exchange, pair), kind, closed in bars.poll(client):
+            ...
+
+    """
+
+    def __init__(self, specs):
+        self.specs = dict(specs)
+        self.aggregators = {}
+
+    def add(self, exchange, pair):
+        """Start aggregating the trades of a market."""
+        self.aggregators[(exchange, pair)] = {
+            kind: TradeAggregator(kind, size) for kind, size in self.specs.items()}
+
+    def consume(self, exchange, pair, trades):
+        """Add trades of a market to each of its aggregators.
+
+        :returns: dict mapping each bar kind to its closed bars
+        """
+        return {kind: aggregator.consume(trades) for kind, aggregator
+                in self.aggregators[(exchange, pair)].items()}
+
+    def poll(self, client, limit=None):
+        """Fetch the new trades of every market and aggregate them.
+
+        :returns: generator of ``((exchange, pair), kind, closed bars)``
+        """
+        for market, aggregators in self.aggregators.items():
+            params = {} if limit is None else {'limit': limit}
+            since = next(iter(aggregators.values()))._last_time
+            if since is not None:
+                params['since'] = since
+            route = client.prepare_market(market[0], market[1], 'trades', params)
+            trades = columnar.decode_trades(route.fetch())
+            for kind, closed in self.consume(market[0], market[1], trades).items():
+                yield market, kind, closed
@@ -0,0 +1,92 @@
+"""Module related to sharing the API request allowance."""
+
+import multiprocessing
+import time
+
+
+class RateBudget(object):
+    """Token bucket shared by threads and processes.
+
+    The bucket holds up to ``capacity`` tokens and is refilled at ``rate``
+    tokens per second. Its state lives in shared memory, so a budget passed
+    to child processes when they are started is drawn down by all of them.
+
+    .. code-block:: python
+
+        budget = RateBudget(capacity=100, rate=10)
+        budget.acquire()
+        response = client.get_markets(data=data)
+        budget.sync(response)
+
+    """
+
+    def __init__(self, capacity, rate):
+        if capacity <= 0 or rate <= 0:
+            raise ValueError('Budget capacity and rate must be positive')
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self._lock = multiprocessing.Lock()
+        # [tokens, time of the last refill]
+        self._state = multiprocessing.RawArray('d', [self.capacity,
+                                                     time.monotonic()])
+
+    def _refill(self, now):
+        tokens = self._state[0] + (now - self._state[1]) * self.rate
+        self._state[0] = min(self.capacity, tokens)
+        self._state[1] = now
+
+    @property
+    def remaining(self):
+        """Tokens currently available."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._state[0]
+
+    def try_acquire(self, cost=1.0):
+        """Take ``cost`` tokens if they are available.
+
+        :returns: whether the tokens were taken
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._state[0] < cost:
+                return False
+            self._state[0] -= cost
+            return True
+
+    def acquire(self, cost=1.0, timeout=None):
+        """Take ``cost`` tokens, waiting for the bucket to refill.
+
+        :returns: whether the tokens were taken before ``timeout``
+        """
+        cost = min(cost, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                missing = cost - self._state[0]
+                if missing <= 0:
+                    self._state[0] -= cost
+                    return True
+            wait = missing / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+    def debit(self, cost):
+        """Take ``cost`` tokens without waiting, going negative if needed."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._state[0] -= cost
+
+    def sync(self, response, cost=1.0):
+        """Charge the actual cost reported in a response's ``allowance``.
+
+        ``cost`` is what was acquired for the request beforehand; the
+        difference with the reported cost is debited or refunded.
+        """
+        allowance = response.get('allowance') if isinstance(response, dict) else None
+        if allowance and 'cost' in allowance:
+            self.debit(allowance['cost'] - cost)
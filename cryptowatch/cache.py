@@ -0,0 +1,204 @@
+"""Module related to caching responses with stale-while-revalidate."""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class _Entry(object):
+
+    __slots__ = ('value', 'time', 'loader', 'hits')
+
+    def __init__(self, value, loaded_at, loader):
+        self.value = value
+        self.time = loaded_at
+        self.loader = loader
+        self.hits = 0.0
+
+
+class SWRCache(object):
+    """Stale-while-revalidate cache.
+
+    A value younger than ``soft_ttl`` is returned as is. Between
+    ``soft_ttl`` and ``hard_ttl`` the stale value is returned at once while a
+    single background refresh runs. Past ``hard_ttl``, or on a miss, callers
+    block on the load, concurrent callers sharing the same one.
+
+    With ``hot_keys`` set, a background thread keeps that many of the most
+    accessed keys (by exponentially decayed access counts) refreshed before
+    they go stale, as long as their count is at least ``min_hits``: the
+    count halves on every warming round, so a key no longer read stops
+    being refreshed after a few rounds.
+
+    At most ``max_size`` keys are kept, ``None`` for no limit: loading a key
+    past it evicts the least accessed other keys, the oldest first. A
+    client caches every URL it gets, including those of ``since`` or
+    ``after`` params, so the limit bounds the memory of long running ones.
+
+    .. code-block:: python
+
+        client = Client(cache=SWRCache(soft_ttl=5, hard_ttl=60, hot_keys=20))
+        client.get_markets(data={'exchange': 'gdax', 'pair': 'btcusd',
+                                 'route': 'summary'})
+
+    Cached responses are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, soft_ttl, hard_ttl, hot_keys=0, workers=4,
+                 max_size=1024, min_hits=1.0, clock=time.monotonic):
+        if not 0 <= soft_ttl <= hard_ttl:
+            raise ValueError('Expected 0 <= soft_ttl <= hard_ttl')
+        if max_size is not None and max_size < 1:
+            raise ValueError('Expected a positive max_size or None')
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.hot_keys = hot_keys
+        self.min_hits = min_hits
+        self.max_size = max_size
+        self.workers = workers
+        self.clock = clock
+        self.stats = {'hits': 0, 'stale': 0, 'misses': 0, 'refreshes': 0,
+                      'errors': 0, 'evictions': 0}
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._warmer = None
+        self._closed = threading.Event()
+
+    def _load(self, key, loader, future):
+        try:
+            value = loader()
+        except Exception as error:  # pylint: disable=broad-except
+            # Raised to the callers waiting on the load instead.
+            with self._lock:
+                del self._loading[key]
+                self.stats['errors'] += 1
+            future.set_exception(error)
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            # A first load counts the access it was made for.
+            hits = entry.hits if entry is not None else 1.0
+            entry = _Entry(value, self.clock(), loader)
+            entry.hits = hits
+            self._entries[key] = entry
+            del self._loading[key]
+            if self.max_size is not None and len(self._entries) > self.max_size:
+                self._evict(key)
+        future.set_result(value)
+
+    def _evict(self, loaded):
+        """Drop the least accessed keys past ``max_size``, except ``loaded``.
+
+        Must be called with the lock held.
+        """
+        entries = self._entries
+        while len(entries) > self.max_size:
+            coldest = min((key for key in entries if key != loaded),
+                          key=lambda key: (entries[key].hits, entries[key].time))
+            del entries[coldest]
+            self.stats['evictions'] += 1
+
+    def _start(self, key, loader):
+        """Return the load in flight for ``key`` and whether it is new.
+
+        Must be called with the lock held.
+        """
+        future = self._loading.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._loading[key] = future
+        return future, True
+
+    def _submit(self, key, loader, future):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='cryptowatch-refresh')
+            self.stats['refreshes'] += 1
+        self._executor.submit(self._load, key, loader, future)
+
+    def get(self, key, loader):
+        """Return the value of ``key``, calling ``loader()`` to (re)load it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self.clock()
+            if entry is not None:
+                entry.hits += 1
+                age = now - entry.time
+                if age < self.soft_ttl:
+                    self.stats['hits'] += 1
+                    return entry.value
+                if age < self.hard_ttl:
+                    self.stats['stale'] += 1
+                    future, started = self._start(key, loader)
+                    value = entry.value
+                else:
+                    entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                future, started = self._start(key, loader)
+        if entry is not None:
+            if started:
+                self._submit(key, loader, future)
+            return value
+        if started:
+            self._load(key, loader, future)
+        return future.result()
+
+    def warm(self):
+        """Refresh the hottest keys about to go stale, then decay the counts.
+
+        Called periodically by the warming thread when ``hot_keys`` is set.
+        """
+        now = self.clock()
+        with self._lock:
+            hottest = sorted(self._entries.items(), key=lambda item: -item[1].hits)
+            due = []
+            for key, entry in hottest[:self.hot_keys]:
+                if (entry.hits >= self.min_hits
+                        and now - entry.time >= self.soft_ttl / 2):
+                    future, started = self._start(key, entry.loader)
+                    if started:
+                        due.append((key, entry.loader, future))
+            for entry in self._entries.values():
+                entry.hits /= 2
+        for key, loader, future in due:
+            self._submit(key, loader, future)
+        return len(due)
+
+    def start(self):
+        """Start the warming thread, if ``hot_keys`` is set.
+
+        A client given the cache starts it.
+        """
+        if not self.hot_keys or self._warmer is not None:
+            return
+        interval = max(self.soft_ttl / 4, 0.05)
+
+        def run():
+            while not self._closed.wait(interval):
+                self.warm()
+
+        self._warmer = threading.Thread(target=run, name='cryptowatch-warmer',
+                                        daemon=True)
+        self._warmer.start()
+
+    def invalidate(self, key=None):
+        """Forget ``key``, or every key."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def close(self):
+        """Stop the warming thread and the background refreshes."""
+        self._closed.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
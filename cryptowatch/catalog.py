@@ -0,0 +1,183 @@
+"""Module related to an indexed catalog of cryptowat.ch reference data."""
+
+from concurrent.futures import ThreadPoolExecutor
+from sys import intern
+
+
+class Catalog(object):
+    """Indexed view over the assets, pairs and markets endpoints.
+
+    The endpoints are fetched concurrently, their symbols interned and the
+    lookups answered from prebuilt dictionaries, so every query is O(1).
+
+    .. code-block:: python
+
+        catalog = Catalog(client).load()
+        catalog.exchanges('eth', 'btc')
+        # frozenset({'bitfinex', 'gdax', ...})
+
+    """
+
+    SOURCES = ('assets', 'pairs', 'markets')
+
+    def __init__(self, client):
+        self.client = client
+        self._payloads = {}
+        self._assets = {}
+        self._fiat = frozenset()
+        self._crypto = frozenset()
+        self._pairs = {}
+        self._pair_by_assets = {}
+        self._pairs_by_base = {}
+        self._pairs_by_quote = {}
+        self._markets = {}
+        self._exchanges_by_pair = {}
+        self._active_exchanges_by_pair = {}
+        self._pairs_by_exchange = {}
+        self._active_pairs_by_exchange = {}
+
+    def load(self):
+        """Fetch every source and build the indexes.
+
+        :returns: the catalog itself, so it can be chained with the constructor
+        """
+        self.refresh()
+        return self
+
+    def refresh(self):
+        """Re-fetch every source, rebuilding only the indexes that changed.
+
+        :returns: set of the source names whose payload changed
+        """
+        fetchers = {
+            'assets': self.client.get_assets,
+            'pairs': self.client.get_pairs,
+            'markets': self.client.get_markets,
+        }
+        with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+            futures = {name: executor.submit(fetcher)
+                       for name, fetcher in fetchers.items()}
+            payloads = {name: future.result()['result']
+                        for name, future in futures.items()}
+
+        changed = set()
+        for name in self.SOURCES:
+            if payloads[name] != self._payloads.get(name):
+                getattr(self, '_index_' + name)(payloads[name])
+                self._payloads[name] = payloads[name]
+                changed.add(name)
+        return changed
+
+    def _index_assets(self, assets):
+        index = {}
+        for entry in assets:
+            symbol = intern(entry['symbol'])
+            index[symbol] = {'symbol': symbol,
+                             'name': entry.get('name'),
+                             'fiat': bool(entry.get('fiat'))}
+        self._assets = index
+        self._fiat = frozenset(s for s, a in index.items() if a['fiat'])
+        self._crypto = frozenset(s for s, a in index.items() if not a['fiat'])
+
+    def _index_pairs(self, pairs):
+        index = {}
+        for entry in pairs:
+            index[intern(entry['symbol'])] = (intern(entry['base']['symbol']),
+                                              intern(entry['quote']['symbol']))
+        self._pairs = index
+        self._pair_by_assets = {assets: pair for pair, assets in index.items()}
+        self._pairs_by_base = _group((base, pair)
+                                     for pair, (base, _) in index.items())
+        self._pairs_by_quote = _group((quote, pair)
+                                      for pair, (_, quote) in index.items())
+
+    def _index_markets(self, markets):
+        index = {}
+        for entry in markets:
+            key = (intern(entry['exchange']), intern(entry['pair']))
+            index[key] = bool(entry.get('active'))
+        self._markets = index
+        active = [key for key, is_active in index.items() if is_active]
+        self._exchanges_by_pair = _group((p, e) for e, p in index)
+        self._active_exchanges_by_pair = _group((p, e) for e, p in active)
+        self._pairs_by_exchange = _group(index)
+        self._active_pairs_by_exchange = _group(active)
+
+    def asset(self, symbol):
+        """Return the asset entry for ``symbol`` or ``None``."""
+        return self._assets.get(symbol)
+
+    def is_fiat(self, symbol):
+        """Return whether ``symbol`` is a fiat currency."""
+        return symbol in self._fiat
+
+    @property
+    def fiat_assets(self):
+        """Frozen set of the fiat asset symbols."""
+        return self._fiat
+
+    @property
+    def crypto_assets(self):
+        """Frozen set of the crypto asset symbols."""
+        return self._crypto
+
+    @property
+    def listed_exchanges(self):
+        """Frozen set of the exchanges listing at least one market."""
+        return frozenset(self._pairs_by_exchange)
+
+    def pair_assets(self, pair):
+        """Return the ``(base, quote)`` tuple of ``pair`` or ``None``."""
+        return self._pairs.get(pair)
+
+    def pair_for(self, base, quote):
+        """Return the pair symbol trading ``base`` against ``quote`` or ``None``."""
+        return self._pair_by_assets.get((base, quote))
+
+    def pairs_by_base(self, asset):
+        """Return the pairs which have ``asset`` as a base."""
+        return self._pairs_by_base.get(asset, frozenset())
+
+    def pairs_by_quote(self, asset):
+        """Return the pairs which have ``asset`` as a quote."""
+        return self._pairs_by_quote.get(asset, frozenset())
+
+    def markets_by_pair(self, pair, active=False):
+        """Return the exchanges listing ``pair``.
+
+        :param active: only return exchanges where the market is active
+        :type active: bool
+        """
+        index = self._active_exchanges_by_pair if active else self._exchanges_by_pair
+        return index.get(pair, frozenset())
+
+    def markets_by_exchange(self, exchange, active=False):
+        """Return the pairs listed on ``exchange``.
+
+        :param active: only return pairs whose market is active
+        :type active: bool
+        """
+        index = self._active_pairs_by_exchange if active else self._pairs_by_exchange
+        return index.get(exchange, frozenset())
+
+    def is_active(self, exchange, pair):
+        """Return whether the market is listed and active."""
+        return self._markets.get((exchange, pair), False)
+
+    def has_market(self, exchange, pair):
+        """Return whether the market is listed, active or not."""
+        return (exchange, pair) in self._markets
+
+    def exchanges(self, base, quote, active=True):
+        """Return the exchanges listing ``base`` quoted in ``quote``."""
+        pair = self._pair_by_assets.get((base, quote))
+        if pair is None:
+            return frozenset()
+        return self.markets_by_pair(pair, active=active)
+
+
+def _group(items):
+    groups = {}
+    for key, value in items:
+        groups.setdefault(key, set()).add(value)
+    return {key: frozenset(values) for key, values in groups.items()}
@@ -0,0 +1,281 @@
+"""Module related to the ``cryptowatch`` command line collector.
+
+.. code-block:: console
+
+    cryptowatch catalog --output markets.csv --format csv
+    cryptowatch ohlc gdax:btcusd kraken:ethusd --periods 60,3600 \\
+        --format columnar --output /data/cryptowatch
+    cryptowatch trades --all --interval 10 --output trades.ndjson
+    cryptowatch books gdax:btcusd --depth 20
+
+Responses are fetched concurrently under a shared rate budget and their
+rows are written out as soon as each one arrives, so memory use does not
+grow with the size of the export.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cryptowatch.api_client import Client
+from cryptowatch.budget import RateBudget
+from cryptowatch.catalog import Catalog
+from cryptowatch import exceptions
+
+COLUMNS = {
+    'catalog': ('exchange', 'pair', 'base', 'quote', 'active'),
+    'ohlc': ('exchange', 'pair', 'period', 'close_time', 'open', 'high', 'low',
+             'close', 'volume', 'quote_volume'),
+    'trades': ('exchange', 'pair', 'id', 'timestamp', 'price', 'amount'),
+    'books': ('exchange', 'pair', 'time', 'side', 'price', 'amount'),
+}
+
+
+class NdjsonWriter(object):
+    """Write rows as one JSON object per line."""
+
+    def __init__(self, stream, columns):
+        self.stream = stream
+        self.columns = columns
+
+    def write(self, rows):
+        dumps = json.dumps
+        columns = self.columns
+        self.stream.writelines(dumps(dict(zip(columns, row))) + '\n'
+                               for row in rows)
+
+
+class CsvWriter(object):
+    """Write rows as CSV, with a header line."""
+
+    def __init__(self, stream, columns):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+
+WRITERS = {'ndjson': NdjsonWriter, 'csv': CsvWriter}
+
+
+def _markets(client, args):
+    if args.all:
+        return [(m['exchange'], m['pair']) for m in client.get_markets()['result']
+                if m.get('active')]
+    markets = []
+    for market in args.markets:
+        exchange, _, pair = market.partition(':')
+        if not exchange or not pair:
+            raise ValueError('Markets are given as exchange:pair, not "%s"'
+                             % market)
+        markets.append((exchange, pair))
+    return markets
+
+
+def _fetch_all(fetch, items, budget, workers):
+    """Yield ``(item, response)`` as requests complete, ``workers`` at a time.
+
+    Failed requests are reported on stderr and skipped.
+    """
+    def call(item):
+        budget.acquire()
+        response = fetch(item)
+        budget.sync(response)
+        return response
+
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        while True:
+            while len(pending) < workers * 2:
+                item = next(items, None)
+                if item is None:
+                    break
+                pending[executor.submit(call, item)] = item
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result()
+                except exceptions.ERRORS as error:
+                    sys.stderr.write('%s:%s: %s\n' % (item[0], item[1], error))
+
+
+def _catalog(client, args, writer, budget):
+    catalog = Catalog(client).load()
+    for exchange in sorted(catalog.listed_exchanges):
+        rows = []
+        for pair in sorted(catalog.markets_by_exchange(exchange)):
+            base, quote = catalog.pair_assets(pair) or (None, None)
+            rows.append((exchange, pair, base, quote,
+                         catalog.is_active(exchange, pair)))
+        writer.write(rows)
+
+
+def _ohlc(client, args, writer, budget):
+    params = {'periods': args.periods}
+    for name in ('after', 'before'):
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+    if writer is None:
+        from cryptowatch.store import Store
+        store = Store(args.output)
+        periods = [int(period) for period in args.periods.split(',')]
+
+        def fill(market):
+            return store.fill_ohlc(client, market[0], market[1], periods,
+                                   args.after, args.before)
+
+        for (exchange, pair), counts in _fetch_all(
+                fill, _markets(client, args), budget, args.workers):
+            sys.stderr.write('%s:%s: %s\n' % (exchange, pair, counts))
+        return
+
+    def fetch(market):
+        return client.prepare_market(market[0], market[1], 'ohlc', params).fetch()
+
+    for (exchange, pair), response in _fetch_all(
+            fetch, _markets(client, args), budget, args.workers):
+        for period, candles in response['result'].items():
+            writer.write([exchange, pair, int(period)] + candle
+                         for candle in candles)
+
+
+def _trades(client, args, writer, budget):
+    markets = _markets(client, args)
+    store = None
+    if writer is None:
+        from cryptowatch.store import Store
+        store = Store(args.output)
+    # Per market: [since, rows seen at that timestamp]
+    cursors = {market: [args.since, set()] for market in markets}
+
+    def fetch(market):
+        if store is not None:
+            return store.fill_trades(client, market[0], market[1], args.limit,
+                                     args.since)
+        params = {} if args.limit is None else {'limit': args.limit}
+        if cursors[market][0] is not None:
+            params['since'] = cursors[market][0]
+        return client.prepare_market(market[0], market[1], 'trades',
+                                     params).fetch()
+
+    rounds = 0
+    while True:
+        started = time.monotonic()
+        for market, response in _fetch_all(fetch, markets, budget, args.workers):
+            if store is not None:
+                continue
+            cursor = cursors[market]
+            rows = [trade for trade in response['result']
+                    if cursor[0] is None or trade[1] > cursor[0]
+                    or (trade[1] == cursor[0] and tuple(trade) not in cursor[1])]
+            if not rows:
+                continue
+            last = max(trade[1] for trade in rows)
+            if last != cursor[0]:
+                cursor[0], cursor[1] = last, set()
+            cursor[1].update(tuple(trade) for trade in rows if trade[1] == last)
+            writer.write(list(market) + trade for trade in rows)
+        rounds += 1
+        if args.interval is None or (args.rounds and rounds >= args.rounds):
+            return
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+def _books(client, args, writer, budget):
+    def fetch(market):
+        return client.prepare_market(market[0], market[1], 'orderbook').fetch()
+
+    for (exchange, pair), response in _fetch_all(
+            fetch, _markets(client, args), budget, args.workers):
+        book = response['result']
+        now = int(time.time())
+        for side in ('bids', 'asks'):
+            writer.write([exchange, pair, now, side] + order
+                         for order in book.get(side, [])[:args.depth])
+
+
+COMMANDS = {'catalog': _catalog, 'ohlc': _ohlc, 'trades': _trades,
+            'books': _books}
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='cryptowatch',
+        description='Bulk export from the cryptowat.ch API.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    def command(name, help_text, markets=True):
+        sub = commands.add_parser(name, help=help_text)
+        if markets:
+            sub.add_argument('markets', nargs='*', metavar='exchange:pair')
+            sub.add_argument('--all', action='store_true',
+                             help='every active market')
+        sub.add_argument('--format', default='ndjson',
+                         choices=sorted(WRITERS) + (['columnar'] if name in
+                                                    ('ohlc', 'trades') else []))
+        sub.add_argument('--output', default='-',
+                         help='file, or directory for columnar (default stdout)')
+        sub.add_argument('--workers', type=int, default=8)
+        sub.add_argument('--rate', type=float, default=10.0,
+                         help='requests per second')
+        sub.add_argument('--burst', type=float, default=20.0,
+                         help='requests allowed at once')
+        return sub
+
+    command('catalog', 'dump every market with its assets', markets=False)
+    ohlc = command('ohlc', 'backfill candles')
+    ohlc.add_argument('--periods', default='60')
+    ohlc.add_argument('--after', type=int)
+    ohlc.add_argument('--before', type=int)
+    trades = command('trades', 'fetch or tail trades')
+    trades.add_argument('--since', type=int)
+    trades.add_argument('--limit', type=int)
+    trades.add_argument('--interval', type=float,
+                        help='keep polling every this many seconds')
+    trades.add_argument('--rounds', type=int,
+                        help='stop after this many polls')
+    books = command('books', 'snapshot order books')
+    books.add_argument('--depth', type=int)
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the ``cryptowatch`` command."""
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'markets', None) == [] and not args.all:
+        parser.error('give markets as exchange:pair or use --all')
+    if args.format == 'columnar' and args.output == '-':
+        parser.error('the columnar format needs an --output directory')
+
+    client = Client()
+    budget = RateBudget(capacity=args.burst, rate=args.rate)
+    stream = None
+    writer = None
+    if args.format != 'columnar':
+        stream = sys.stdout if args.output == '-' else open(
+            args.output, 'w', newline='')
+        writer = WRITERS[args.format](stream, COLUMNS[args.command])
+    try:
+        COMMANDS[args.command](client, args, writer, budget)
+    except ValueError as error:
+        parser.error(str(error))
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Module related to collecting market routes with several processes.
+
+The markets are sharded across worker processes, each with its own
+:class:`cryptowatch.api_client.Client`, so JSON decoding runs in parallel.
+Every worker draws from one shared :class:`cryptowatch.budget.RateBudget`
+and streams its decoded batches back over a pipe: NumPy columns travel as
+out-of-band pickle buffers, so they are never serialised into the message.
+"""
+
+import multiprocessing
+import pickle
+import struct
+from multiprocessing.connection import wait
+
+from cryptowatch import columnar
+from cryptowatch.api_client import Client
+from cryptowatch.exceptions import ERRORS
+
+HEADER = struct.Struct('<q')
+
+DECODERS = {
+    'trades': columnar.decode_trades,
+    'ohlc': columnar.decode_ohlc,
+}
+
+
+def _send(connection, message):
+    buffers = []
+    data = pickle.dumps(message, protocol=5, buffer_callback=buffers.append)
+    connection.send_bytes(HEADER.pack(len(buffers)) + data)
+    for buffer in buffers:
+        connection.send_bytes(buffer.raw())
+
+
+def _receive(connection):
+    data = connection.recv_bytes()
+    count, = HEADER.unpack_from(data)
+    buffers = [connection.recv_bytes() for _ in range(count)]
+    return pickle.loads(memoryview(data)[HEADER.size:], buffers=buffers)
+
+
+def _work(client_class, shard, route, params, budget, cost, connection):
+    client = client_class()
+    decode = DECODERS.get(route, lambda response: response['result'])
+    try:
+        for exchange, pair in shard:
+            if budget is not None:
+                budget.acquire(cost)
+            try:
+                response = client.prepare_market(exchange, pair, route,
+                                                 params).fetch()
+            except ERRORS + (ValueError,) as error:
+                # ValueError for a market the route cannot be prepared for.
+                _send(connection, (exchange, pair, None, str(error)))
+                continue
+            if budget is not None:
+                budget.sync(response, cost)
+            _send(connection, (exchange, pair, decode(response), None))
+    finally:
+        connection.close()
+
+
+class Collector(object):
+    """Fetch one route of many markets with a pool of processes.
+
+    .. code-block:: python
+
+        budget = RateBudget(capacity=100, rate=20)
+        collector = Collector(route='trades', processes=8, budget=budget)
+        for exchange, pair, trades in collector.run():
+            ...
+        collector.errors
+
+    :param markets: ``(exchange, pair)`` tuples, by default every active
+        market returned by ``get_markets()``
+    :param route: one of ``Client.ROUTES_MARKET``; trades and candles are
+        decoded into columns, other routes yield the response's result
+    :param params: params of the route, see ``Client.get_markets``
+    :param processes: number of workers, by default the number of CPUs
+    :param budget: optional :class:`cryptowatch.budget.RateBudget`
+    :param cost: tokens acquired from the budget per request
+    :param client_class: class each worker instantiates its client from
+    :param context: multiprocessing context starting the workers, the
+        default one of :mod:`multiprocessing` if ``None``
+    """
+
+    def __init__(self, markets=None, route='trades', params=None,
+                 processes=None, budget=None, cost=1.0, client_class=Client,
+                 context=None):
+        self.client_class = client_class
+        self.context = context or multiprocessing
+        self.markets = markets
+        self.route = route
+        self.params = params
+        self.processes = processes or multiprocessing.cpu_count()
+        self.budget = budget
+        self.cost = cost
+        self.errors = []
+
+    def _markets(self):
+        if self.markets is not None:
+            return list(self.markets)
+        return [(market['exchange'], market['pair'])
+                for market in self.client_class().get_markets()['result']
+                if market.get('active')]
+
+    def run(self):
+        """Collect every market.
+
+        Failed markets are skipped and recorded in ``errors`` as
+        ``(exchange, pair, message)``, as are the markets left over by a
+        worker which exited early.
+
+        :returns: generator of ``(exchange, pair, result)`` in arrival order
+        """
+        markets = self._markets()
+        count = max(1, min(self.processes, len(markets)))
+        connections = []
+        workers = []
+        pending = {}
+        for index in range(count):
+            shard = markets[index::count]
+            receiver, sender = self.context.Pipe(duplex=False)
+            worker = self.context.Process(
+                target=_work, daemon=True,
+                args=(self.client_class, shard, self.route, self.params,
+                      self.budget, self.cost, sender))
+            worker.start()
+            sender.close()
+            connections.append(receiver)
+            workers.append(worker)
+            pending[receiver] = set(shard)
+        try:
+            while connections:
+                for connection in wait(connections):
+                    try:
+                        exchange, pair, result, error = _receive(connection)
+                    except EOFError:
+                        connections.remove(connection)
+                        for exchange, pair in sorted(pending.pop(connection)):
+                            self.errors.append(
+                                (exchange, pair, 'Worker exited before fetching the market'))
+                        continue
+                    pending[connection].discard((exchange, pair))
+                    if error is not None:
+                        self.errors.append((exchange, pair, error))
+                    else:
+                        yield exchange, pair, result
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
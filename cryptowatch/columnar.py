@@ -0,0 +1,150 @@
+"""Module related to decoding route results into typed columns.
+
+A decoded result is a plain ``dict`` mapping each field name to a NumPy
+array, every array having the same length.
+"""
+
+import numpy as np
+
+OHLC_FIELDS = ('close_time', 'open', 'high', 'low', 'close', 'volume',
+               'quote_volume')
+TRADE_FIELDS = ('id', 'timestamp', 'price', 'amount')
+SUMMARY_FIELDS = ('last', 'high', 'low', 'change_percentage',
+                  'change_absolute', 'volume', 'quote_volume')
+
+BAR_FIELDS = ('open_time', 'close_time', 'open', 'high', 'low', 'close',
+              'volume', 'dollar_volume', 'vwap', 'count')
+
+DTYPES = {
+    'close_time': np.dtype('<i8'),
+    'open_time': np.dtype('<i8'),
+    'count': np.dtype('<i8'),
+    'id': np.dtype('<i8'),
+    'timestamp': np.dtype('<i8'),
+}
+FLOAT = np.dtype('<f8')
+
+
+def dtype_of(field):
+    """Return the on-disk and in-memory dtype of ``field``."""
+    return DTYPES.get(field, FLOAT)
+
+
+def empty(fields):
+    """Return empty columns for ``fields``."""
+    return {field: np.empty(0, dtype_of(field)) for field in fields}
+
+
+def decode_rows(rows, fields):
+    """Decode a list of equally sized number lists into columns.
+
+    Rows shorter than ``fields`` (e.g. candles without a quote volume) get
+    ``nan`` for the missing trailing values.
+    """
+    if not rows:
+        return empty(fields)
+    width = len(fields)
+    values = np.array(rows, dtype=FLOAT)
+    # One field per row of the transposed matrix keeps each column contiguous.
+    matrix = np.full((width, len(rows)), np.nan)
+    matrix[:values.shape[1]] = values[:, :width].T
+    columns = {}
+    for index, field in enumerate(fields):
+        dtype = dtype_of(field)
+        if dtype == FLOAT:
+            columns[field] = matrix[index]
+        else:
+            # Integers go through ``fromiter`` to stay exact above 2**53.
+            columns[field] = np.fromiter((row[index] for row in rows),
+                                         dtype, len(rows))
+    return columns
+
+
+def decode_ohlc(response):
+    """Decode an ``ohlc`` route response.
+
+    :returns: dict mapping each period (int seconds) to its candle columns
+    """
+    return {int(period): decode_rows(rows, OHLC_FIELDS)
+            for period, rows in response['result'].items()}
+
+
+def decode_trades(response):
+    """Decode a ``trades`` route response into trade columns."""
+    return decode_rows(response['result'], TRADE_FIELDS)
+
+
+def _summary_row(summary):
+    try:
+        price = summary['price']
+        change = price['change']
+        return (price['last'], price['high'], price['low'],
+                change['percentage'], change['absolute'], summary['volume'],
+                summary.get('volumeQuote'))
+    except KeyError:
+        price = summary.get('price', {})
+        change = price.get('change', {})
+        return (price.get('last'), price.get('high'), price.get('low'),
+                change.get('percentage'), change.get('absolute'),
+                summary.get('volume'), summary.get('volumeQuote'))
+
+
+def decode_summaries(response):
+    """Decode a ``summaries`` aggregate response.
+
+    :returns: ``(keys, columns)``, the ``exchange:pair`` key of each row and
+        the ``SUMMARY_FIELDS`` columns, ``nan`` where a value is missing
+    """
+    result = response['result']
+    keys = list(result)
+    rows = [_summary_row(summary) for summary in result.values()]
+    values = np.array(rows, dtype=FLOAT).reshape(-1, len(SUMMARY_FIELDS)).T
+    return keys, {field: values[index]
+                  for index, field in enumerate(SUMMARY_FIELDS)}
+
+
+def decode_summary(response):
+    """Decode a market ``summary`` route response into one row of columns."""
+    values = np.array([_summary_row(response['result'])], dtype=FLOAT)
+    return {field: values[:, index]
+            for index, field in enumerate(SUMMARY_FIELDS)}
+
+
+def _sorted_codes(index, codes):
+    symbols = np.array(list(index), dtype=str)
+    order = np.argsort(symbols, kind='stable')
+    rank = np.empty(len(order), np.int64)
+    rank[order] = np.arange(len(order))
+    return symbols[order], rank[np.array(codes, dtype=np.int64)]
+
+
+def market_codes(keys):
+    """Intern the exchanges and pairs of ``exchange:pair`` keys.
+
+    :returns: ``(exchanges, exchange_codes, pairs, pair_codes)``, the sorted
+        distinct symbols and, for each key, the index of its symbol
+    """
+    exchange_index = {}
+    pair_index = {}
+    exchange_codes = []
+    pair_codes = []
+    for key in keys:
+        exchange, _, pair = key.partition(':')
+        exchange_codes.append(exchange_index.setdefault(exchange,
+                                                        len(exchange_index)))
+        pair_codes.append(pair_index.setdefault(pair, len(pair_index)))
+    exchanges, exchange_codes = _sorted_codes(exchange_index, exchange_codes)
+    pairs, pair_codes = _sorted_codes(pair_index, pair_codes)
+    return exchanges, exchange_codes, pairs, pair_codes
+
+
+def length(columns):
+    """Return the number of rows in ``columns``."""
+    for values in columns.values():
+        return len(values)
+    return 0
+
+
+def take(columns, index):
+    """Return ``columns`` indexed by ``index`` (a slice, mask or indices)."""
+    return {field: values[index] for field, values in columns.items()}
@@ -0,0 +1,261 @@
+"""Module related to archiving price snapshots as a compact delta log.
+
+A log is a sequence of little-endian binary records, each starting with a
+``(kind, timestamp in ms, count)`` header:
+
+* ``S`` records name ``count`` new markets, each as a length-prefixed
+  UTF-8 ``exchange:pair`` key; markets are numbered in order of appearance.
+* ``K`` keyframes hold every market price as ``count`` ``(id, price)``
+  entries.
+* ``D`` deltas hold only the entries which changed since the previous
+  record, a ``nan`` price marking a market gone from the snapshot.
+
+A keyframe is written every ``keyframe_interval`` snapshots, so any point
+in time is rebuilt from the closest keyframe before it and a bounded number
+of deltas.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+HEADER = struct.Struct('<cqI')
+LENGTH = struct.Struct('<H')
+ENTRY = np.dtype([('id', '<u4'), ('price', '<f8')])
+
+
+class DeltaWriter(object):
+    """Append price snapshots to a delta log.
+
+    .. code-block:: python
+
+        with DeltaWriter('prices.log') as log:
+            while True:
+                log.append(client.get_aggregates('prices'))
+                time.sleep(1)
+
+    Appending to an existing log resumes from its last state, dropping a
+    record left incomplete at its end by an interrupted write.
+    """
+
+    def __init__(self, path, keyframe_interval=60):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self._ids = {}
+        self._prices = np.empty(0)
+        self._since_keyframe = None
+        if os.path.exists(path) and os.path.getsize(path):
+            with DeltaLog(path) as log:
+                self._ids = {key: index for index, key in enumerate(log.symbols)}
+                self._prices = log._state(len(log) - 1)
+                if log._keyframes:
+                    self._since_keyframe = len(log) - 1 - log._keyframes[-1]
+                end = log.end
+            if end < os.path.getsize(path):
+                os.truncate(path, end)
+        self._file = open(path, 'ab')
+
+    def append(self, snapshot, timestamp=None):
+        """Record a ``prices`` aggregate response or ``{market: price}`` dict.
+
+        :param timestamp: UNIX time in seconds, now by default
+        :returns: number of entries written
+        """
+        prices = snapshot.get('result', snapshot)
+        if timestamp is None:
+            timestamp = time.time()
+        milliseconds = int(round(timestamp * 1000))
+
+        new = [key for key in prices if key not in self._ids]
+        if new:
+            self._write_symbols(milliseconds, new)
+        current = np.full(len(self._ids), np.nan)
+        ids = np.fromiter((self._ids[key] for key in prices), np.int64,
+                          len(prices))
+        current[ids] = np.fromiter(prices.values(), float, len(prices))
+
+        previous = np.full(len(current), np.nan)
+        previous[:len(self._prices)] = self._prices
+        if (self._since_keyframe is None
+                or self._since_keyframe + 1 >= self.keyframe_interval):
+            kind = b'K'
+            changed = np.flatnonzero(~np.isnan(current))
+            self._since_keyframe = 0
+        else:
+            kind = b'D'
+            changed = np.flatnonzero((current != previous)
+                                     & ~(np.isnan(current) & np.isnan(previous)))
+            self._since_keyframe += 1
+        entries = np.empty(len(changed), ENTRY)
+        entries['id'] = changed
+        entries['price'] = current[changed]
+        self._file.write(HEADER.pack(kind, milliseconds, len(entries)))
+        self._file.write(entries.tobytes())
+        self._prices = current
+        return len(entries)
+
+    def _write_symbols(self, milliseconds, keys):
+        parts = [HEADER.pack(b'S', milliseconds, len(keys))]
+        for key in keys:
+            self._ids[key] = len(self._ids)
+            encoded = key.encode('utf-8')
+            parts.append(LENGTH.pack(len(encoded)) + encoded)
+        self._file.write(b''.join(parts))
+
+    def flush(self):
+        """Flush the written records to the file."""
+        self._file.flush()
+
+    def close(self):
+        """Close the log file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class DeltaLog(object):
+    """Read a delta log.
+
+    The log is memory mapped: opening it only reads the record headers and
+    market names, entries are read on demand. A record left incomplete at
+    the end of the log is ignored.
+
+    .. code-block:: python
+
+        log = DeltaLog('prices.log')
+        log.at(1600000000)['gdax:btcusd']
+        for timestamp, changes in log.replay(start=1600000000):
+            ...
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.symbols = []
+        self._records = []   # (timestamp in ms, offset of the entries, count)
+        self._keyframes = []  # record indexes
+        self._data = b''
+        with open(path, 'rb') as handle:
+            if os.fstat(handle.fileno()).st_size:
+                self._data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._data
+        size = len(view)
+        offset = self.end = 0
+        while offset + HEADER.size <= size:
+            kind, milliseconds, count = HEADER.unpack_from(view, offset)
+            offset += HEADER.size
+            if kind == b'S':
+                symbols = []
+                for _ in range(count):
+                    if offset + LENGTH.size > size:
+                        break
+                    length, = LENGTH.unpack_from(view, offset)
+                    offset += LENGTH.size
+                    if offset + length > size:
+                        break
+                    symbols.append(view[offset:offset + length].decode('utf-8'))
+                    offset += length
+                if len(symbols) < count:
+                    break
+                self.symbols.extend(symbols)
+                self.end = offset
+                continue
+            end = offset + count * ENTRY.itemsize
+            if kind not in (b'K', b'D') or end > size:
+                break
+            if kind == b'K':
+                self._keyframes.append(len(self._records))
+            self._records.append((milliseconds, offset, count))
+            offset = self.end = end
+        self._times = [record[0] for record in self._records]
+
+    def close(self):
+        """Unmap the log."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def timestamps(self):
+        """Times of the snapshots, in UNIX seconds."""
+        return [milliseconds / 1000.0 for milliseconds in self._times]
+
+    def _entries(self, index):
+        _, offset, count = self._records[index]
+        return np.frombuffer(self._data, ENTRY, count, offset)
+
+    def _state(self, index):
+        """Return the price of every market after record ``index``."""
+        prices = np.full(len(self.symbols), np.nan)
+        first = bisect.bisect_right(self._keyframes, index) - 1
+        if index < 0 or first < 0:
+            return prices
+        keyframe = self._keyframes[first]
+        for record in range(keyframe, index + 1):
+            entries = self._entries(record)
+            prices[entries['id']] = entries['price']
+        return prices
+
+    def _index(self, timestamp):
+        """Return the last record at or before ``timestamp`` (seconds)."""
+        return bisect.bisect_right(self._times, int(round(timestamp * 1000))) - 1
+
+    def _as_dict(self, prices):
+        present = np.flatnonzero(~np.isnan(prices))
+        symbols = self.symbols
+        return {symbols[i]: price for i, price in zip(present.tolist(),
+                                                      prices[present].tolist())}
+
+    def at(self, timestamp):
+        """Return the ``{market: price}`` snapshot in effect at ``timestamp``."""
+        return self._as_dict(self._state(self._index(timestamp)))
+
+    def replay(self, start=None, end=None):
+        """Replay the snapshots between ``start`` and ``end`` (inclusive).
+
+        The first item holds the full snapshot in effect at ``start``; the
+        following ones only the markets whose price changed, ``None`` for a
+        market gone from the snapshot.
+
+        :returns: generator of ``(timestamp, {market: price})``
+        """
+        first = 0 if start is None else max(self._index(start), 0)
+        last = len(self._records) - 1 if end is None else self._index(end)
+        if first > last:
+            return
+        prices = self._state(first)
+        yield self._times[first] / 1000.0, self._as_dict(prices)
+        symbols = self.symbols
+        keyframes = set(self._keyframes)
+        for index in range(first + 1, last + 1):
+            entries = self._entries(index)
+            if index in keyframes:
+                # Keyframes hold every price: diff them against the state.
+                current = np.full(len(symbols), np.nan)
+                current[entries['id']] = entries['price']
+                changed = np.flatnonzero(
+                    (current != prices) & ~(np.isnan(current) & np.isnan(prices)))
+                prices = current
+                ids, values = changed, current[changed]
+            else:
+                ids, values = entries['id'], entries['price']
+                prices[ids] = values
+            yield self._times[index] / 1000.0, {
+                symbols[market]: None if price != price else price
+                for market, price in zip(ids.tolist(), values.tolist())}
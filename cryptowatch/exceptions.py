@@ -23,3 +23,17 @@ class CryptowatchResponseException(Exception):
 
     def __str__(self):
         return 'CryptowatchResponseException: %s' % self.message
+
+
+def __getattr__(name):
+    # ERRORS, the errors of a request that failed on its own: API errors,
+    # the connection errors of requests, which derive from OSError, and
+    # those of urllib3. Built on first access, so importing the exceptions
+    # does not pull in urllib3.
+    if name == 'ERRORS':
+        from urllib3.exceptions import HTTPError
+        errors = (CryptowatchAPIException, CryptowatchResponseException,
+                  OSError, HTTPError)
+        globals()[name] = errors
+        return errors
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -0,0 +1,117 @@
+"""Module related to DataFrame and Arrow conversions of route results.
+
+Each tabular route is decoded once into typed NumPy columns, see
+:mod:`cryptowatch.columnar`, which pandas and Arrow then adopt without
+further copies. Timestamps are UNIX seconds and become ``datetime64[s]``
+(``timestamp[s]`` in Arrow) by reinterpreting the integer column;
+exchanges, pairs and book sides become categorical (dictionary) columns.
+
+.. code-block:: python
+
+    trades = client.get_markets(data={'exchange': 'gdax', 'pair': 'btcusd',
+                                      'route': 'trades'})
+    trades.to_pandas()
+    client.get_aggregates('summaries').to_arrow()
+
+pandas and pyarrow are optional, each is imported on first use.
+"""
+
+import numpy as np
+
+from cryptowatch import columnar
+
+TIMESTAMPS = ('timestamp', 'close_time')
+
+
+def _ohlc(result):
+    periods = list(result)
+    rows = [candle for period in periods for candle in result[period]]
+    columns = columnar.decode_rows(rows, columnar.OHLC_FIELDS)
+    counts = [len(result[period]) for period in periods]
+    labels = np.array([int(period) for period in periods], dtype=np.int64)
+    period = np.repeat(labels, counts)
+    return dict(period=period, **columns), {}
+
+
+def _orderbook(result):
+    sides = ('bids', 'asks')
+    rows = [result.get(side) or [] for side in sides]
+    values = np.array(rows[0] + rows[1], dtype=float).reshape(-1, 2).T
+    codes = np.repeat(np.arange(2, dtype=np.int8), [len(r) for r in rows])
+    return ({'side': codes, 'price': np.ascontiguousarray(values[0]),
+             'amount': np.ascontiguousarray(values[1])},
+            {'side': np.array(sides)})
+
+
+def _markets(keys, columns):
+    exchanges, exchange_codes, pairs, pair_codes = columnar.market_codes(keys)
+    result = {'exchange': exchange_codes, 'pair': pair_codes}
+    result.update(columns)
+    return result, {'exchange': exchanges, 'pair': pairs}
+
+
+def _prices(result):
+    keys = list(result)
+    return _markets(keys, {'price': np.fromiter(result.values(), float,
+                                                len(keys))})
+
+
+def _summaries(result):
+    return _markets(*columnar.decode_summaries({'result': result}))
+
+
+DECODERS = {
+    'trades': lambda result: (columnar.decode_rows(result,
+                                                   columnar.TRADE_FIELDS), {}),
+    'ohlc': _ohlc,
+    'orderbook': _orderbook,
+    'price': lambda result: ({'price': np.array([result['price']], float)}, {}),
+    'summary': lambda result: (columnar.decode_summary({'result': result}), {}),
+    'prices': _prices,
+    'summaries': _summaries,
+}
+
+
+def decode(response, route):
+    """Decode the result of a tabular route.
+
+    :returns: ``(columns, categories)``: NumPy columns, the categorical ones
+        holding codes into the symbols given by ``categories``
+    :raises ValueError: for a route without a tabular form
+    """
+    if route not in DECODERS:
+        raise ValueError('Route "%s" has no tabular form, use one of %s'
+                         % (route, ', '.join(sorted(DECODERS))))
+    return DECODERS[route](response['result'])
+
+
+def to_pandas(response, route):
+    """Return the result of a tabular route as a ``pandas.DataFrame``."""
+    import pandas as pd
+    columns, categories = decode(response, route)
+    frame = {}
+    for name, values in columns.items():
+        if name in categories:
+            values = pd.Categorical.from_codes(values, categories[name])
+        elif name in TIMESTAMPS:
+            values = values.view('datetime64[s]')
+        frame[name] = values
+    return pd.DataFrame(frame, copy=False)
+
+
+def to_arrow(response, route):
+    """Return the result of a tabular route as a ``pyarrow.Table``."""
+    import pyarrow as pa
+    columns, categories = decode(response, route)
+    arrays = []
+    for name, values in columns.items():
+        if name in categories:
+            values = pa.DictionaryArray.from_arrays(
+                values.astype(np.int32, copy=False),
+                pa.array(categories[name].tolist(), pa.string()))
+        elif name in TIMESTAMPS:
+            values = pa.array(values, pa.timestamp('s'))
+        else:
+            values = pa.array(values)
+        arrays.append(values)
+    return pa.Table.from_arrays(arrays, names=list(columns))
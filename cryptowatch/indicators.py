@@ -0,0 +1,493 @@
+"""Module related to technical indicators over columnar candles.
+
+Every indicator keeps a constant amount of state per market, so a new
+candle updates it without rescanning the history. Inputs are the columns
+of :mod:`cryptowatch.columnar`, either one value per market for
+:meth:`Indicator.update` or ``(markets, time)`` arrays for
+:meth:`Indicator.batch`, which computes the same values over the time axis
+with array operations and leaves the indicator ready for the next update:
+
+.. code-block:: python
+
+    markets, times, columns = align({market: columnar.decode_ohlc(r)[60]
+                                     for market, r in responses.items()})
+    indicators = IndicatorSet(fast=EMA(12), slow=EMA(26), rsi=RSI(14))
+    history = indicators.batch(columns)
+    ...
+    latest = indicators.update(next_candles)
+
+A ``nan`` input marks a market without a candle at that step: its state
+is carried over unchanged. Averages are seeded with the first value rather
+than a simple average of the first ``period`` ones, so the first values
+differ slightly from some charting tools.
+"""
+
+import numpy as np
+
+from cryptowatch import columnar
+
+
+def _smooth(average, value, alpha):
+    """Exponential smoothing step skipping ``nan`` on either side."""
+    result = np.asarray(average + alpha * (value - average))
+    np.copyto(result, value, where=np.isnan(average))
+    np.copyto(result, average, where=np.isnan(value))
+    return result
+
+
+def _carry(previous, value):
+    """Return ``value``, keeping ``previous`` where it is ``nan``."""
+    return np.where(np.isnan(value), previous, value)
+
+
+def _state(value, shape):
+    """Return a state broadcast to one value per market."""
+    return np.array(np.broadcast_to(np.asarray(value, float), shape))
+
+
+def _fill(values, initial):
+    """Carry the last value over the ``nan`` along the last axis.
+
+    Steps before the first value of a market take ``initial``.
+    """
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    steps = np.arange(values.shape[-1])
+    last = np.maximum.accumulate(np.where(missing, -1, steps), axis=-1)
+    filled = np.take_along_axis(values, np.maximum(last, 0), axis=-1)
+    initial = _state(initial, values.shape[:-1])[..., None]
+    return np.where(last >= 0, filled, initial)
+
+
+def _previous(values, initial):
+    """Return the last value before each step, ``initial`` before the first.
+
+    :returns: ``(previous values, last value)``
+    """
+    filled = np.concatenate([_state(initial, values.shape[:-1])[..., None],
+                             _fill(values, initial)], axis=-1)
+    return filled[..., :-1], filled[..., -1]
+
+
+def _scan(values, alpha, initial):
+    """Run :func:`_smooth` over the last axis of ``values``.
+
+    With ``d`` the decay of each step, ``1 - alpha`` or ``1`` on ``nan``,
+    and ``D`` its cumulative product, the average is
+    ``D * (initial + cumsum(alpha * value / D))``. The time axis is cut in
+    blocks short enough for ``1 / D`` to stay far from overflowing.
+
+    :returns: ``(averages, last average)``
+    """
+    shape = values.shape
+    average = _state(initial, shape[:-1])
+    if alpha >= 1:
+        averages = np.array(_fill(values, average))
+        return averages, averages[..., -1]
+    valid = ~np.isnan(values)
+    decay = np.where(valid, 1.0 - alpha, 1.0)
+    inputs = np.where(valid, alpha * values, 0.0)
+    block = max(int(np.log(1e8) / -np.log1p(-alpha)), 1)
+    averages = np.empty(shape)
+    for start in range(0, shape[-1], block):
+        part = slice(start, start + block)
+        unseeded = np.isnan(average)
+        if unseeded.any():
+            # Averages are seeded with the first value of a market.
+            seen = valid[..., part]
+            first = np.argmax(seen, axis=-1)
+            seed = np.take_along_axis(values[..., part], first[..., None],
+                                      axis=-1)
+            average = np.where(unseeded, seed[..., 0], average)
+        factor = np.cumprod(decay[..., part], axis=-1)
+        result = factor * (average[..., None]
+                           + np.cumsum(inputs[..., part] / factor, axis=-1))
+        if unseeded.any():
+            before = np.arange(seen.shape[-1]) < first[..., None]
+            result[unseeded[..., None] & before] = np.nan
+        averages[..., part] = result
+        average = result[..., -1]
+    return averages, average
+
+
+class Indicator(object):
+    """Base class of the indicators.
+
+    Subclasses name the candle columns they read in ``FIELDS`` and
+    implement :meth:`update`, returning ``OUTPUTS`` values.
+    """
+
+    FIELDS = ('close',)
+    OUTPUTS = 1
+
+    def update(self, candle):
+        """Update the state with the next candle of every market.
+
+        :param candle: mapping of the ``FIELDS`` to one value per market
+        :returns: the indicator value of every market
+        """
+        raise NotImplementedError
+
+    def batch(self, columns):
+        """Compute the values over the last axis of ``columns``.
+
+        The state is left as after :meth:`update` over each step in turn.
+
+        :param columns: mapping of the ``FIELDS`` to ``(..., time)`` arrays
+        :returns: values shaped like the columns, a tuple of them for
+            indicators with several outputs
+        """
+        arrays = [np.asarray(columns[field], float) for field in self.FIELDS]
+        if not arrays[0].shape[-1]:
+            outputs = tuple(np.empty(arrays[0].shape)
+                            for _ in range(self.OUTPUTS))
+            return outputs if self.OUTPUTS > 1 else outputs[0]
+        return self._batch(*arrays)
+
+    def _batch(self, *arrays):
+        """Run :meth:`update` over each step in turn."""
+        shape = arrays[0].shape
+        outputs = tuple(np.empty(shape) for _ in range(self.OUTPUTS))
+        for step in range(shape[-1]):
+            values = self.update({field: array[..., step]
+                                  for field, array in zip(self.FIELDS, arrays)})
+            if self.OUTPUTS == 1:
+                values = (values,)
+            for output, value in zip(outputs, values):
+                output[..., step] = value
+        return outputs if self.OUTPUTS > 1 else outputs[0]
+
+
+class EMA(Indicator):
+    """Exponential moving average with ``alpha = 2 / (period + 1)``."""
+
+    def __init__(self, period, field='close'):
+        if period < 1:
+            raise ValueError('Period must be positive, not %s' % period)
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.FIELDS = (field,)
+        self.value = np.nan
+
+    def update(self, candle):
+        self.value = _smooth(self.value, np.asarray(candle[self.FIELDS[0]], float),
+                             self.alpha)
+        return self.value
+
+    def _batch(self, values):
+        averages, self.value = _scan(values, self.alpha, self.value)
+        return averages
+
+
+class RSI(Indicator):
+    """Relative strength index, with Wilder's smoothing of the changes.
+
+    A market whose close never changed is at 50.
+    """
+
+    def __init__(self, period=14):
+        if period < 1:
+            raise ValueError('Period must be positive, not %s' % period)
+        self.period = period
+        self.alpha = 1.0 / period
+        self._close = np.nan
+        self._gain = np.nan
+        self._loss = np.nan
+        self.value = np.nan
+
+    def update(self, candle):
+        close = np.asarray(candle['close'], float)
+        change = close - self._close
+        self._gain = _smooth(self._gain, np.maximum(change, 0.0), self.alpha)
+        self._loss = _smooth(self._loss, np.maximum(-change, 0.0), self.alpha)
+        self._close = _carry(self._close, close)
+        total = self._gain + self._loss
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.asarray(100.0 * self._gain / total)
+        np.copyto(value, 50.0, where=total == 0)
+        self.value = value
+        return value
+
+    def _batch(self, close):
+        previous, self._close = _previous(close, self._close)
+        change = close - previous
+        gain, self._gain = _scan(np.maximum(change, 0.0), self.alpha, self._gain)
+        loss, self._loss = _scan(np.maximum(-change, 0.0), self.alpha,
+                                 self._loss)
+        total = gain + loss
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = 100.0 * gain / total
+        np.copyto(values, 50.0, where=total == 0)
+        self.value = values[..., -1]
+        return values
+
+
+class ATR(Indicator):
+    """Average true range, with Wilder's smoothing.
+
+    The first candle of a market has no previous close, its true range is
+    its high minus its low.
+    """
+
+    FIELDS = ('high', 'low', 'close')
+
+    def __init__(self, period=14):
+        if period < 1:
+            raise ValueError('Period must be positive, not %s' % period)
+        self.period = period
+        self.alpha = 1.0 / period
+        self._close = np.nan
+        self.value = np.nan
+
+    def update(self, candle):
+        high = np.asarray(candle['high'], float)
+        low = np.asarray(candle['low'], float)
+        close = np.asarray(candle['close'], float)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - self._close),
+                                                 np.abs(low - self._close)))
+        self.value = _smooth(self.value, true_range, self.alpha)
+        self._close = _carry(self._close, close)
+        return self.value
+
+    def _batch(self, high, low, close):
+        previous, self._close = _previous(close, self._close)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous),
+                                                 np.abs(low - previous)))
+        values, self.value = _scan(true_range, self.alpha, self.value)
+        return values
+
+
+class Bollinger(Indicator):
+    """Bollinger bands over the last ``period`` candles.
+
+    The mean and population standard deviation come from running sums
+    over a ring buffer, recomputed from the buffer once per ``period``
+    updates so rounding errors do not accumulate; a batch sums every window
+    over its ``period`` offsets instead. Values are ``nan`` until a market
+    has ``period`` candles in the window.
+
+    :returns: ``(middle, upper, lower)``
+    """
+
+    OUTPUTS = 3
+
+    def __init__(self, period=20, width=2.0):
+        if period < 1:
+            raise ValueError('Period must be positive, not %s' % period)
+        self.period = period
+        self.width = width
+        self._window = None
+        self._position = 0
+        self._sum = self._squares = self._count = 0.0
+
+    def update(self, candle):
+        close = np.asarray(candle['close'], float)
+        if self._window is None:
+            self._window = np.full((self.period,) + close.shape, np.nan)
+        valid = ~np.isnan(close)
+        new = np.where(valid, close, 0.0)
+        old = self._window[self._position]
+        old_valid = ~np.isnan(old)
+        old = np.where(old_valid, old, 0.0)
+        self._window[self._position] = close
+        self._position = (self._position + 1) % self.period
+        if self._position:
+            self._sum = self._sum + new - old
+            self._squares = self._squares + new * new - old * old
+            self._count = self._count + valid - old_valid
+        else:
+            self._sum = np.nansum(self._window, axis=0)
+            self._squares = np.nansum(self._window * self._window, axis=0)
+            self._count = np.sum(~np.isnan(self._window), axis=0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            middle = np.asarray(self._sum / self._count)
+            spread = self.width * np.sqrt(np.maximum(
+                self._squares / self._count - middle * middle, 0.0))
+        np.copyto(middle, np.nan, where=self._count < self.period)
+        return middle, middle + spread, middle - spread
+
+    def _batch(self, close):
+        if self._window is None:
+            earlier = np.full(close.shape[:-1] + (self.period - 1,), np.nan)
+        else:
+            window = np.roll(self._window, -self._position, axis=0)
+            earlier = np.moveaxis(window, 0, -1)[..., 1:]
+        history = np.concatenate([earlier, close], axis=-1)
+        valid = ~np.isnan(history)
+        values = np.where(valid, history, 0.0)
+        steps = close.shape[-1]
+        counts = np.cumsum(valid, axis=-1)
+        count = counts[..., self.period - 1:] - np.concatenate(
+            [np.zeros(counts.shape[:-1] + (1,), counts.dtype),
+             counts[..., :steps - 1]], axis=-1)
+        total = np.zeros(close.shape)
+        squares = np.zeros(close.shape)
+        products = values * values
+        for offset in range(self.period):
+            total += values[..., offset:offset + steps]
+            squares += products[..., offset:offset + steps]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            middle = total / count
+            spread = self.width * np.sqrt(np.maximum(
+                squares / count - middle * middle, 0.0))
+        np.copyto(middle, np.nan, where=count < self.period)
+
+        self._window = np.moveaxis(history[..., -self.period:], -1, 0).copy()
+        self._position = 0
+        self._sum = np.nansum(self._window, axis=0)
+        self._squares = np.nansum(self._window * self._window, axis=0)
+        self._count = np.sum(~np.isnan(self._window), axis=0)
+        return middle, middle + spread, middle - spread
+
+
+class VWAP(Indicator):
+    """Volume weighted average of the typical price ``(high + low + close) / 3``.
+
+    :param session: length in seconds of the sessions the average restarts
+        on, such as ``86400`` for a daily VWAP; cumulative when ``None``
+    """
+
+    FIELDS = ('close_time', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, session=None):
+        if session is not None and session <= 0:
+            raise ValueError('Session must be positive, not %s' % session)
+        self.session = session
+        self._session = np.nan
+        self._weighted = 0.0
+        self._volume = 0.0
+
+    def update(self, candle):
+        typical = (np.asarray(candle['high'], float)
+                   + np.asarray(candle['low'], float)
+                   + np.asarray(candle['close'], float)) / 3.0
+        volume = np.asarray(candle['volume'], float)
+        if self.session is not None:
+            # A candle closing on a boundary belongs to the session it ends.
+            session = (np.asarray(candle['close_time'], float) - 1) // self.session
+            restart = (session != self._session) & ~np.isnan(session)
+            self._session = _carry(self._session, session)
+            self._weighted = np.where(restart, 0.0, self._weighted)
+            self._volume = np.where(restart, 0.0, self._volume)
+        valid = ~(np.isnan(typical) | np.isnan(volume))
+        self._weighted = self._weighted + np.where(valid, typical * volume, 0.0)
+        self._volume = self._volume + np.where(valid, volume, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.asarray(self._weighted / self._volume)
+
+    def _batch(self, close_time, high, low, close, volume):
+        typical = (high + low + close) / 3.0
+        valid = ~(np.isnan(typical) | np.isnan(volume))
+        totals = [np.cumsum(np.where(valid, typical * volume, 0.0), axis=-1),
+                  np.cumsum(np.where(valid, volume, 0.0), axis=-1)]
+        initial = [_state(self._weighted, typical.shape[:-1])[..., None],
+                   _state(self._volume, typical.shape[:-1])[..., None]]
+        if self.session is None:
+            totals = [total + start for total, start in zip(totals, initial)]
+        else:
+            session = np.floor((close_time - 1) / self.session)
+            previous, self._session = _previous(session, self._session)
+            restart = (session != previous) & ~np.isnan(session)
+            steps = np.arange(session.shape[-1])
+            last = np.maximum.accumulate(np.where(restart, steps, -1), axis=-1)
+            for index, (total, start) in enumerate(zip(totals, initial)):
+                # Sums before each step, taken off from the last restart on.
+                before = np.concatenate([np.zeros_like(start), total[..., :-1]],
+                                        axis=-1)
+                base = np.take_along_axis(before, np.maximum(last, 0), axis=-1)
+                totals[index] = np.where(last >= 0, total - base, total + start)
+        weighted, volumes = totals
+        self._weighted = weighted[..., -1]
+        self._volume = volumes[..., -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return weighted / volumes
+
+
+class IndicatorSet(object):
+    """Named indicators updated together.
+
+    .. code-block:: python
+
+        indicators = IndicatorSet(ema=EMA(20), bands=Bollinger(20, 2.0))
+        indicators.update(candles)['bands']
+        # (middle, upper, lower)
+
+    """
+
+    def __init__(self, **indicators):
+        self.indicators = indicators
+
+    def update(self, candle):
+        """Update every indicator, see :meth:`Indicator.update`.
+
+        :returns: dict of the indicator values by name
+        """
+        return {name: indicator.update(candle)
+                for name, indicator in self.indicators.items()}
+
+    def batch(self, columns):
+        """Run every indicator over the columns, see :meth:`Indicator.batch`.
+
+        :returns: dict of the indicator values by name
+        """
+        return {name: indicator.batch(columns)
+                for name, indicator in self.indicators.items()}
+
+
+def align(candles, fields=columnar.OHLC_FIELDS):
+    """Stack the candles of several markets on their common close times.
+
+    :param candles: mapping of market to candle columns sorted by close time
+    :returns: ``(markets, close_times, columns)`` with ``(markets, time)``
+        float columns, ``nan`` where a market has no candle
+    """
+    markets = list(candles)
+    times = np.unique(np.concatenate(
+        [np.asarray(candles[m]['close_time'], np.int64) for m in markets]
+        or [np.empty(0, np.int64)]))
+    columns = {}
+    for field in fields:
+        if field == 'close_time':
+            columns[field] = np.broadcast_to(times, (len(markets), len(times)))
+            continue
+        stacked = np.full((len(markets), len(times)), np.nan)
+        for row, market in enumerate(markets):
+            index = np.searchsorted(times, candles[market]['close_time'])
+            stacked[row, index] = candles[market][field]
+        columns[field] = stacked
+    return markets, times, columns
+
+
+def ema(values, period):
+    """Batch :class:`EMA` of ``values`` over their last axis."""
+    return EMA(period).batch({'close': values})
+
+
+def rsi(close, period=14):
+    """Batch :class:`RSI` over the last axis."""
+    return RSI(period).batch({'close': close})
+
+
+def atr(high, low, close, period=14):
+    """Batch :class:`ATR` over the last axis."""
+    return ATR(period).batch({'high': high, 'low': low, 'close': close})
+
+
+def bollinger(close, period=20, width=2.0):
+    """Batch :class:`Bollinger` over the last axis.
+
+    :returns: ``(middle, upper, lower)``
+    """
+    return Bollinger(period, width).batch({'close': close})
+
+
+def vwap(high, low, close, volume, close_time=None, session=None):
+    """Batch :class:`VWAP` over the last axis."""
+    if close_time is None:
+        if session is not None:
+            raise ValueError('A session VWAP needs the close times')
+        close_time = np.zeros(np.shape(close))
+    return VWAP(session).batch({'close_time': close_time, 'high': high,
+                                'low': low, 'close': close, 'volume': volume})
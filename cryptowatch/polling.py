@@ -0,0 +1,256 @@
+"""Module related to polling markets as often as their activity warrants.
+
+Each market is assumed to change at a rate ``λ``, estimated from the
+arrival of its trades and seeded from its ``summaries`` volume. Polling a
+market every ``1 / r`` seconds leaves on average ``λ / 2r`` changes unseen,
+so the request rate ``R`` is split as ``r ∝ sqrt(λ)``, which minimizes the
+total ``Σ λ / r`` under ``Σ r = R``, every stream keeping at least a floor
+rate so idle markets are still checked.
+"""
+
+import math
+import time
+
+from cryptowatch.scheduler import Job, Scheduler
+
+SECONDS_PER_DAY = 86400.0
+
+
+def allocate(weights, total, floor=0.0):
+    """Split ``total`` in proportion to ``weights``, each share at least ``floor``.
+
+    Shares falling below ``floor`` are raised to it and the rest is split
+    again among the other weights. When ``total`` cannot cover every floor
+    it is split evenly.
+
+    :returns: list of the shares
+    """
+    count = len(weights)
+    if not count:
+        return []
+    if total <= floor * count:
+        return [total / count] * count
+    fixed = set()
+    while True:
+        free = total - floor * len(fixed)
+        weight = sum(w for i, w in enumerate(weights) if i not in fixed)
+        left = count - len(fixed)
+        shares = [floor if i in fixed
+                  else free * w / weight if weight else free / left
+                  for i, w in enumerate(weights)]
+        low = [i for i, share in enumerate(shares)
+               if i not in fixed and share < floor]
+        if not low:
+            return shares
+        fixed.update(low)
+
+
+class _Market(object):
+    """Activity estimate of a market."""
+
+    __slots__ = ('rate', 'observed', 'size', 'volume', 'last_trade')
+
+    def __init__(self):
+        self.rate = None
+        self.observed = None
+        self.size = None
+        self.volume = None
+        self.last_trade = None
+
+
+class AdaptivePoller(object):
+    """Poll market routes at intervals planned from their activity.
+
+    Trade polls count the trades arrived since the previous poll; when a
+    response only holds new trades it may have been truncated, so the rate
+    over its own time span is used if higher. Price and order book polls
+    only tell whether the market changed and are used when trades are not
+    polled. Estimates are time weighted moving averages with a
+    ``half_life`` in seconds. Markets never observed take the rate implied
+    by their 24 hour ``summaries`` volume once their trade size is known,
+    ``initial_rate`` otherwise.
+
+    .. code-block:: python
+
+        poller = AdaptivePoller(client, markets, rate=5.0,
+                                routes=('trades', 'orderbook'),
+                                callback=on_response)
+        poller.run(3600)
+        poller.freshness()
+
+    :param markets: ``(exchange, pair)`` tuples
+    :param rate: requests per second to spread over the markets
+    :param routes: market routes polled for every market
+    :param max_interval: longest interval of a route, setting the floor rate
+    :param replan_interval: seconds between two plans
+    :param summary_interval: seconds between two ``summaries`` calls, or
+        ``None`` not to make them
+    :param callback: called as ``callback(job, response)`` after each poll
+    :param scheduler: :class:`~cryptowatch.scheduler.Scheduler` running the
+        polls, a new one over ``client`` and ``budget`` by default
+    """
+
+    def __init__(self, client, markets, rate, routes=('trades',),
+                 max_interval=300.0, half_life=600.0, initial_rate=0.01,
+                 replan_interval=30.0, summary_interval=600.0, callback=None,
+                 budget=None, scheduler=None, clock=time.monotonic,
+                 sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError('Polling rate must be positive')
+        self.rate = rate
+        self.routes = tuple(routes)
+        self.floor = 1.0 / max_interval
+        self.max_interval = max_interval
+        self.half_life = half_life
+        self.initial_rate = initial_rate
+        self.replan_interval = replan_interval
+        self.summary_interval = summary_interval
+        self.callback = callback
+        self.clock = clock
+        if scheduler is None:
+            scheduler = Scheduler(client, budget, clock=clock, sleep=sleep)
+        self.scheduler = scheduler
+        self.markets = {tuple(market): _Market() for market in markets}
+        self._polled = {}
+        self._seen = {}
+        self.jobs = []
+        start = clock()
+        share = self._budget() / max(len(self.markets) * len(self.routes), 1)
+        interval = min(1.0 / share, max_interval) if share else max_interval
+        for market in self.markets:
+            for route in self.routes:
+                job = Job(route, market, interval=interval,
+                          priority=1, callback=self._on_response)
+                self.jobs.append(job)
+                scheduler.add(job, start)
+        self.summary_job = None
+        if summary_interval is not None:
+            self.summary_job = Job('summaries', interval=summary_interval,
+                                   priority=1, callback=self._on_summaries)
+            scheduler.add(self.summary_job, start)
+        self._next_plan = start + replan_interval
+
+    def _budget(self):
+        """Requests per second left for the market routes."""
+        if self.summary_interval is None:
+            return self.rate
+        return max(self.rate - 1.0 / self.summary_interval, 0.0)
+
+    def activity(self, market):
+        """Return the estimated changes per second of ``market``."""
+        state = self.markets[tuple(market)]
+        if state.observed is not None:
+            return state.rate
+        if state.volume is not None:
+            if state.volume <= 0:
+                return 0.0
+            if state.size:
+                return state.volume / SECONDS_PER_DAY / state.size
+        return self.initial_rate
+
+    def _observe(self, state, rate, elapsed, now):
+        if state.observed is None:
+            state.rate = rate
+        else:
+            weight = 1.0 - 0.5 ** (elapsed / self.half_life)
+            state.rate += weight * (rate - state.rate)
+        state.observed = now
+
+    def _on_response(self, job, response):
+        now = self.clock()
+        key = (job.market, job.route)
+        previous = self._polled.get(key)
+        self._polled[key] = now
+        state = self.markets[job.market]
+        result = response.get('result') if response else None
+        if job.route == 'trades' and result is not None:
+            self._on_trades(state, result, previous, now)
+        elif 'trades' not in self.routes and result is not None:
+            fingerprint = result.get('seqNum', result) if isinstance(
+                result, dict) else result
+            changed = key in self._seen and self._seen[key] != fingerprint
+            self._seen[key] = fingerprint
+            if previous is not None and now > previous:
+                self._observe(state, float(changed) / (now - previous),
+                              now - previous, now)
+        if self.callback is not None:
+            self.callback(job, response)
+        if now >= self._next_plan:
+            self.plan()
+
+    def _on_trades(self, state, trades, previous, now):
+        if not trades:
+            new = []
+        elif state.last_trade is None:
+            new = trades
+        else:
+            new = [trade for trade in trades if trade[1] > state.last_trade]
+        if new:
+            state.last_trade = max(trade[1] for trade in new)
+            size = sum(trade[3] for trade in new) / len(new)
+            state.size = size if state.size is None else (
+                state.size + 0.1 * (size - state.size))
+        rate = None
+        if previous is not None and now > previous:
+            rate = len(new) / (now - previous)
+        if len(new) == len(trades) and len(trades) > 1:
+            # Every trade is new, the response may have been truncated.
+            span = max(t[1] for t in trades) - min(t[1] for t in trades)
+            if span > 0:
+                rate = max(rate or 0.0, (len(trades) - 1) / float(span))
+        if rate is not None:
+            self._observe(state, rate, now - (previous or now), now)
+
+    def _on_summaries(self, job, response):
+        result = (response or {}).get('result') or {}
+        for market, state in self.markets.items():
+            summary = result.get('%s:%s' % market)
+            if summary is not None and summary.get('volume') is not None:
+                state.volume = float(summary['volume'])
+        self.plan()
+
+    def plan(self):
+        """Re-plan the interval of every route from the activity estimates.
+
+        :returns: dict of job to its new interval
+        """
+        weights = [math.sqrt(self.activity(job.market)) for job in self.jobs]
+        rates = allocate(weights, self._budget(), self.floor)
+        intervals = {job: min(1.0 / rate, self.max_interval) if rate > 0
+                     else self.max_interval
+                     for job, rate in zip(self.jobs, rates)}
+        self.scheduler.set_intervals(intervals)
+        self._next_plan = self.clock() + self.replan_interval
+        return intervals
+
+    def freshness(self, now=None):
+        """Return the chance that each route has not changed since its poll.
+
+        :returns: dict of ``(market, route)`` to ``exp(-λ age)``, ``0.0``
+            for a route not polled yet
+        """
+        now = self.clock() if now is None else now
+        return {(job.market, job.route): math.exp(
+                    -self.activity(job.market)
+                    * (now - self._polled[(job.market, job.route)]))
+                if (job.market, job.route) in self._polled else 0.0
+                for job in self.jobs}
+
+    def expected_freshness(self):
+        """Return the time averaged freshness of each route under the plan.
+
+        Polled every ``I`` seconds, a route changing at rate ``λ`` is fresh
+        ``(1 - exp(-λI)) / λI`` of the time.
+
+        :returns: dict of ``(market, route)`` to a fraction
+        """
+        freshness = {}
+        for job in self.jobs:
+            changes = self.activity(job.market) * job.interval
+            freshness[(job.market, job.route)] = (
+                1.0 if changes <= 0 else -math.expm1(-changes) / changes)
+        return freshness
+
+    def run(self, duration=None):
+        """Poll for ``duration`` seconds or forever."""
+        self.scheduler.run(duration)
@@ -0,0 +1,109 @@
+"""Module related to deriving longer candles from shorter ones.
+
+Candles are the columns decoded by :mod:`cryptowatch.columnar`, a candle
+closing at ``close_time`` covering ``(close_time - period, close_time]``.
+A derived bar closes on a multiple of its period (plus ``offset``), so
+bars line up with the server's own candles and gaps in the base candles
+never shift the bars that follow them.
+"""
+
+import numpy as np
+
+from cryptowatch import columnar
+
+
+def _check_periods(base_period, period):
+    if base_period <= 0 or period <= 0 or period % base_period:
+        raise ValueError('Period %s is not a multiple of the base period %s'
+                         % (period, base_period))
+
+
+def resample(candles, base_period, period, offset=0):
+    """Build ``period`` candles from ``base_period`` candles.
+
+    Open is the first open, high the highest high, low the lowest low,
+    close the last close and the volumes are summed. Bars without any base
+    candle are not emitted; the extra ``count`` column holds the number of
+    base candles of each bar, ``period // base_period`` for a complete one.
+
+    .. code-block:: python
+
+        candles = columnar.decode_ohlc(response)[3600]
+        four_hours = resample(candles, 3600, 4 * 3600)
+
+    :param candles: base candle columns sorted by close time
+    :param offset: shift of the bar boundaries, in seconds
+    :raises ValueError: when ``period`` is not a multiple of ``base_period``
+    """
+    _check_periods(base_period, period)
+    times = np.asarray(candles['close_time'])
+    if not len(times):
+        bars = columnar.empty(columnar.OHLC_FIELDS)
+        bars['count'] = np.empty(0, np.int64)
+        return bars
+    closes = -((offset - times) // period) * period + offset
+    starts = np.flatnonzero(np.r_[True, closes[1:] != closes[:-1]])
+    ends = np.r_[starts[1:], len(times)]
+    return {
+        'close_time': closes[starts],
+        'open': np.asarray(candles['open'])[starts],
+        'high': np.maximum.reduceat(candles['high'], starts),
+        'low': np.minimum.reduceat(candles['low'], starts),
+        'close': np.asarray(candles['close'])[ends - 1],
+        'volume': np.add.reduceat(candles['volume'], starts),
+        'quote_volume': np.add.reduceat(candles['quote_volume'], starts),
+        'count': ends - starts,
+    }
+
+
+class Resampler(object):
+    """Incremental :func:`resample`.
+
+    Only the base candles of the bar still open are kept, so each update
+    costs the size of the new candles plus at most ``period // base_period``
+    pending ones. A base candle received again (e.g. the server's forming
+    candle, revised) replaces its previous copy.
+
+    .. code-block:: python
+
+        resampler = Resampler(60, 300)
+        closed = resampler.update(candles)
+        resampler.last  # the bar still open, as a dict
+
+    """
+
+    def __init__(self, base_period, period, offset=0):
+        _check_periods(base_period, period)
+        self.base_period = base_period
+        self.period = period
+        self.offset = offset
+        self._pending = columnar.empty(columnar.OHLC_FIELDS)
+        self.last = None
+
+    def update(self, candles):
+        """Add base candles, returning the bars they closed.
+
+        Candles older than the open bar are ignored.
+
+        :returns: closed bar columns, possibly empty
+        """
+        columns = {field: np.concatenate((self._pending[field],
+                                          np.asarray(candles[field])))
+                   for field in columnar.OHLC_FIELDS}
+        times = columns['close_time']
+        order = np.argsort(times, kind='stable')
+        columns = columnar.take(columns, order)
+        times = columns['close_time']
+        # On duplicate close times the newest copy wins.
+        keep = np.append(times[1:] != times[:-1], True)
+        if self.last is not None:
+            keep &= times > self.last['close_time'] - self.period
+        columns = columnar.take(columns, keep)
+
+        bars = resample(columns, self.base_period, self.period, self.offset)
+        if not len(bars['close_time']):
+            return bars
+        self.last = {field: values[-1].item() for field, values in bars.items()}
+        self._pending = columnar.take(
+            columns, slice(len(columns['close_time']) - self.last['count'], None))
+        return columnar.take(bars, slice(None, -1))
@@ -0,0 +1,73 @@
+"""Module related to prepared, validated market requests."""
+
+
+class MarketRoute(object):
+    """A market request validated once and reissued cheaply.
+
+    The url, including the query string encoded as
+    :meth:`~cryptowatch.api_client.Client.get_markets` does, is built when
+    the route is prepared, so issuing it again costs a single session call.
+
+    .. code-block:: python
+
+        route = client.prepare_market('gdax', 'btcusd', 'trades',
+                                      params={'limit': 10})
+        while True:
+            trades = route.fetch()
+
+    :raises ValueError: for an unknown route, an unsupported param or,
+        when a catalog is given, a market it does not list
+    """
+
+    __slots__ = ('client', 'exchange', 'pair', 'route', 'params', 'catalog',
+                 'url')
+
+    def __init__(self, client, exchange, pair, route=None, params=None,
+                 catalog=None):
+        if not exchange or not pair:
+            raise ValueError('Both "exchange" and "pair" are required')
+        if route is not None and route not in client.ROUTES_MARKET:
+            raise ValueError('Unknown market route "%s", use one of %s'
+                             % (route, ', '.join(client.ROUTES_MARKET)))
+        params = dict(params or {})
+        if params:
+            allowed = client.PARAMS.get(route, ()) + ('apikey',)
+            unknown = sorted(set(params) - set(allowed))
+            if route not in client.ROUTES_PARAMS or unknown:
+                raise ValueError('Unsupported params for route "%s": %s'
+                                 % (route, ', '.join(unknown or sorted(params))))
+        if catalog is not None and not catalog.has_market(exchange, pair):
+            raise ValueError('Unknown market "%s:%s"' % (exchange, pair))
+
+        self.client = client
+        self.exchange = exchange
+        self.pair = pair
+        self.route = route
+        self.params = params
+        self.catalog = catalog
+        url = client.API_URL + '/markets/' + exchange + '/' + pair
+        if route:
+            url += '/' + route
+        if params:
+            url += '?' + client._encode_params(data={'route': route,
+                                                     'params': params})
+        self.url = url
+
+    def fetch(self):
+        """Issue the prepared request.
+
+        :returns: API response
+        """
+        return self.client._request('get', self.url, self.route)
+
+    __call__ = fetch
+
+    def with_params(self, **params):
+        """Return a copy of the route with ``params`` merged in."""
+        merged = dict(self.params)
+        merged.update(params)
+        return MarketRoute(self.client, self.exchange, self.pair, self.route,
+                           merged, self.catalog)
+
+    def __repr__(self):
+        return 'MarketRoute(%r)' % self.url
@@ -0,0 +1,294 @@
+"""Module related to scheduling recurring API calls."""
+
+import heapq
+import time
+from collections import deque
+
+from cryptowatch.exceptions import ERRORS
+
+AGGREGATES = {'price': 'prices', 'summary': 'summaries'}
+INDEXES = ('assets', 'pairs', 'exchanges', 'markets')
+
+# Offsets of the k-th job of an interval follow the golden ratio sequence,
+# which keeps any number of jobs evenly spread without moving earlier ones.
+GOLDEN = 0.6180339887498949
+
+
+class Job(object):
+    """A recurring call.
+
+    ``error`` holds the exception raised by the last run, ``None`` once a
+    run succeeded.
+
+    :param route: a market route (``'price'``, ``'trades'``, ...), an
+        aggregate (``'prices'``, ``'summaries'``) or an index
+        (``'assets'``, ``'pairs'``, ``'exchanges'``, ``'markets'``)
+    :param market: ``(exchange, pair)`` of a market route
+    :param interval: seconds between two runs
+    :param priority: higher runs first and is the last to be deferred
+    :param deadline: seconds after its due time past which a run is dropped
+    :param callback: called as ``callback(job, response)``
+    :param params: params of a market route
+    :raises ValueError: for an aggregate or index route given a market, or
+        another route without one; market routes are checked when added to
+        a :class:`Scheduler`
+    """
+
+    def __init__(self, route, market=None, interval=60.0, priority=0,
+                 deadline=None, callback=None, params=None):
+        if interval <= 0:
+            raise ValueError('Job interval must be positive')
+        routes = INDEXES + tuple(AGGREGATES.values())
+        if market is None and route not in routes:
+            raise ValueError('Route "%s" needs a market, or use one of %s'
+                             % (route, ', '.join(routes)))
+        if market is not None and route in routes:
+            raise ValueError('Route "%s" takes no market' % route)
+        self.route = route
+        self.market = market
+        self.interval = interval
+        self.priority = priority
+        self.deadline = deadline
+        self.callback = callback
+        self.params = params
+        self.prepared = None
+        self.error = None
+
+    def __repr__(self):
+        return 'Job(%r, %r, interval=%r)' % (self.route, self.market,
+                                             self.interval)
+
+
+class Scheduler(object):
+    """Run recurring jobs evenly spread over time and under a budget.
+
+    Due ``price`` and ``summary`` jobs are served by a single ``prices`` or
+    ``summaries`` aggregate call once at least ``batch_size`` of them fall
+    within the batching window; jobs due within ``batch_window`` of their
+    interval ride along. When the budget has less than ``reserve`` tokens
+    left, jobs below ``min_priority`` are deferred and dropped once past
+    their deadline.
+
+    .. code-block:: python
+
+        scheduler = Scheduler(client, budget)
+        scheduler.add(Job('price', ('gdax', 'btcusd'), interval=2,
+                          callback=on_price))
+        scheduler.add(Job('ohlc', ('gdax', 'btcusd'), interval=60,
+                          priority=1, callback=on_candles))
+        scheduler.run()
+
+    """
+
+    def __init__(self, client, budget=None, batch_size=3, batch_window=0.5,
+                 reserve=0.0, min_priority=1, cost=1.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.client = client
+        self.budget = budget
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.reserve = reserve
+        self.min_priority = min_priority
+        self.cost = cost
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = {'runs': 0, 'calls': 0, 'batched': 0, 'deferred': 0,
+                      'dropped': 0, 'errors': 0}
+        self.lags = deque(maxlen=10000)
+        self._queue = []
+        # Original due time of the deferred jobs, queued at their retry time.
+        self._deferred = {}
+        self._counts = {}
+        self._sequence = 0
+
+    def _push(self, due, job):
+        self._sequence += 1
+        heapq.heappush(self._queue, (due, self._sequence, job))
+
+    def add(self, job, start=None):
+        """Schedule ``job``, its first run offset to spread its interval.
+
+        :raises ValueError: for an invalid market route, market or params
+        """
+        if job.market is not None and job.prepared is None:
+            job.prepared = self.client.prepare_market(
+                job.market[0], job.market[1], job.route, job.params)
+        count = self._counts.get(job.interval, 0)
+        self._counts[job.interval] = count + 1
+        offset = (count * GOLDEN) % 1.0 * job.interval
+        self._push((self.clock() if start is None else start) + offset, job)
+
+    def set_intervals(self, intervals):
+        """Change the interval of jobs, moving their next run along.
+
+        A queued job next runs ``interval`` seconds after its previous
+        due time, right away if that has already passed; a deferred job
+        keeps its retry time.
+
+        :param intervals: dict of job to its new interval in seconds
+        """
+        for interval in intervals.values():
+            if interval <= 0:
+                raise ValueError('Job interval must be positive')
+        queue = []
+        for due, sequence, job in self._queue:
+            interval = intervals.get(job)
+            if interval is not None and job not in self._deferred:
+                due += interval - job.interval
+            queue.append((due, sequence, job))
+        heapq.heapify(queue)
+        self._queue = queue
+        for job, interval in intervals.items():
+            job.interval = interval
+
+    def __len__(self):
+        return len(self._queue)
+
+    def next_due(self):
+        """Return when the next job is due or ``None``."""
+        return self._queue[0][0] if self._queue else None
+
+    def _reschedule(self, due, job, now):
+        due += job.interval
+        if due <= now:
+            # Skip the runs already missed rather than bursting to catch up.
+            due += (now - due) // job.interval * job.interval + job.interval
+        self._push(due, job)
+
+    def _under_pressure(self):
+        return self.budget is not None and self.budget.remaining < self.reserve
+
+    def _call(self, job):
+        route = job.route
+        if job.market is not None:
+            return job.prepared.fetch()
+        if route in INDEXES:
+            return getattr(self.client, 'get_' + route)()
+        return self.client.get_aggregates(route)
+
+    def _acquire(self, job):
+        if self.budget is None:
+            return True
+        if job.priority >= self.min_priority:
+            return self.budget.acquire(self.cost)
+        return self.budget.try_acquire(self.cost)
+
+    def _deliver(self, job, response, due, now):
+        self.stats['runs'] += 1
+        self.lags.append(now - due)
+        if job.callback is not None:
+            job.callback(job, response)
+
+    def _batch(self, aggregate, entries, now):
+        """Serve due market jobs from one aggregate call."""
+        window = [(due, job) for due, job in entries]
+        taken = []
+        for due, sequence, job in self._queue:
+            if (job.market is not None and AGGREGATES.get(job.route) == aggregate
+                    and due - now <= job.interval * self.batch_window):
+                taken.append((due, sequence, job))
+        if taken:
+            for entry in taken:
+                self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            window.extend((self._deferred.pop(job, due), job)
+                          for due, _, job in taken)
+        try:
+            response = self.client.get_aggregates(aggregate)
+        except ERRORS as error:
+            self.stats['errors'] += 1
+            for due, job in window:
+                job.error = error
+                self._reschedule(due, job, now)
+            return
+        self.stats['calls'] += 1
+        self.stats['batched'] += len(window)
+        if self.budget is not None:
+            self.budget.sync(response, self.cost)
+        result = response['result']
+        for due, job in window:
+            key = '%s:%s' % job.market
+            value = result.get(key)
+            if job.route == 'price' and value is not None:
+                value = {'price': value}
+            job.error = None
+            self._deliver(job, {'result': value,
+                                'allowance': response.get('allowance')},
+                          min(due, now), now)
+            self._reschedule(due, job, now)
+
+    def run_pending(self):
+        """Run the jobs due now.
+
+        :returns: number of jobs run
+        """
+        now = self.clock()
+        due_jobs = []
+        while self._queue and self._queue[0][0] <= now:
+            due, _, job = heapq.heappop(self._queue)
+            due_jobs.append((self._deferred.pop(job, due), job))
+        due_jobs.sort(key=lambda entry: (-entry[1].priority, entry[0]))
+
+        runs = self.stats['runs']
+        groups = {}
+        for due, job in due_jobs:
+            if job.market is not None and job.route in AGGREGATES:
+                groups.setdefault(AGGREGATES[job.route], []).append((due, job))
+        batched = set()
+        for aggregate, entries in groups.items():
+            if len(entries) >= self.batch_size and self._acquire(entries[0][1]):
+                self._batch(aggregate, entries, now)
+                batched.update(id(job) for _, job in entries)
+
+        for due, job in due_jobs:
+            if id(job) in batched:
+                continue
+            if job.deadline is not None and now - due > job.deadline:
+                self.stats['dropped'] += 1
+                self._reschedule(due, job, now)
+                continue
+            low = job.priority < self.min_priority
+            if (low and self._under_pressure()) or not self._acquire(job):
+                self.stats['deferred'] += 1
+                self._deferred[job] = due
+                self._push(now + min(job.interval, 1.0), job)
+                continue
+            try:
+                response = self._call(job)
+            except ERRORS as error:
+                self.stats['errors'] += 1
+                job.error = error
+            else:
+                job.error = None
+                self.stats['calls'] += 1
+                if self.budget is not None:
+                    self.budget.sync(response, self.cost)
+                self._deliver(job, response, due, self.clock())
+            self._reschedule(due, job, now)
+        return self.stats['runs'] - runs
+
+    def run(self, duration=None):
+        """Run jobs as they fall due, for ``duration`` seconds or forever."""
+        end = None if duration is None else self.clock() + duration
+        while end is None or self.clock() < end:
+            self.run_pending()
+            due = self.next_due()
+            now = self.clock()
+            wait = 1.0 if due is None else due - now
+            if end is not None:
+                wait = min(wait, end - now)
+            if wait > 0:
+                self.sleep(wait)
+
+    def lag(self):
+        """Return schedule lag statistics, in seconds, of the recent runs.
+
+        :returns: dict with ``count``, ``mean``, ``p95`` and ``max``
+        """
+        lags = sorted(self.lags)
+        if not lags:
+            return {'count': 0, 'mean': 0.0, 'p95': 0.0, 'max': 0.0}
+        return {'count': len(lags),
+                'mean': sum(lags) / len(lags),
+                'p95': lags[min(len(lags) - 1, int(len(lags) * 0.95))],
+                'max': lags[-1]}
@@ -0,0 +1,389 @@
+"""Module related to on-disk storage of collected candles and trades.
+
+Every series, i.e. the candles of one (exchange, pair, period) or the
+trades of one (exchange, pair), lives in its own directory with one
+fixed-width little-endian file per column::
+
+    root/gdax/btcusd/ohlc-60/close_time.i8
+    root/gdax/btcusd/ohlc-60/open.f8
+    ...
+    root/gdax/btcusd/trades/timestamp.i8
+    ...
+
+Rows are kept sorted on their time column, so a time range is located by
+binary search and read back as memory-mapped, zero-copy NumPy arrays.
+The latest candle of a candle series may still be forming: it is kept in
+the series' ``_meta`` file until a newer candle closes it. Merging rows
+older than the stored ones writes a new generation of the column files,
+such as ``close_time.1.i8``.
+"""
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from cryptowatch import columnar
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+META = struct.Struct('<qqq')
+
+
+class Snapshot(object):
+    """A consistent view of a series at one commit.
+
+    ``closed`` holds the rows that can no longer change, as read-only arrays
+    mapped from the column files. ``forming`` is the latest candle of a
+    candle series, which the next append may still revise, or ``None``.
+    """
+
+    def __init__(self, closed, forming, time_field):
+        self.closed = closed
+        self.forming = forming
+        self.time_field = time_field
+
+    def __len__(self):
+        return columnar.length(self.closed) + (self.forming is not None)
+
+    def last_time(self):
+        """Return the time of the last row or ``None``."""
+        if self.forming is not None:
+            return int(self.forming[self.time_field])
+        times = self.closed[self.time_field]
+        return int(times[-1]) if len(times) else None
+
+    def read(self, start=None, end=None):
+        """Return the rows whose time is in ``[start, end)``.
+
+        Closed rows are returned without copying; the columns are only
+        copied when the range includes the forming candle.
+        """
+        times = self.closed[self.time_field]
+        first = 0 if start is None else int(np.searchsorted(times, start, 'left'))
+        last = len(times) if end is None else int(np.searchsorted(times, end, 'left'))
+        columns = columnar.take(self.closed, slice(first, last))
+        if self.forming is not None:
+            time = self.forming[self.time_field]
+            if (start is None or time >= start) and (end is None or time < end):
+                columns = {field: np.append(values, self.forming[field])
+                           for field, values in columns.items()}
+        return columns
+
+
+class Series(object):
+    """A sorted columnar time series on disk.
+
+    A single writer process appends at a time, guarded by an advisory file
+    lock. Column data is written first and then published by atomically
+    replacing a small ``_meta`` file holding the committed row count, the
+    generation of the column files and the forming candle, so readers never
+    observe a partial append. Committed rows are never rewritten: new rows
+    are written past them, and rows merged in before them go to the column
+    files of a new generation, whose old files are removed once published.
+    """
+
+    def __init__(self, path, fields, time_field, unique_time=True):
+        self.path = path
+        self.fields = fields
+        self.time_field = time_field
+        self.unique_time = unique_time
+        self.row_dtype = np.dtype([(field, columnar.dtype_of(field))
+                                   for field in fields])
+        os.makedirs(path, exist_ok=True)
+
+    def _column_path(self, field, generation=0):
+        dtype = columnar.dtype_of(field)
+        name = field if not generation else '%s.%d' % (field, generation)
+        return os.path.join(self.path, '%s.%s%d' % (name, dtype.kind,
+                                                    dtype.itemsize))
+
+    def _read_meta(self):
+        """Return the committed ``(count, forming, generation)``."""
+        try:
+            with open(os.path.join(self.path, '_meta'), 'rb') as handle:
+                data = handle.read()
+        except FileNotFoundError:
+            return 0, None, 0
+        count, has_forming, generation = META.unpack_from(data)
+        forming = None
+        if has_forming:
+            forming = np.frombuffer(data, self.row_dtype, 1, META.size)[0]
+        return count, forming, generation
+
+    def _write_meta(self, count, forming, generation):
+        data = META.pack(count, forming is not None, generation)
+        if forming is not None:
+            data += forming.tobytes()
+        path = os.path.join(self.path, '_meta')
+        with open(path + '.tmp', 'wb') as handle:
+            handle.write(data)
+        os.replace(path + '.tmp', path)
+
+    def _column(self, field, count, generation):
+        if not count:
+            return np.empty(0, columnar.dtype_of(field))
+        return np.memmap(self._column_path(field, generation),
+                         columnar.dtype_of(field), mode='r', shape=(count,))
+
+    def _snapshot(self, column):
+        """Return a :class:`Snapshot` of columns mapped by ``column``."""
+        missing = None
+        while True:
+            count, forming, generation = self._read_meta()
+            try:
+                closed = {field: column(field, count, generation)
+                          for field in self.fields}
+            except FileNotFoundError:
+                if generation == missing:
+                    raise
+                # A newer generation replaced the one read, read it instead.
+                missing = generation
+                continue
+            return Snapshot(closed, forming, self.time_field)
+
+    def snapshot(self):
+        """Return a :class:`Snapshot` of the last commit."""
+        return self._snapshot(self._column)
+
+    def reader(self):
+        """Return a :class:`HistoryReader` sharing the page cache."""
+        return HistoryReader(self)
+
+    def __len__(self):
+        return len(self.snapshot())
+
+    def read(self, start=None, end=None):
+        """Return the rows whose time is in ``[start, end)``.
+
+        :returns: columns as read-only memory-mapped arrays
+        """
+        return self.snapshot().read(start, end)
+
+    def last_time(self):
+        """Return the time of the last stored row or ``None``."""
+        return self.snapshot().last_time()
+
+    def _dedupe(self, columns, closed):
+        """Split ``columns`` into the rows after the closed rows and the rows
+        before them, dropping the rows already stored.
+
+        :returns: ``(newer, late)``, ``late`` being ``None`` without any
+        """
+        stored = closed[self.time_field]
+        if not len(stored):
+            return columns, None
+        times = columns[self.time_field]
+        last = stored[-1]
+        earlier = np.flatnonzero(times <= last)
+        left = np.searchsorted(stored, times[earlier], 'left')
+        right = np.searchsorted(stored, times[earlier], 'right')
+        new = left == right
+        if not self.unique_time:
+            for position in np.flatnonzero(~new):
+                index = earlier[position]
+                row = tuple(columns[field][index].item() for field in self.fields)
+                span = slice(left[position], right[position])
+                new[position] = row not in set(zip(*(
+                    closed[field][span].tolist() for field in self.fields)))
+        keep = times > last
+        keep[earlier[new & (times[earlier] == last)]] = True
+        late = np.zeros(len(times), bool)
+        late[earlier[new & (times[earlier] < last)]] = True
+        return (columnar.take(columns, keep),
+                columnar.take(columns, late) if late.any() else None)
+
+    def _lock(self):
+        handle = open(os.path.join(self.path, '.lock'), 'a')
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def append(self, columns):
+        """Append ``columns``, skipping the rows overlapping stored ones.
+
+        Rows older than the last closed one, such as a backfill of earlier
+        history, are merged in: the rows are written to a new generation of
+        the column files, published with the commit, so readers of earlier
+        snapshots keep their own copy.
+
+        :returns: number of new rows
+        """
+        with self._lock():
+            snapshot = self.snapshot()
+            before = len(snapshot)
+            columns = {field: np.asarray(columns[field],
+                                         columnar.dtype_of(field))
+                       for field in self.fields}
+            if snapshot.forming is not None:
+                # The forming candle is rewritten along with the new rows,
+                # unless a newer copy of it arrived.
+                columns = {field: np.insert(values, 0, snapshot.forming[field])
+                           for field, values in columns.items()}
+            order = np.argsort(columns[self.time_field], kind='stable')
+            columns = columnar.take(columns, order)
+            forming = None
+            if self.unique_time and columnar.length(columns):
+                # On duplicate times the last one wins.
+                times = columns[self.time_field]
+                columns = columnar.take(columns,
+                                        np.append(times[1:] != times[:-1], True))
+
+            columns, late = self._dedupe(columns, snapshot.closed)
+            if self.unique_time and columnar.length(columns):
+                forming = np.empty(1, self.row_dtype)[0]
+                for field in self.fields:
+                    forming[field] = columns[field][-1]
+                columns = columnar.take(columns, slice(None, -1))
+
+            closed = snapshot.closed
+            count = start = columnar.length(closed)
+            generation = current = self._read_meta()[2]
+            if late is not None:
+                # Stored rows go first among equal times.
+                start = int(np.searchsorted(closed[self.time_field],
+                                            late[self.time_field][0], 'right'))
+                merged = {field: np.concatenate([closed[field][start:],
+                                                 late[field]])
+                          for field in self.fields}
+                order = np.argsort(merged[self.time_field], kind='stable')
+                columns = {field: np.concatenate([merged[field][order],
+                                                  columns[field]])
+                           for field in self.fields}
+            if start < count:
+                generation += 1
+            for field in self.fields:
+                path = self._column_path(field, generation)
+                if generation != current:
+                    with open(path, 'wb') as handle:
+                        handle.write(closed[field][:start].tobytes())
+                        handle.write(columns[field].tobytes())
+                    continue
+                itemsize = columnar.dtype_of(field).itemsize
+                with open(path, 'r+b' if os.path.exists(path) else 'w+b') as handle:
+                    handle.truncate(count * itemsize)
+                    handle.seek(count * itemsize)
+                    handle.write(columns[field].tobytes())
+            count = start + columnar.length(columns)
+            self._write_meta(count, forming, generation)
+            if generation != current:
+                for field in self.fields:
+                    try:
+                        os.remove(self._column_path(field, current))
+                    except OSError:
+                        # Missing, or still mapped on Windows.
+                        pass
+            return count + (forming is not None) - before
+
+
+class HistoryReader(object):
+    """Read-only access to a series for many processes.
+
+    Column files are mapped with ``mmap`` in read-only mode, so every
+    process on the host shares the same page-cache copy. The maps are kept
+    between snapshots and only replaced once the writer grew the files past
+    them or merged rows into a new generation of them.
+
+    .. code-block:: python
+
+        reader = store.ohlc('gdax', 'btcusd', 60).reader()
+        snapshot = reader.snapshot()
+        snapshot.closed['close']  # read-only numpy array, no copy
+
+    """
+
+    def __init__(self, series):
+        self.series = series
+        self._maps = {}
+
+    def _column(self, field, count, generation):
+        dtype = columnar.dtype_of(field)
+        if not count:
+            return np.empty(0, dtype)
+        size = count * dtype.itemsize
+        mapped, buffer = self._maps.get(field, (None, None))
+        if mapped != generation or len(buffer) < size:
+            with open(self.series._column_path(field, generation), 'rb') as handle:
+                buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[field] = generation, buffer
+        return np.frombuffer(buffer, dtype, count)
+
+    def snapshot(self):
+        """Return a :class:`Snapshot` of the last commit."""
+        return self.series._snapshot(self._column)
+
+
+class Store(object):
+    """Columnar on-disk store of candles and trades.
+
+    .. code-block:: python
+
+        store = Store('/data/cryptowatch')
+        store.fill_ohlc(client, 'gdax', 'btcusd', periods=(60, 3600))
+        candles = store.ohlc('gdax', 'btcusd', 60).read(start=1594087200)
+        candles['close']  # numpy.memmap
+
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def ohlc(self, exchange, pair, period):
+        """Return the candle :class:`Series` of a market and period."""
+        path = os.path.join(self.root, exchange, pair, 'ohlc-%d' % int(period))
+        return Series(path, columnar.OHLC_FIELDS, 'close_time')
+
+    def trades(self, exchange, pair):
+        """Return the trade :class:`Series` of a market."""
+        path = os.path.join(self.root, exchange, pair, 'trades')
+        return Series(path, columnar.TRADE_FIELDS, 'timestamp',
+                      unique_time=False)
+
+    def fill_ohlc(self, client, exchange, pair, periods=(60,), after=None,
+                  before=None):
+        """Fetch candles and append them to their series.
+
+        Without ``after`` the fetch resumes from the oldest of the last
+        stored candles, overlapping rows being deduplicated; an earlier
+        ``after`` backfills older history into the series.
+
+        :returns: dict mapping each period to the number of new candles
+        """
+        series = {int(period): self.ohlc(exchange, pair, period)
+                  for period in periods}
+        if after is None:
+            last_times = [s.last_time() for s in series.values()]
+            if None not in last_times:
+                after = min(last_times) - 1
+        params = {'periods': ','.join(str(period) for period in series)}
+        if after is not None:
+            params['after'] = after
+        if before is not None:
+            params['before'] = before
+        route = client.prepare_market(exchange, pair, 'ohlc', params)
+        decoded = columnar.decode_ohlc(route.fetch())
+        return {period: series[period].append(columns)
+                for period, columns in decoded.items() if period in series}
+
+    def fill_trades(self, client, exchange, pair, limit=None, since=None):
+        """Fetch the trades since the last stored one and append them.
+
+        :param since: UNIX time to fetch the trades from while the series
+            is empty
+        :returns: number of new trades
+        """
+        series = self.trades(exchange, pair)
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        last_time = series.last_time()
+        if last_time is not None:
+            since = last_time
+        if since is not None:
+            params['since'] = since
+        route = client.prepare_market(exchange, pair, 'trades', params)
+        return series.append(columnar.decode_trades(route.fetch()))
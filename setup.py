@@ -35,10 +35,21 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=get_requirements('requirements.txt'),
+    extras_require={
+        'numpy': ['numpy>=1.17'],
+        'pandas': ['numpy>=1.17', 'pandas>=1.0'],
+        'arrow': ['numpy>=1.17', 'pyarrow>=1.0'],
+        'compression': ['brotli>=1.0'],
+        },
     setup_requires=[
         'pytest-runner',
         'pytest-pylint'
         ],
     tests_require=get_requirements('requirements_test.txt'),
+    entry_points={
+        'console_scripts': [
+            'cryptowatch=cryptowatch.cli:main',
+            ],
+        },
     platforms='any'
 )
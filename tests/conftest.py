@@ -1,8 +1,128 @@
 """Test fixtures."""
+import gzip
+import json
+import threading
+
 import pytest
+import requests_mock
 
 
 @pytest.fixture
 def assets_keys(scope='module'):
     """Mock keys fixture."""
     return ['result', 'allowance']
+
+
+API_URL = 'https://api.cryptowat.ch'
+
+
+def _asset(symbol, fiat):
+    return {'symbol': symbol, 'name': symbol.upper(), 'fiat': fiat,
+            'route': API_URL + '/assets/' + symbol}
+
+
+def _pair(base, quote):
+    return {'symbol': base + quote,
+            'base': _asset(base, base in ('usd', 'eur')),
+            'quote': _asset(quote, quote in ('usd', 'eur')),
+            'route': API_URL + '/pairs/' + base + quote}
+
+
+def _market(exchange, pair, active=True):
+    return {'exchange': exchange, 'pair': pair, 'active': active,
+            'route': API_URL + '/markets/' + exchange + '/' + pair}
+
+
+ALLOWANCE = {'cost': 1, 'remaining': 1000}
+
+CATALOG = {
+    'assets': [_asset('btc', False), _asset('eth', False),
+               _asset('usd', True), _asset('eur', True)],
+    'pairs': [_pair('btc', 'usd'), _pair('eth', 'usd'),
+              _pair('eth', 'btc'), _pair('btc', 'eur')],
+    'markets': [_market('kraken', 'btcusd'), _market('kraken', 'ethusd'),
+                _market('kraken', 'ethbtc'), _market('kraken', 'btceur'),
+                _market('gdax', 'btcusd'), _market('gdax', 'ethbtc'),
+                _market('bitfinex', 'ethbtc', active=False)],
+}
+
+
+@pytest.fixture
+def catalog_api():
+    """Mock the assets, pairs and markets index endpoints."""
+    with requests_mock.mock() as mock:
+        for name, result in CATALOG.items():
+            mock.get(API_URL + '/' + name,
+                     json={'result': result, 'allowance': ALLOWANCE})
+        yield mock
+
+
+class LocalAPI(object):
+    """A local HTTP server answering ``{"result": <path>}``.
+
+    Paths starting with ``/missing`` answer a 404, those starting with
+    ``/truncated`` close the connection halfway through the body. It
+    records the client
+    address of every connection it accepted and
+    gzips its responses, padded with ``padding`` copies of the path, when
+    the client accepts it.
+    """
+
+    def __init__(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        api = self
+        self.connections = set()
+        self.encodings = []
+        self.padding = 0
+        self.lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                encoding = self.headers.get('Accept-Encoding', '')
+                with api.lock:
+                    api.connections.add(self.client_address)
+                    api.encodings.append(encoding)
+                payload = {'result': self.path, 'allowance': ALLOWANCE}
+                if api.padding:
+                    payload['padding'] = [self.path] * api.padding
+                body = json.dumps(payload).encode()
+                status = 404 if self.path.startswith('/missing') else 200
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if 'gzip' in encoding:
+                    body = gzip.compress(body)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.path.startswith('/truncated'):
+                    body = body[:len(body) // 2]
+                    self.close_connection = True
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 512
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def local_api():
+    """Local API server fixture."""
+    api = LocalAPI()
+    yield api
+    api.close()
@@ -0,0 +1,68 @@
+"""Unit tests related to the analytics module."""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from cryptowatch.analytics import Summaries  # noqa: E402
+from cryptowatch.api_client import Client  # noqa: E402
+from cryptowatch.catalog import Catalog  # noqa: E402
+
+
+def summary(last, percentage, volume):
+    """Return a market summary."""
+    return {'price': {'last': last, 'high': last, 'low': last,
+                      'change': {'percentage': percentage,
+                                 'absolute': last * percentage}},
+            'volume': volume}
+
+
+RESPONSE = {'result': {
+    'kraken:btcusd': summary(100.0, 0.05, 3.0),
+    'gdax:btcusd': summary(110.0, -0.02, 1.0),
+    'kraken:ethusd': summary(10.0, 0.10, 5.0),
+    'kraken:ethbtc': summary(0.1, -0.01, 2.0),
+    'gdax:ethbtc': summary(0.12, 0.0, 0.0),
+    'kraken:xmrusd': summary(1.0, 0.5, 9.0),
+}}
+
+
+@pytest.fixture
+def summaries(catalog_api):
+    """Decoded summaries fixture."""
+    return Summaries(RESPONSE, Catalog(Client()).load())
+
+
+def test_decode(summaries):
+    """It decodes listed markets into coded columns."""
+    assert len(summaries) == 5
+    assert 'kraken:xmrusd' not in summaries.markets.tolist()
+    assert summaries.exchanges.tolist() == ['gdax', 'kraken']
+    assert summaries.assets.tolist() == ['btc', 'eth', 'usd']
+
+
+def test_top_movers(summaries):
+    """It ranks markets by their 24h change."""
+    movers = summaries.top_movers(2)
+    assert movers['market'].tolist() == ['kraken:ethusd', 'kraken:btcusd']
+    losers = summaries.top_movers(1, ascending=True)
+    assert losers['market'].tolist() == ['gdax:btcusd']
+    assert summaries.top_movers(10, min_volume=2.5)['market'].tolist() == [
+        'kraken:ethusd', 'kraken:btcusd']
+
+
+def test_index_prices(summaries):
+    """It volume weights the last prices of each asset in a quote."""
+    index = summaries.index_prices('usd')
+    assert index['asset'].tolist() == ['btc', 'eth']
+    assert index['price'].tolist() == [(300.0 + 110.0) / 4, 10.0]
+    assert index['markets'].tolist() == [2, 1]
+    assert len(summaries.index_prices('jpy')['asset']) == 0
+
+
+def test_dispersion(summaries):
+    """It measures the cross-exchange spread of each pair."""
+    dispersion = summaries.dispersion()
+    assert dispersion['pair'].tolist() == ['btcusd', 'ethbtc']
+    assert dispersion['exchanges'].tolist() == [2, 2]
+    assert dispersion['spread'] == pytest.approx([10.0 / 105, 0.02 / 0.11])
+    assert dispersion['std'] == pytest.approx([5.0, 0.01])
@@ -1,4 +1,9 @@
 """Unit tests related to the api_client module."""
+import gc
+import subprocess
+import sys
+import threading
+
 import pytest
 
 import requests_mock
@@ -112,3 +117,165 @@ def test_get_agg_summaries_exception_no_arg():
     """It raises ValueError when no argument is passed."""
     with pytest.raises(ValueError):
         client.get_aggregates()
+
+
+def test_lazy_imports():
+    """It neither imports requests nor builds a session before a request."""
+    code = ('import sys, cryptowatch, cryptowatch.cli; '
+            'client = cryptowatch.Client(); '
+            'assert "requests" not in sys.modules, "requests"; '
+            'assert "urllib3" not in sys.modules, "urllib3"; '
+            'assert client._session is None; '
+            'client.session; '
+            'assert "requests" in sys.modules')
+    subprocess.check_call([sys.executable, '-c', code])
+
+
+def test_request_errors():
+    """ERRORS holds the errors of a failed request, not usage errors."""
+    import requests
+    from urllib3.exceptions import ProtocolError
+    from cryptowatch import exceptions
+    for error in (CryptowatchAPIException, CryptowatchResponseException,
+                  requests.ConnectionError, ProtocolError):
+        assert issubclass(error, exceptions.ERRORS)
+    assert not issubclass(ValueError, exceptions.ERRORS)
+
+
+def test_package_exports():
+    """It resolves the public names of the package on first access."""
+    import cryptowatch
+    assert cryptowatch.Client is Client
+    assert 'Catalog' in dir(cryptowatch)
+    with pytest.raises(AttributeError):
+        cryptowatch.Missing  # pylint: disable=pointless-statement
+
+
+def stress(shared, url, threads=200, requests=5):
+    """Request ``url/<thread>/<n>`` from every thread, return the errors."""
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def work(index):
+        barrier.wait()
+        for number in range(requests):
+            path = '/%d/%d' % (index, number)
+            try:
+                result = shared._request('get', url + path)['result']
+            except Exception as error:  # pylint: disable=broad-except
+                errors.append(error)
+            else:
+                if result != path:
+                    errors.append(AssertionError('%s != %s' % (result, path)))
+
+    workers = [threading.Thread(target=work, args=(index,))
+               for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return errors
+
+
+def test_shared_session_is_bounded(local_api):
+    """Threads share one session whose pool never exceeds its size."""
+    pooled = Client(pool_size=4)
+    assert stress(pooled, local_api.url) == []
+    assert len(pooled._sessions) == 1
+    assert len(local_api.connections) <= 4
+    pooled.close()
+    assert pooled._session is None
+
+
+def test_thread_sessions(local_api):
+    """Each thread uses its own session, released when the thread exits."""
+    threaded = Client(sessions='thread')
+    assert stress(threaded, local_api.url, threads=50) == []
+    assert len(local_api.connections) == 50
+    gc.collect()
+    assert len(threaded._sessions) == 0
+    session = threaded.session
+    assert list(threaded._sessions) == [session]
+    threaded.close()
+    assert len(threaded._sessions) == 0
+
+
+def test_session_options():
+    """It rejects unknown session modes and empty pools."""
+    with pytest.raises(ValueError):
+        Client(sessions='process')
+    with pytest.raises(ValueError):
+        Client(pool_size=0)
+
+
+def test_compressed_transfer(local_api):
+    """It accepts compressed bodies and counts their bytes per route."""
+    local_api.padding = 1000
+    compressed = Client()
+    url = local_api.url + '/markets/gdax/btcusd/trades'
+    response = compressed._request('get', url, 'trades')
+    assert response['result'] == '/markets/gdax/btcusd/trades'
+    assert 'gzip' in local_api.encodings[-1]
+    stats = compressed.transfer_stats['trades']
+    assert stats['responses'] == 1
+    assert stats['compressed'] * 10 < stats['uncompressed']
+    # The connection is released once the body is read.
+    compressed._request('get', url, 'trades')
+    assert len(local_api.connections) == 1
+
+    identity = Client(compression=False)
+    identity._request('get', url, 'trades')
+    assert local_api.encodings[-1] == 'identity'
+    stats = identity.transfer_stats['trades']
+    assert stats['compressed'] == stats['uncompressed']
+
+
+def test_transfer_stats_of_index_routes():
+    """Responses without a market route are counted by path."""
+    counted = Client()
+    with requests_mock.mock() as m:
+        m.get('https://api.cryptowat.ch/assets/btc', json={'result': {}})
+        counted.get_assets('btc')
+    assert counted.transfer_stats['assets']['responses'] == 1
+
+
+def test_compression_options():
+    """It rejects unknown encodings, and unavailable ones on first use."""
+    with pytest.raises(ValueError):
+        Client(compression=('lzma',))
+    assert Client(compression=('gzip',))._accept_encoding() == 'gzip'
+    from urllib3.util.request import ACCEPT_ENCODING
+    if 'zstd' not in ACCEPT_ENCODING:
+        with pytest.raises(ValueError):
+            Client(compression=('zstd',)).session  # pylint: disable=W0106
+
+
+def test_errors_release_connections(local_api):
+    """Error responses give their connection back to a blocking pool."""
+    pooled = Client(pool_size=2)
+    results = []
+
+    def work():
+        for _ in range(5):
+            try:
+                pooled._request('get', local_api.url + '/missing')
+            except CryptowatchAPIException as error:
+                results.append(error.response)
+        results.append(pooled._request('get', local_api.url + '/ok')['result'])
+
+    worker = threading.Thread(target=work, daemon=True)
+    worker.start()
+    worker.join(10)
+    assert len(results) == 6 and results[-1] == '/ok'
+    assert '/missing' in results[0].text
+
+
+@pytest.mark.parametrize('compression', [True, False])
+def test_truncated_body(local_api, compression):
+    """A body cut short raises the requests exception, an OSError."""
+    import requests
+    truncated = Client(compression=compression)
+    with pytest.raises(requests.RequestException) as raised:
+        truncated._request('get', local_api.url + '/truncated')
+    assert isinstance(raised.value, OSError)
+    assert truncated._request('get', local_api.url + '/ok')['result'] == '/ok'
@@ -0,0 +1,62 @@
+"""Unit tests related to the arbitrage module."""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from cryptowatch.api_client import Client  # noqa: E402
+from cryptowatch.arbitrage import ArbitrageScanner  # noqa: E402
+from cryptowatch.catalog import Catalog  # noqa: E402
+
+PRICES = {'result': {
+    'kraken:btcusd': 100.0,
+    'kraken:ethusd': 11.0,
+    'kraken:ethbtc': 0.1,
+    'kraken:btceur': 90.0,
+    'gdax:btcusd': 104.0,
+    'gdax:ethbtc': 0.1,
+}}
+
+
+@pytest.fixture
+def scanner(catalog_api):
+    """Scanner over the mocked catalog."""
+    return ArbitrageScanner(Catalog(Client()).load())
+
+
+def test_candidate_cycles(scanner):
+    """It only builds the triangles listed on a single exchange."""
+    assert scanner.cycles == [('btc', 'eth', 'usd', 'btc')]
+    assert 'bitfinex:ethbtc' not in scanner.markets
+
+
+def test_triangles(scanner):
+    """It finds the profitable direction of a triangle."""
+    [found] = scanner.scan(PRICES)['triangles']
+    # btc -> eth -> usd -> btc: 1 / 0.1 * 11 / 100
+    assert found.profit == pytest.approx(0.1)
+    assert found.path == ('btc', 'eth', 'usd', 'btc')
+    assert found.markets == ('kraken:ethbtc', 'kraken:ethusd', 'kraken:btcusd')
+
+    prices = dict(PRICES['result'], **{'kraken:ethusd': 9.0})
+    [found] = scanner.scan({'result': prices})['triangles']
+    assert found.profit == pytest.approx(1 / 0.9 - 1)
+    assert found.path == ('btc', 'usd', 'eth', 'btc')
+
+
+def test_cross_venue(scanner):
+    """It ranks the spread of each pair across exchanges."""
+    [found] = scanner.scan(PRICES)['cross_venue']
+    assert found.profit == pytest.approx(0.04)
+    assert found.path == ('btcusd',)
+    assert found.markets == ('kraken:btcusd', 'gdax:btcusd')
+
+
+def test_fees_and_missing_prices(catalog_api):
+    """It deducts fees and skips candidates with a missing price."""
+    scanner = ArbitrageScanner(Catalog(Client()).load(), fee=0.03)
+    found = scanner.scan(PRICES)
+    assert found['cross_venue'] == []
+    assert found['triangles'][0].profit == pytest.approx(1.1 * 0.97 ** 3 - 1)
+    prices = dict(PRICES['result'])
+    del prices['kraken:ethusd']
+    assert scanner.scan({'result': prices})['triangles'] == []
@@ -0,0 +1,77 @@
+"""Unit tests related to the bars module."""
+import pytest
+
+import requests_mock
+
+np = pytest.importorskip('numpy')
+
+from cryptowatch.api_client import Client  # noqa: E402
+from cryptowatch.bars import MarketBars, TradeAggregator  # noqa: E402
+from cryptowatch.columnar import TRADE_FIELDS, decode_rows  # noqa: E402
+
+TRADES_URL = 'https://api.cryptowat.ch/markets/gdax/btcusd/trades'
+
+
+def trades(*rows):
+    """Return trade columns from ``(timestamp, price, amount)`` tuples."""
+    return decode_rows([[i, t, p, a] for i, (t, p, a) in enumerate(rows)],
+                       TRADE_FIELDS)
+
+
+def test_time_bars_across_batches():
+    """It closes a time bar once a later trade arrives or on flush."""
+    aggregator = TradeAggregator('time', 5)
+    closed = aggregator.consume(trades((1, 10.0, 1.0), (3, 12.0, 1.0)))
+    assert len(closed['close_time']) == 0
+    closed = aggregator.consume(trades((4, 8.0, 2.0), (6, 9.0, 1.0),
+                                       (12, 11.0, 1.0)))
+    assert closed['close_time'].tolist() == [5, 10]
+    assert closed['open'].tolist() == [10.0, 9.0]
+    assert closed['high'].tolist() == [12.0, 9.0]
+    assert closed['low'].tolist() == [8.0, 9.0]
+    assert closed['close'].tolist() == [8.0, 9.0]
+    assert closed['count'].tolist() == [3, 1]
+    assert closed['vwap'].tolist() == [38.0 / 4, 9.0]
+    assert len(aggregator.flush(now=14)['close']) == 0
+    assert aggregator.flush(now=15)['close_time'].tolist() == [15]
+
+
+@pytest.mark.parametrize('kind, size, counts', [
+    ('tick', 2, [2, 2]),
+    ('volume', 3.0, [2, 2]),
+    ('dollar', 30.0, [2, 2]),
+])
+def test_threshold_bars(kind, size, counts):
+    """It closes tick, volume and dollar bars as soon as they are full."""
+    aggregator = TradeAggregator(kind, size)
+    batch = trades((1, 10.0, 1.0), (2, 10.0, 2.0), (3, 10.0, 1.0),
+                   (4, 10.0, 2.0), (5, 10.0, 1.0))
+    closed = [aggregator.consume(columns)['count'].tolist()
+              for columns in ({f: v[:3] for f, v in batch.items()},
+                              {f: v[3:] for f, v in batch.items()})]
+    assert sum(closed, []) == counts
+    assert aggregator.bar['count'] == 1
+
+
+def test_invalid_kind():
+    """It raises ValueError on an unknown bar kind."""
+    with pytest.raises(ValueError):
+        TradeAggregator('range', 1)
+
+
+def test_poll_skips_seen_trades():
+    """It polls with since and does not count overlapping trades twice."""
+    bars = MarketBars({'tick': 3})
+    bars.add('gdax', 'btcusd')
+    client = Client()
+    with requests_mock.mock() as m:
+        m.get(TRADES_URL, json={'result': [[1, 10, 5.0, 0.1],
+                                           [2, 11, 5.1, 0.2]]})
+        assert [len(c['count']) for _, _, c in bars.poll(client)] == [0]
+        m.get(TRADES_URL, json={'result': [[2, 11, 5.1, 0.2],
+                                           [3, 12, 5.2, 0.3]]})
+        [(market, kind, closed)] = list(bars.poll(client))
+        assert m.last_request.qs['since'] == ['11']
+    assert (market, kind) == (('gdax', 'btcusd'), 'tick')
+    assert closed['count'].tolist() == [3]
+    assert closed['close'].tolist() == [5.2]
@@ -0,0 +1,27 @@
+"""Unit tests related to the budget module."""
+import time
+
+import pytest
+
+from cryptowatch.budget import RateBudget
+
+
+def test_budget_refills():
+    """It hands out tokens up to its capacity then at its rate."""
+    budget = RateBudget(capacity=2, rate=100)
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    start = time.monotonic()
+    assert budget.acquire()
+    assert time.monotonic() - start >= 0.005
+    assert not budget.acquire(2, timeout=0)
+
+
+def test_budget_sync():
+    """It charges the cost reported in the response allowance."""
+    budget = RateBudget(capacity=10, rate=0.001)
+    budget.acquire(1)
+    budget.sync({'allowance': {'cost': 3, 'remaining': 100}})
+    assert budget.remaining == pytest.approx(7, abs=0.01)
+    with pytest.raises(ValueError):
+        RateBudget(capacity=0, rate=1)
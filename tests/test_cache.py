@@ -0,0 +1,161 @@
+"""Unit tests related to the cache module."""
+import threading
+
+import pytest
+
+import requests_mock
+from cryptowatch.api_client import Client
+from cryptowatch.cache import SWRCache
+
+SUMMARY_URL = 'https://api.cryptowat.ch/markets/gdax/btcusd/summary'
+
+
+class Clock(object):
+    """Manual clock fixture."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader(object):
+    """Counts its calls, optionally blocking until released."""
+
+    def __init__(self, block=False):
+        self.calls = 0
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return self.calls
+
+
+def test_fresh_stale_and_expired():
+    """It serves stale values while refreshing and blocks past the hard TTL."""
+    clock = Clock()
+    cache = SWRCache(soft_ttl=5, hard_ttl=60, clock=clock)
+    loader = Loader()
+    assert cache.get('key', loader) == 1
+    clock.now = 4
+    assert cache.get('key', loader) == 1
+    assert loader.calls == 1
+
+    loader.release.clear()
+    clock.now = 10
+    assert cache.get('key', loader) == 1
+    assert cache.get('key', loader) == 1
+    loader.release.set()
+    cache.close()
+    assert loader.calls == 2
+    assert cache.get('key', loader) == 2
+
+    clock.now = 100
+    assert cache.get('key', loader) == 3
+    assert cache.stats == {'hits': 2, 'stale': 2, 'misses': 2,
+                           'refreshes': 1, 'errors': 0, 'evictions': 0}
+
+
+def test_concurrent_misses_share_one_load():
+    """It loads a missing key once for all concurrent callers."""
+    cache = SWRCache(soft_ttl=5, hard_ttl=60)
+    loader = Loader(block=True)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        cache.get('key', loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    loader.release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 8
+    assert loader.calls == 1
+
+
+def test_errors_reach_waiting_callers():
+    """It raises load errors and keeps serving the stale value meanwhile."""
+    clock = Clock()
+    cache = SWRCache(soft_ttl=1, hard_ttl=10, clock=clock)
+    assert cache.get('key', lambda: 'value') == 'value'
+
+    def fail():
+        raise ValueError('boom')
+
+    clock.now = 5
+    assert cache.get('key', fail) == 'value'
+    cache.close()
+    assert cache.stats['errors'] == 1
+    clock.now = 20
+    with pytest.raises(ValueError):
+        cache.get('key', fail)
+
+
+def test_warm_hot_keys():
+    """It refreshes the most accessed keys before they go stale."""
+    clock = Clock()
+    cache = SWRCache(soft_ttl=10, hard_ttl=60, hot_keys=1, clock=clock)
+    hot, cold = Loader(), Loader()
+    cache.get('hot', hot)
+    cache.get('cold', cold)
+    for _ in range(3):
+        cache.get('hot', hot)
+    clock.now = 6
+    assert cache.warm() == 1
+    cache.close()
+    assert (hot.calls, cold.calls) == (2, 1)
+
+
+def test_abandoned_keys_stop_being_warmed():
+    """A key no longer read is only warmed until its count decays."""
+    clock = Clock()
+    cache = SWRCache(soft_ttl=5, hard_ttl=60, hot_keys=20, clock=clock)
+    loader = Loader()
+    cache.get('key', loader)
+    cache.get('key', loader)
+    refreshes = 0
+    for _ in range(500):
+        clock.now += 5
+        refreshes += cache.warm()
+        cache.close()
+    assert refreshes == 2
+    assert loader.calls == 3
+
+
+def test_evicts_least_accessed_keys():
+    """Past max_size, loading a key evicts the least accessed other one."""
+    clock = Clock()
+    cache = SWRCache(soft_ttl=10, hard_ttl=60, max_size=2, clock=clock)
+    loaders = {key: Loader() for key in 'abcd'}
+    cache.get('a', loaders['a'])
+    clock.now = 1
+    cache.get('b', loaders['b'])
+    cache.get('a', loaders['a'])
+    clock.now = 2
+    cache.get('c', loaders['c'])
+    assert sorted(cache._entries) == ['a', 'c']
+    clock.now = 3
+    cache.get('d', loaders['d'])
+    assert sorted(cache._entries) == ['a', 'd']
+    cache.get('a', loaders['a'])
+    assert loaders['a'].calls == 1
+    assert cache.stats['evictions'] == 2
+    with pytest.raises(ValueError):
+        SWRCache(soft_ttl=10, hard_ttl=60, max_size=0)
+
+
+def test_client_cache():
+    """It serves repeated client requests from the cache."""
+    cache = SWRCache(soft_ttl=60, hard_ttl=600)
+    client = Client(cache=cache)
+    data = {'exchange': 'gdax', 'pair': 'btcusd', 'route': 'summary'}
+    with requests_mock.mock() as m:
+        m.get(SUMMARY_URL, json={'result': {'volume': 1}})
+        first = client.get_markets(data=data)
+        assert client.get_markets(data=data) is first
+        assert m.call_count == 1
+    assert first.route == 'summary'
+    cache.close()
@@ -0,0 +1,54 @@
+"""Unit tests related to the catalog module."""
+import copy
+
+from cryptowatch.api_client import Client
+from cryptowatch.catalog import Catalog
+
+from tests.conftest import ALLOWANCE, API_URL, CATALOG
+
+
+def test_exchanges_by_assets(catalog_api):
+    """It answers which active exchanges list a base quoted in a quote."""
+    catalog = Catalog(Client()).load()
+    assert catalog.exchanges('eth', 'btc') == {'kraken', 'gdax'}
+    assert catalog.exchanges('eth', 'btc', active=False) == {
+        'kraken', 'gdax', 'bitfinex'}
+    assert catalog.exchanges('btc', 'eth') == frozenset()
+
+
+def test_asset_and_pair_indexes(catalog_api):
+    """It indexes fiat flags and pairs by base and quote asset."""
+    catalog = Catalog(Client()).load()
+    assert catalog.fiat_assets == {'usd', 'eur'}
+    assert catalog.crypto_assets == {'btc', 'eth'}
+    assert catalog.is_fiat('usd') and not catalog.is_fiat('btc')
+    assert catalog.pairs_by_base('btc') == {'btcusd', 'btceur'}
+    assert catalog.pairs_by_quote('btc') == {'ethbtc'}
+    assert catalog.pair_assets('ethbtc') == ('eth', 'btc')
+    assert catalog.pair_for('eth', 'usd') == 'ethusd'
+
+
+def test_market_indexes(catalog_api):
+    """It indexes markets by exchange and by pair with an active flag."""
+    catalog = Catalog(Client()).load()
+    assert catalog.markets_by_exchange('gdax') == {'btcusd', 'ethbtc'}
+    assert catalog.markets_by_exchange('bitfinex', active=True) == frozenset()
+    assert catalog.markets_by_pair('btcusd') == {'kraken', 'gdax'}
+    assert catalog.is_active('kraken', 'btcusd')
+    assert not catalog.is_active('bitfinex', 'ethbtc')
+    assert catalog.has_market('bitfinex', 'ethbtc')
+
+
+def test_refresh_is_incremental(catalog_api):
+    """It only rebuilds the indexes whose source payload changed."""
+    catalog = Catalog(Client()).load()
+    assert catalog.refresh() == set()
+
+    markets = copy.deepcopy(CATALOG['markets'])
+    markets[-1]['active'] = True
+    catalog_api.get(API_URL + '/markets',
+                    json={'result': markets, 'allowance': ALLOWANCE})
+    pairs_index = catalog._pairs_by_base
+    assert catalog.refresh() == {'markets'}
+    assert catalog._pairs_by_base is pairs_index
+    assert catalog.exchanges('eth', 'btc') == {'kraken', 'gdax', 'bitfinex'}
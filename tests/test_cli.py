@@ -0,0 +1,113 @@
+"""Unit tests related to the cli module."""
+import csv
+import json
+
+import pytest
+
+import requests_mock
+from cryptowatch.cli import main
+
+from tests.conftest import API_URL
+
+
+def read_ndjson(path):
+    """Return the objects of an NDJSON file."""
+    with open(path) as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_catalog_csv(catalog_api, tmpdir):
+    """It dumps every market with its assets."""
+    output = str(tmpdir.join('catalog.csv'))
+    assert main(['catalog', '--format', 'csv', '--output', output]) == 0
+    with open(output) as handle:
+        rows = list(csv.DictReader(handle))
+    assert len(rows) == 7
+    assert rows[0] == {'exchange': 'bitfinex', 'pair': 'ethbtc', 'base': 'eth',
+                       'quote': 'btc', 'active': 'False'}
+
+
+def test_ohlc_ndjson(tmpdir):
+    """It backfills candles of several markets as NDJSON rows."""
+    output = str(tmpdir.join('ohlc.ndjson'))
+    with requests_mock.mock() as m:
+        for market in ('gdax/btcusd', 'kraken/ethusd'):
+            m.get(API_URL + '/markets/%s/ohlc' % market,
+                  json={'result': {'60': [[60, 1, 2, 0.5, 1.5, 10, 15],
+                                          [120, 1.5, 2, 1, 2, 5, 10]]}})
+        assert main(['ohlc', 'gdax:btcusd', 'kraken:ethusd', '--after', '0',
+                     '--output', output]) == 0
+        assert m.last_request.qs == {'periods': ['60'], 'after': ['0']}
+    rows = read_ndjson(output)
+    assert len(rows) == 4
+    assert {row['exchange'] for row in rows} == {'gdax', 'kraken'}
+    assert rows[0]['close_time'] == 60 and rows[0]['period'] == 60
+
+
+def test_trades_tail_skips_seen(tmpdir):
+    """It polls with since and only writes new trades."""
+    output = str(tmpdir.join('trades.ndjson'))
+    url = API_URL + '/markets/gdax/btcusd/trades'
+    with requests_mock.mock() as m:
+        m.get(url, [{'json': {'result': [[1, 10, 5.0, 0.1], [2, 11, 5.1, 0.2]]}},
+                    {'json': {'result': [[2, 11, 5.1, 0.2], [3, 12, 5.2, 0.3]]}}])
+        assert main(['trades', 'gdax:btcusd', '--interval', '0',
+                     '--rounds', '2', '--output', output]) == 0
+        assert m.last_request.qs == {'since': ['11']}
+    assert [row['id'] for row in read_ndjson(output)] == [1, 2, 3]
+
+
+def test_books_depth(capsys):
+    """It writes the top of each order book side to stdout."""
+    with requests_mock.mock() as m:
+        m.get(API_URL + '/markets/gdax/btcusd/orderbook',
+              json={'result': {'bids': [[9, 1], [8, 2]],
+                               'asks': [[10, 1], [11, 2]]}})
+        assert main(['books', 'gdax:btcusd', '--depth', '1']) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(row['side'], row['price']) for row in rows] == [('bids', 9),
+                                                             ('asks', 10)]
+
+
+def test_columnar_ohlc(tmpdir):
+    """It stores candles in the columnar store."""
+    np = pytest.importorskip('numpy')
+    from cryptowatch.store import Store
+    with requests_mock.mock() as m:
+        m.get(API_URL + '/markets/gdax/btcusd/ohlc',
+              json={'result': {'60': [[60, 1, 2, 0.5, 1.5, 10, 15],
+                                      [120, 1.5, 2, 1, 2, 5, 10]]}})
+        assert main(['ohlc', 'gdax:btcusd', '--format', 'columnar',
+                     '--output', str(tmpdir)]) == 0
+    candles = Store(str(tmpdir)).ohlc('gdax', 'btcusd', 60).read()
+    assert np.array_equal(candles['close_time'], [60, 120])
+
+
+def test_columnar_trades_since(tmpdir):
+    """It starts an empty trade series from --since."""
+    pytest.importorskip('numpy')
+    from cryptowatch.store import Store
+    url = API_URL + '/markets/gdax/btcusd/trades'
+    with requests_mock.mock() as m:
+        m.get(url, json={'result': [[1, 10, 5.0, 0.1], [2, 11, 5.1, 0.2]]})
+        argv = ['trades', 'gdax:btcusd', '--since', '9', '--format',
+                'columnar', '--output', str(tmpdir)]
+        assert main(argv) == 0
+        assert m.last_request.qs == {'since': ['9']}
+        assert main(argv) == 0
+        assert m.last_request.qs == {'since': ['11']}
+    trades = Store(str(tmpdir)).trades('gdax', 'btcusd').read()
+    assert trades['id'].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize('argv', [
+    ['ohlc'],
+    ['ohlc', 'gdax-btcusd'],
+    ['ohlc', 'gdax:btcusd', '--format', 'columnar'],
+    ['books', 'gdax:btcusd', '--format', 'columnar'],
+])
+def test_usage_errors(argv):
+    """It exits with a usage error on invalid arguments."""
+    with pytest.raises(SystemExit) as error:
+        main(argv)
+    assert error.value.code == 2
@@ -0,0 +1,73 @@
+"""Unit tests related to the collector module."""
+import multiprocessing
+
+import pytest
+
+import requests
+import requests_mock
+from cryptowatch.budget import RateBudget
+
+np = pytest.importorskip('numpy')
+
+from cryptowatch.collector import Collector  # noqa: E402
+
+MARKETS = [('gdax', 'btcusd'), ('gdax', 'ethusd'), ('kraken', 'btcusd'),
+           ('kraken', 'ethbtc'), ('kraken', 'invalid')]
+
+# The workers inherit the mocked transport only when forked.
+FORK = multiprocessing.get_context('fork')
+
+
+def test_collector_shards_markets():
+    """It collects every market across processes under one budget."""
+    budget = RateBudget(capacity=10, rate=0.1)
+    with requests_mock.mock() as m:
+        for exchange, pair in MARKETS[:-1]:
+            m.get('https://api.cryptowat.ch/markets/%s/%s/trades'
+                  % (exchange, pair),
+                  json={'result': [[1, 10, len(pair), 0.5]],
+                        'allowance': {'cost': 1}})
+        m.get('https://api.cryptowat.ch/markets/kraken/invalid/trades',
+              status_code=404)
+        collector = Collector(MARKETS, route='trades', processes=2,
+                              budget=budget, context=FORK)
+        results = {(exchange, pair): trades
+                   for exchange, pair, trades in collector.run()}
+    assert sorted(results) == sorted(MARKETS[:-1])
+    assert results[('gdax', 'btcusd')]['price'].tolist() == [6.0]
+    assert results[('gdax', 'btcusd')]['timestamp'].dtype == np.int64
+    assert [error[:2] for error in collector.errors] == [('kraken', 'invalid')]
+    assert budget.remaining < 6
+
+
+def test_collector_survives_transport_errors():
+    """A connection error fails its market, not the rest of the shard."""
+    markets = [('gdax', 'pair%d' % index) for index in range(6)]
+    with requests_mock.mock() as m:
+        for exchange, pair in markets:
+            m.get('https://api.cryptowat.ch/markets/%s/%s/trades'
+                  % (exchange, pair),
+                  json={'result': [[1, 10, 1.0, 0.5]]})
+        m.get('https://api.cryptowat.ch/markets/gdax/pair2/trades',
+              exc=requests.exceptions.ConnectionError)
+        collector = Collector(markets, route='trades', processes=1,
+                              context=FORK)
+        results = [pair for _, pair, _ in collector.run()]
+    assert len(results) == 5
+    assert [error[:2] for error in collector.errors] == [('gdax', 'pair2')]
+
+
+class BrokenClient(object):
+    """Client fixture failing with an unexpected error."""
+
+    def prepare_market(self, exchange, pair, route=None, params=None):
+        raise RuntimeError('broken')
+
+
+def test_collector_reports_markets_of_dead_worker():
+    """Markets left by a worker which died are recorded as errors."""
+    markets = [('gdax', 'btcusd'), ('gdax', 'ethusd')]
+    collector = Collector(markets, processes=1, client_class=BrokenClient,
+                          context=FORK)
+    assert list(collector.run()) == []
+    assert [error[:2] for error in collector.errors] == markets
@@ -0,0 +1,104 @@
+"""Unit tests related to the deltas module."""
+import math
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from cryptowatch.deltas import HEADER, DeltaLog, DeltaWriter  # noqa: E402
+
+SNAPSHOTS = [
+    {'gdax:btcusd': 100.0, 'kraken:ethusd': 10.0},
+    {'gdax:btcusd': 101.0, 'kraken:ethusd': 10.0},
+    {'gdax:btcusd': 101.0, 'kraken:ethusd': 10.0, 'bitfinex:ltcusd': 1.0},
+    {'gdax:btcusd': 102.0, 'bitfinex:ltcusd': 1.0},
+    {'gdax:btcusd': 102.0, 'bitfinex:ltcusd': 1.5},
+    {'gdax:btcusd': 103.0, 'kraken:ethusd': 11.0, 'bitfinex:ltcusd': 1.5},
+]
+
+
+def write(path, snapshots, keyframe_interval=3, start=0):
+    with DeltaWriter(str(path), keyframe_interval) as log:
+        return [log.append({'result': snapshot}, timestamp=start + i)
+                for i, snapshot in enumerate(snapshots)]
+
+
+def test_only_changes_are_written(tmp_path):
+    """Deltas hold the changed entries, keyframes every price."""
+    path = tmp_path / 'prices.log'
+    assert write(path, SNAPSHOTS) == [2, 1, 1, 2, 1, 2]
+
+
+def test_reconstruct_any_point(tmp_path):
+    """Every snapshot is rebuilt exactly, removed markets included."""
+    path = tmp_path / 'prices.log'
+    write(path, SNAPSHOTS)
+    log = DeltaLog(str(path))
+    assert len(log) == len(SNAPSHOTS)
+    for i, snapshot in enumerate(SNAPSHOTS):
+        assert log.at(i) == snapshot
+        assert log.at(i + 0.5) == snapshot
+    assert log.at(-1) == {}
+
+
+def test_replay(tmp_path):
+    """Replay yields the full starting state, then the changes."""
+    path = tmp_path / 'prices.log'
+    write(path, SNAPSHOTS)
+    items = list(DeltaLog(str(path)).replay(start=2, end=5))
+    assert items[0] == (2.0, SNAPSHOTS[2])
+    assert items[1] == (3.0, {'gdax:btcusd': 102.0, 'kraken:ethusd': None})
+    assert items[2] == (4.0, {'bitfinex:ltcusd': 1.5})
+    assert items[3] == (5.0, {'gdax:btcusd': 103.0, 'kraken:ethusd': 11.0})
+
+    state = {}
+    for _, changes in DeltaLog(str(path)).replay():
+        state.update(changes)
+        state = {k: v for k, v in state.items() if v is not None}
+    assert state == SNAPSHOTS[-1]
+
+
+def test_resume_and_truncated_record(tmp_path):
+    """Appending resumes the log and a torn record at the end is ignored."""
+    path = tmp_path / 'prices.log'
+    write(path, SNAPSHOTS[:4])
+    assert write(path, SNAPSHOTS[4:], start=4) == [1, 2]
+    assert DeltaLog(str(path)).at(5) == SNAPSHOTS[5]
+
+    with open(str(path), 'ab') as handle:
+        handle.write(b'D\x00')
+    log = DeltaLog(str(path))
+    assert len(log) == len(SNAPSHOTS)
+    assert not any(math.isnan(p) for p in log.at(10).values())
+    log.close()
+
+    # Appending after a torn record drops it first.
+    write(path, [{'gdax:btcusd': 104.0}, {'gdax:btcusd': 105.0}], start=6)
+    with DeltaLog(str(path)) as log:
+        assert len(log) == len(SNAPSHOTS) + 2
+        assert log.at(7) == {'gdax:btcusd': 105.0}
+
+
+def test_torn_symbols_and_missing_keyframe(tmp_path):
+    """A torn symbols record is ignored and a log without keyframe resumes."""
+    path = tmp_path / 'prices.log'
+    with open(str(path), 'wb') as handle:
+        handle.write(HEADER.pack(b'S', 0, 1) + b'\x0b\x00gdax:btcusd')
+        handle.write(HEADER.pack(b'S', 0, 2) + b'\x0b\x00gdax:ethusd\x20\x00gd')
+    with DeltaLog(str(path)) as log:
+        assert log.symbols == ['gdax:btcusd']
+        assert len(log) == 0
+        assert log.at(0) == {}
+    assert write(path, SNAPSHOTS[:2]) == [2, 1]
+    with DeltaLog(str(path)) as log:
+        assert log.symbols == ['gdax:btcusd', 'kraken:ethusd']
+        assert log.at(1) == SNAPSHOTS[1]
+
+
+def test_empty_log(tmp_path):
+    """An empty file is an empty log."""
+    path = tmp_path / 'prices.log'
+    path.write_bytes(b'')
+    with DeltaLog(str(path)) as log:
+        assert len(log) == 0
+        assert list(log.replay()) == []
@@ -0,0 +1,85 @@
+"""Unit tests related to the frames module."""
+import pytest
+
+import requests_mock
+from cryptowatch.api_client import Client
+
+pd = pytest.importorskip('pandas')
+pa = pytest.importorskip('pyarrow')
+
+MARKET_URL = 'https://api.cryptowat.ch/markets/gdax/btcusd/'
+client = Client()
+
+SUMMARY = {'price': {'last': 10.0, 'high': 11.0, 'low': 9.0,
+                     'change': {'percentage': 0.1, 'absolute': 1.0}},
+           'volume': 5.0, 'volumeQuote': 50.0}
+
+
+def fetch(route, result, aggregate=False):
+    """Return the response of a mocked route."""
+    with requests_mock.mock() as m:
+        if aggregate:
+            m.get('https://api.cryptowat.ch/markets/' + route,
+                  json={'result': result})
+            return client.get_aggregates(route)
+        m.get(MARKET_URL + route, json={'result': result})
+        return client.prepare_market('gdax', 'btcusd', route).fetch()
+
+
+def test_trades():
+    """It converts trades with typed columns and datetime timestamps."""
+    response = fetch('trades', [[1, 1481676478, 734.39, 0.1249],
+                                [2, 1481676537, 734.394, 0.0744]])
+    frame = response.to_pandas()
+    assert list(frame.columns) == ['id', 'timestamp', 'price', 'amount']
+    assert frame['id'].dtype == 'int64'
+    assert frame['timestamp'].iloc[0] == pd.Timestamp(1481676478, unit='s')
+    table = response.to_arrow()
+    assert table.schema.field('timestamp').type == pa.timestamp('s')
+    assert table.column('price').to_pylist() == [734.39, 734.394]
+
+
+def test_ohlc_periods():
+    """It stacks the candles of every period with a period column."""
+    response = fetch('ohlc', {'60': [[60, 1, 2, 0.5, 1.5, 10, 15]],
+                              '180': [[180, 1, 2, 0.5, 1.5, 10, 15],
+                                      [360, 1, 2, 0.5, 1.5, 10, 15]]})
+    frame = response.to_pandas()
+    assert frame['period'].tolist() == [60, 180, 180]
+    assert frame['close_time'].dt.minute.tolist() == [1, 3, 6]
+    assert response.to_arrow().num_rows == 3
+
+
+def test_orderbook():
+    """It converts both book sides with a categorical side column."""
+    response = fetch('orderbook', {'bids': [[9.0, 1.0]],
+                                   'asks': [[10.0, 2.0], [11.0, 1.0]]})
+    frame = response.to_pandas()
+    assert frame['side'].tolist() == ['bids', 'asks', 'asks']
+    assert frame['price'].tolist() == [9.0, 10.0, 11.0]
+    assert response.to_arrow().column('side').to_pylist() == [
+        'bids', 'asks', 'asks']
+
+
+def test_aggregates():
+    """It splits aggregate keys into categorical exchange and pair columns."""
+    prices = fetch('prices', {'kraken:btcusd': 1.0, 'gdax:btcusd': 2.0},
+                   aggregate=True).to_pandas()
+    assert prices['exchange'].tolist() == ['kraken', 'gdax']
+    assert list(prices['exchange'].cat.categories) == ['gdax', 'kraken']
+    assert prices['price'].tolist() == [1.0, 2.0]
+    summaries = fetch('summaries', {'gdax:btcusd': SUMMARY},
+                      aggregate=True).to_arrow()
+    assert summaries.column('quote_volume').to_pylist() == [50.0]
+    assert fetch('summary', SUMMARY).to_pandas()['last'].tolist() == [10.0]
+    assert fetch('price', {'price': 3.0}).to_pandas()['price'].tolist() == [3.0]
+
+
+def test_non_tabular_route():
+    """It raises ValueError for routes without a tabular form."""
+    with requests_mock.mock() as m:
+        m.get('https://api.cryptowat.ch/assets', json={'result': []})
+        response = client.get_assets()
+    assert response == {'result': []}
+    with pytest.raises(ValueError):
+        response.to_pandas()
@@ -0,0 +1,147 @@
+"""Unit tests related to the indicators module."""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from cryptowatch import indicators  # noqa: E402
+from cryptowatch.indicators import (  # noqa: E402
+    ATR,
+    EMA,
+    RSI,
+    VWAP,
+    Bollinger,
+    IndicatorSet,
+    align
+)
+
+
+def random_candles(markets=3, steps=50, seed=1):
+    random = np.random.RandomState(seed)
+    close = 100 + np.cumsum(random.normal(size=(markets, steps)), axis=1)
+    spread = random.uniform(0.1, 1.0, size=(markets, steps))
+    return {
+        'close_time': np.broadcast_to(np.arange(1, steps + 1) * 3600,
+                                      (markets, steps)),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': random.uniform(1, 10, size=(markets, steps)),
+    }
+
+
+def test_ema_matches_recurrence():
+    """The EMA follows its textbook recurrence, seeded with the first value."""
+    values = [10.0, 11.0, 12.0, 11.5, 13.0]
+    expected, average = [], None
+    for value in values:
+        average = value if average is None else average + (value - average) / 2.0
+        expected.append(average)
+    np.testing.assert_allclose(indicators.ema(values, 3), expected)
+
+
+def test_batch_then_update_matches_full_batch():
+    """Warming up over history then updating equals one batch over it all."""
+    candles = random_candles()
+    candles['close'][1, 10:13] = np.nan
+    full = IndicatorSet(ema=EMA(10), rsi=RSI(), atr=ATR(), bands=Bollinger(5),
+                        vwap=VWAP(4 * 3600)).batch(candles)
+
+    live = IndicatorSet(ema=EMA(10), rsi=RSI(), atr=ATR(), bands=Bollinger(5),
+                        vwap=VWAP(4 * 3600))
+    live.batch({field: column[:, :40] for field, column in candles.items()})
+    for step in range(40, 50):
+        latest = live.update({field: column[:, step]
+                              for field, column in candles.items()})
+    for name in ('ema', 'rsi', 'atr', 'vwap'):
+        np.testing.assert_allclose(latest[name], full[name][:, -1])
+    for band, expected in zip(latest['bands'], full['bands']):
+        np.testing.assert_allclose(band, expected[:, -1])
+
+
+@pytest.mark.parametrize('make', [
+    lambda: EMA(12), lambda: EMA(1), lambda: RSI(), lambda: ATR(),
+    lambda: Bollinger(20), lambda: VWAP(), lambda: VWAP(4 * 3600)])
+def test_batch_matches_updates(make):
+    """The vectorized batch equals updating step by step, over gaps too."""
+    candles = random_candles(markets=4, steps=600)
+    candles['close'][0, :30] = np.nan
+    candles['close'][1] = np.nan
+    candles['close'][2, 100:400] = np.nan
+    candles['volume'][3, 50:60] = np.nan
+    stepped, batched = make(), make()
+    for start, end in ((0, 250), (250, 600)):
+        part = {field: column[:, start:end] for field, column in candles.items()}
+        outputs = [stepped.update({field: column[:, step]
+                                   for field, column in part.items()})
+                   for step in range(end - start)]
+        values = batched.batch(part)
+        if isinstance(values, tuple):
+            for band, expected in zip(values, zip(*outputs)):
+                np.testing.assert_allclose(band, np.stack(expected, axis=1))
+        else:
+            np.testing.assert_allclose(values, np.stack(outputs, axis=1))
+
+
+def test_missing_candle_carries_state():
+    """A nan candle leaves the averages of that market unchanged."""
+    close = np.array([[1.0, 2.0, np.nan, 3.0], [1.0, 2.0, 3.0, 4.0]])
+    values = indicators.ema(close, 3)
+    assert values[0, 2] == values[0, 1]
+    assert values[1, 2] != values[1, 1]
+
+
+def test_rsi_bounds():
+    """Steady rises give 100, steady falls 0 and a flat close 50."""
+    close = np.array([np.arange(20.0), np.arange(20.0)[::-1], np.ones(20)])
+    np.testing.assert_allclose(indicators.rsi(close)[:, -1], [100, 0, 50])
+
+
+def test_atr_of_constant_range():
+    """Candles spanning the same range without gaps have that range as ATR."""
+    close = np.arange(30.0)
+    values = indicators.atr(close + 1, close - 1, close)
+    np.testing.assert_allclose(values[-1], 2.0)
+
+
+def test_bollinger_matches_rolling_window():
+    """Bands match the population statistics of the trailing window."""
+    close = random_candles(markets=2, steps=60)['close']
+    middle, upper, lower = indicators.bollinger(close, 20, 2.0)
+    assert np.isnan(middle[:, :19]).all()
+    windows = np.lib.stride_tricks.sliding_window_view(close, 20, axis=1)
+    np.testing.assert_allclose(middle[:, 19:], windows.mean(axis=2))
+    np.testing.assert_allclose(upper[:, 19:] - middle[:, 19:],
+                               2 * windows.std(axis=2))
+    np.testing.assert_allclose(middle - lower, upper - middle)
+
+
+def test_vwap_sessions():
+    """The session VWAP restarts on the session boundaries."""
+    high = low = close = np.array([10.0, 20.0, 30.0, 40.0])
+    volume = np.array([1.0, 1.0, 2.0, 2.0])
+    np.testing.assert_allclose(indicators.vwap(high, low, close, volume),
+                               [10, 15, 90 / 4.0, 170 / 6.0])
+    times = np.array([3600, 7200, 10800, 14400])
+    np.testing.assert_allclose(
+        indicators.vwap(high, low, close, volume, times, session=7200),
+        [10, 15, 30, 35])
+    with pytest.raises(ValueError):
+        indicators.vwap(high, low, close, volume, session=7200)
+
+
+def test_align():
+    """Markets are stacked on the union of their close times."""
+    markets, times, columns = align({
+        'a': {'close_time': [60, 120], 'close': [1.0, 2.0]},
+        'b': {'close_time': [120, 180], 'close': [3.0, 4.0]},
+    }, fields=('close_time', 'close'))
+    assert markets == ['a', 'b']
+    assert times.tolist() == [60, 120, 180]
+    np.testing.assert_array_equal(columns['close'],
+                                  [[1, 2, np.nan], [np.nan, 3, 4]])
+
+
+def test_invalid_period():
+    """Periods must be positive."""
+    with pytest.raises(ValueError):
+        EMA(0)
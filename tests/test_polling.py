@@ -0,0 +1,112 @@
+"""Unit tests related to the polling module."""
+import math
+
+import pytest
+
+from cryptowatch.polling import AdaptivePoller, allocate
+
+
+class Clock(object):
+    """Manual clock fixture."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class Market(object):
+    """Trades route returning a trade every ``spacing`` seconds."""
+
+    def __init__(self, clock, spacing):
+        self.clock = clock
+        self.spacing = spacing
+
+    def fetch(self):
+        last = int(self.clock.now // self.spacing)
+        return {'result': [[k, k * self.spacing, 1.0, 0.5]
+                           for k in range(max(last - 49, 1), last + 1)]}
+
+
+class FakeClient(object):
+    """Client fixture serving synthetic trades and summaries."""
+
+    def __init__(self, clock, spacings, volumes=None):
+        self.clock = clock
+        self.spacings = spacings
+        self.volumes = volumes or {}
+        self.calls = {}
+
+    def prepare_market(self, exchange, pair, route, params=None):
+        market = Market(self.clock, self.spacings[pair])
+        client = self
+
+        class Route(object):
+            def fetch(self):
+                client.calls[pair] = client.calls.get(pair, 0) + 1
+                return market.fetch()
+
+        return Route()
+
+    def get_aggregates(self, route):
+        return {'result': {'gdax:%s' % pair: {'volume': volume}
+                           for pair, volume in self.volumes.items()}}
+
+
+def test_allocate():
+    """Shares follow the weights, raised to the floor where below it."""
+    assert allocate([1.0, 3.0], 4.0) == [1.0, 3.0]
+    assert allocate([0.0, 1.0, 1.0], 3.0, floor=1.0) == [1.0, 1.0, 1.0]
+    shares = allocate([0.01, 1.0, 4.0], 10.0, floor=1.0)
+    assert shares[0] == 1.0
+    assert shares[2] == pytest.approx(4 * shares[1])
+    assert sum(shares) == pytest.approx(10.0)
+    assert allocate([1.0, 2.0], 1.0, floor=1.0) == [0.5, 0.5]
+    assert allocate([], 1.0) == []
+
+
+def test_busy_markets_are_polled_more():
+    """Intervals end up in proportion to one over the root of the rate."""
+    clock = Clock()
+    client = FakeClient(clock, {'busy': 1.0, 'slow': 16.0})
+    poller = AdaptivePoller(client, [('gdax', 'busy'), ('gdax', 'slow')],
+                            rate=0.2, half_life=60.0, replan_interval=10.0,
+                            summary_interval=None, clock=clock,
+                            sleep=clock.sleep)
+    poller.run(1200)
+    assert poller.activity(('gdax', 'busy')) == pytest.approx(1.0, rel=0.1)
+    assert poller.activity(('gdax', 'slow')) == pytest.approx(1 / 16.0, rel=0.2)
+    intervals = {job.market[1]: job.interval for job in poller.jobs}
+    assert intervals['slow'] / intervals['busy'] == pytest.approx(4.0, rel=0.2)
+    assert client.calls['busy'] > 2 * client.calls['slow']
+
+    expected = poller.expected_freshness()
+    assert expected[(('gdax', 'slow'), 'trades')] > \
+        expected[(('gdax', 'busy'), 'trades')]
+    freshness = poller.freshness()
+    assert all(0.0 <= value <= 1.0 for value in freshness.values())
+
+
+def test_summary_volume_prior():
+    """Idle markets fall to the floor and the volume sets the prior rate."""
+    clock = Clock()
+    client = FakeClient(clock, {'busy': 1.0, 'dead': 1e9},
+                        volumes={'busy': 86400 * 0.5, 'dead': 0.0})
+    poller = AdaptivePoller(client, [('gdax', 'busy'), ('gdax', 'dead')],
+                            rate=1.0, max_interval=100.0, clock=clock,
+                            sleep=clock.sleep)
+    poller.scheduler.run_pending()
+    assert poller.activity(('gdax', 'dead')) == 0.0
+    intervals = {job.market[1]: job.interval for job in poller.jobs}
+    assert intervals['dead'] == 100.0
+    assert math.isclose(1 / intervals['busy'], 1.0 - 1 / 600.0 - 1 / 100.0)
+
+
+def test_invalid_rate():
+    """The polling rate must be positive."""
+    with pytest.raises(ValueError):
+        AdaptivePoller(None, [], rate=0)
@@ -0,0 +1,63 @@
+"""Unit tests related to the resample module."""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from cryptowatch.columnar import OHLC_FIELDS, decode_rows  # noqa: E402
+from cryptowatch.resample import Resampler, resample  # noqa: E402
+
+
+def candles(*close_times):
+    """Return minute candles whose prices are their index."""
+    return decode_rows([[t, i, i + 10, i - 10, i + 1, 1.0, float(i)]
+                        for i, t in enumerate(close_times)], OHLC_FIELDS)
+
+
+def test_resample_aggregates():
+    """It takes first open, max high, min low, last close and sums volumes."""
+    bars = resample(candles(60, 120, 180, 240, 300, 360), 60, 180)
+    assert bars['close_time'].tolist() == [180, 360]
+    assert bars['open'].tolist() == [0, 3]
+    assert bars['high'].tolist() == [12, 15]
+    assert bars['low'].tolist() == [-10, -7]
+    assert bars['close'].tolist() == [3, 6]
+    assert bars['volume'].tolist() == [3.0, 3.0]
+    assert bars['quote_volume'].tolist() == [3.0, 12.0]
+    assert bars['count'].tolist() == [3, 3]
+
+
+def test_resample_gaps_keep_alignment():
+    """It keeps bars aligned on their period across missing candles."""
+    bars = resample(candles(120, 180, 600, 660), 60, 180)
+    assert bars['close_time'].tolist() == [180, 720]
+    assert bars['count'].tolist() == [2, 2]
+    offset = resample(candles(120, 180, 600, 660), 60, 180, offset=60)
+    assert offset['close_time'].tolist() == [240, 600, 780]
+
+
+def test_resample_invalid_period():
+    """It raises ValueError when the period is not a base multiple."""
+    with pytest.raises(ValueError):
+        resample(candles(60), 60, 90)
+
+
+def test_resampler_matches_batch():
+    """It emits the same bars incrementally, revising the forming candle."""
+    base = candles(*range(60, 60 * 31, 60))
+    resampler = Resampler(60, 300)
+    closed = []
+    for index in range(30):
+        row = {field: values[index:index + 1] for field, values in base.items()}
+        if index:
+            revised = {field: values[index - 1:index].copy()
+                       for field, values in base.items()}
+            revised['high'] = revised['high'] - 100
+            closed.append(resampler.update(revised))
+            closed.append(resampler.update(
+                {field: values[index - 1:index] for field, values in base.items()}))
+        closed.append(resampler.update(row))
+    expected = resample(base, 60, 300)
+    emitted = np.concatenate([bars['high'] for bars in closed])
+    assert emitted.tolist() == expected['high'][:-1].tolist()
+    assert resampler.last['close_time'] == 1800
+    assert resampler.last['count'] == 5
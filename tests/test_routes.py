@@ -0,0 +1,65 @@
+"""Unit tests related to the routes module."""
+import pytest
+
+import requests_mock
+from cryptowatch.api_client import Client
+from cryptowatch.catalog import Catalog
+
+client = Client()
+
+
+def test_prepared_url_matches_get_markets():
+    """It builds the same url get_markets requests."""
+    params = {'before': 1481663244, 'after': 1481663000, 'periods': '60,180'}
+    route = client.prepare_market('gdax', 'btcusd', 'ohlc', params=params)
+    with requests_mock.mock() as m:
+        m.get(requests_mock.ANY, json={'result': {}})
+        client.get_markets(data={'exchange': 'gdax', 'pair': 'btcusd',
+                                 'route': 'ohlc', 'params': params})
+        assert m.last_request.url == route.url
+        route.fetch()
+        route()
+        assert m.call_count == 3
+        assert m.last_request.url == route.url
+
+
+def test_with_params():
+    """It returns a new route with the params merged in."""
+    route = client.prepare_market('gdax', 'btcusd', 'trades',
+                                  params={'limit': 10})
+    since = route.with_params(since=1481663244)
+    assert route.url.endswith('/markets/gdax/btcusd/trades?limit=10')
+    assert since.url.endswith('/trades?limit=10&since=1481663244')
+
+
+def test_params_in_get_markets_order():
+    """The query string follows the param order of get_markets."""
+    route = client.prepare_market('gdax', 'btcusd', 'trades',
+                                  params={'since': 1481663244, 'limit': 10})
+    assert route.url.endswith('/trades?limit=10&since=1481663244')
+    periods = client.prepare_market('gdax', 'btcusd', 'ohlc',
+                                    params={'periods': '60'})
+    assert periods.with_params(after=1481663000).url.endswith(
+        '/ohlc?after=1481663000&periods=60')
+
+
+@pytest.mark.parametrize('args, params', [
+    (('gdax', None), None),
+    (('gdax', 'btcusd', 'candles'), None),
+    (('gdax', 'btcusd', 'price'), {'limit': 10}),
+    (('gdax', 'btcusd', 'trades'), {'periods': '60'}),
+])
+def test_invalid_routes(args, params):
+    """It raises ValueError on invalid input."""
+    with pytest.raises(ValueError):
+        client.prepare_market(*args, params=params)
+
+
+def test_catalog_validation(catalog_api):
+    """It raises ValueError for a market missing from the catalog."""
+    catalog = Catalog(client).load()
+    route = client.prepare_market('kraken', 'btcusd', 'trades',
+                                  catalog=catalog)
+    assert route.with_params(limit=10).catalog is catalog
+    with pytest.raises(ValueError):
+        client.prepare_market('kraken', 'xmrusd', catalog=catalog)
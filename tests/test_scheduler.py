@@ -0,0 +1,156 @@
+"""Unit tests related to the scheduler module."""
+import pytest
+
+import requests_mock
+from cryptowatch.api_client import Client
+from cryptowatch.budget import RateBudget
+from cryptowatch.scheduler import Job, Scheduler
+
+API_URL = 'https://api.cryptowat.ch'
+
+
+class Clock(object):
+    """Manual clock fixture."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_jobs_are_spread():
+    """It offsets jobs sharing an interval across that interval."""
+    clock = Clock()
+    scheduler = Scheduler(Client(), clock=clock)
+    for index in range(4):
+        scheduler.add(Job('ohlc', ('gdax', 'pair%d' % index), interval=60))
+    dues = sorted(due - clock.now for due, _, _ in scheduler._queue)
+    assert dues[0] == 0
+    assert min(b - a for a, b in zip(dues, dues[1:])) > 10
+
+
+def test_batches_price_jobs():
+    """It serves due price jobs from one prices aggregate call."""
+    clock = Clock()
+    received = {}
+    scheduler = Scheduler(Client(), batch_size=2, clock=clock)
+    for pair in ('btcusd', 'ethusd', 'ltcusd'):
+        scheduler.add(Job('price', ('gdax', pair), interval=2,
+                          callback=lambda job, r: received.update(
+                              {job.market[1]: r['result']})),
+                      start=clock.now)
+    with requests_mock.mock() as m:
+        m.get(API_URL + '/markets/prices',
+              json={'result': {'gdax:btcusd': 1.0, 'gdax:ethusd': 2.0,
+                               'gdax:ltcusd': 3.0}})
+        clock.now += 0.5
+        assert scheduler.run_pending() == 3
+        assert m.call_count == 1
+    assert received == {'btcusd': {'price': 1.0}, 'ethusd': {'price': 2.0},
+                        'ltcusd': {'price': 3.0}}
+    assert scheduler.stats['batched'] == 3
+
+
+def test_defers_and_drops_under_pressure():
+    """It defers low priority jobs when the budget runs low."""
+    clock = Clock()
+    budget = RateBudget(capacity=1, rate=0.0001)
+    scheduler = Scheduler(Client(), budget=budget, reserve=0.5,
+                          clock=clock)
+    high = Job('ohlc', ('gdax', 'btcusd'), interval=60, priority=1)
+    low = Job('trades', ('gdax', 'btcusd'), interval=30, deadline=5)
+    scheduler.add(high, start=clock.now)
+    scheduler.add(low, start=clock.now)
+    with requests_mock.mock() as m:
+        m.get(requests_mock.ANY, json={'result': []})
+        assert scheduler.run_pending() == 1
+        assert m.last_request.path.endswith('/ohlc')
+        clock.now += 10
+        scheduler.run_pending()
+    assert scheduler.stats['deferred'] == 1
+    assert scheduler.stats['dropped'] == 1
+
+
+def test_lag_and_run():
+    """It reports the lag of the runs."""
+    clock = Clock()
+    scheduler = Scheduler(Client(), clock=clock, sleep=clock.sleep)
+    scheduler.add(Job('assets', interval=3600), start=clock.now - 2)
+    with requests_mock.mock() as m:
+        m.get(API_URL + '/assets', json={'result': []})
+        scheduler.run(duration=7200)
+    lag = scheduler.lag()
+    assert lag['count'] == 3
+    assert lag['max'] == 2.0
+    assert lag['mean'] == 2.0 / 3
+
+
+def test_set_intervals_moves_queued_runs():
+    """A new interval moves the next run relative to the previous one."""
+    clock = Clock()
+    scheduler = Scheduler(Client(), clock=clock)
+    job = Job('ohlc', ('gdax', 'btcusd'), interval=60)
+    scheduler.add(job, start=clock.now)
+    scheduler.add(Job('ohlc', ('gdax', 'ethusd'), interval=30), start=clock.now)
+    scheduler.set_intervals({job: 10})
+    assert job.interval == 10
+    assert sorted(due - clock.now for due, _, _ in scheduler._queue) == [-50, 0]
+
+
+def test_deferred_jobs_keep_their_due_time():
+    """Retries of a deferred job count towards its deadline and lag."""
+    clock = Clock()
+    budget = RateBudget(capacity=1, rate=0.0001)
+    budget.debit(1)
+    scheduler = Scheduler(Client(), budget=budget, reserve=0.5, clock=clock,
+                          sleep=clock.sleep)
+    scheduler.add(Job('trades', ('gdax', 'btcusd'), interval=30, deadline=5),
+                  start=clock.now)
+    scheduler.run(duration=60)
+    assert scheduler.stats['dropped'] == 2
+    assert scheduler.stats['deferred'] == 12
+
+
+def test_batches_sync_the_budget():
+    """Aggregate calls charge the budget with the cost they report."""
+    clock = Clock()
+    budget = RateBudget(capacity=10, rate=0.0001)
+    scheduler = Scheduler(Client(), budget=budget, batch_size=2, clock=clock)
+    for pair in ('btcusd', 'ethusd'):
+        scheduler.add(Job('price', ('gdax', pair), interval=2), start=clock.now)
+    with requests_mock.mock() as m:
+        m.get(API_URL + '/markets/prices',
+              json={'result': {}, 'allowance': {'cost': 3}})
+        clock.now += 1.5
+        assert scheduler.run_pending() == 2
+    assert budget.remaining == pytest.approx(7, abs=0.01)
+
+
+def test_invalid_jobs_and_errors():
+    """Invalid jobs are rejected up front, failed runs keep their error."""
+    scheduler = Scheduler(Client(), clock=Clock())
+    with pytest.raises(ValueError):
+        Job('price')
+    with pytest.raises(ValueError):
+        Job('prices', ('gdax', 'btcusd'))
+    with pytest.raises(ValueError):
+        scheduler.add(Job('candles', ('gdax', 'btcusd')))
+    with pytest.raises(ValueError):
+        scheduler.add(Job('price', ('gdax', 'btcusd'), params={'limit': 1}))
+    assert len(scheduler) == 0
+
+    job = Job('ohlc', ('gdax', 'btcusd'))
+    scheduler.add(job, start=0)
+    with requests_mock.mock() as m:
+        m.get(requests_mock.ANY, status_code=500, json={})
+        scheduler.run_pending()
+        assert scheduler.stats['errors'] == 1
+        assert job.error.status_code == 500
+        m.get(requests_mock.ANY, json={'result': {}})
+        scheduler.clock.now += 60
+        scheduler.run_pending()
+    assert job.error is None
@@ -0,0 +1,157 @@
+"""Unit tests related to the store module."""
+import multiprocessing
+import os
+
+import pytest
+
+import requests_mock
+
+np = pytest.importorskip('numpy')
+
+from cryptowatch.api_client import Client  # noqa: E402
+from cryptowatch.columnar import OHLC_FIELDS, decode_rows  # noqa: E402
+from cryptowatch.store import Store  # noqa: E402
+
+OHLC_URL = 'https://api.cryptowat.ch/markets/gdax/btcusd/ohlc'
+TRADES_URL = 'https://api.cryptowat.ch/markets/gdax/btcusd/trades'
+
+
+def candle(close_time, close):
+    """Return a candle row closing at ``close_time``."""
+    return [close_time, close, close + 1, close - 1, close, 1.5, 1.5 * close]
+
+
+def test_append_and_range_read(tmpdir):
+    """It keeps candles sorted and reads a time range back as memmaps."""
+    series = Store(str(tmpdir)).ohlc('gdax', 'btcusd', 60)
+    rows = [candle(t, float(t)) for t in (180, 60, 120, 240)]
+    assert series.append(decode_rows(rows, OHLC_FIELDS)) == 4
+    assert len(series) == 4
+    window = series.read(start=120, end=240)
+    assert isinstance(window['close'], np.memmap)
+    assert window['close_time'].tolist() == [120, 180]
+    assert window['high'].tolist() == [121.0, 181.0]
+
+
+def test_fill_ohlc_dedupes_overlap(tmpdir):
+    """It resumes from the last candle and replaces the forming one."""
+    store = Store(str(tmpdir))
+    client = Client()
+    with requests_mock.mock() as m:
+        m.get(OHLC_URL, json={'result': {'60': [candle(60, 1.0),
+                                                candle(120, 2.0)]}})
+        assert store.fill_ohlc(client, 'gdax', 'btcusd') == {60: 2}
+        m.get(OHLC_URL, json={'result': {'60': [candle(120, 2.5),
+                                                candle(180, 3.0)]}})
+        assert store.fill_ohlc(client, 'gdax', 'btcusd') == {60: 1}
+        assert m.last_request.qs['after'] == ['119']
+    series = store.ohlc('gdax', 'btcusd', 60)
+    assert series.read()['close'].tolist() == [1.0, 2.5, 3.0]
+
+
+def test_fill_trades_dedupes_overlap(tmpdir):
+    """It drops trades already stored when polling with since."""
+    store = Store(str(tmpdir))
+    client = Client()
+    with requests_mock.mock() as m:
+        m.get(TRADES_URL, json={'result': [[1, 10, 5.0, 0.1],
+                                           [2, 11, 5.1, 0.2]]})
+        assert store.fill_trades(client, 'gdax', 'btcusd') == 2
+        m.get(TRADES_URL, json={'result': [[2, 11, 5.1, 0.2],
+                                           [3, 11, 5.2, 0.3],
+                                           [4, 12, 5.3, 0.4]]})
+        assert store.fill_trades(client, 'gdax', 'btcusd') == 2
+        assert m.last_request.qs['since'] == ['11']
+    trades = store.trades('gdax', 'btcusd').read()
+    assert trades['id'].tolist() == [1, 2, 3, 4]
+    assert trades['timestamp'].dtype == np.int64
+
+
+def test_backfill_merges_older_rows(tmpdir):
+    """Rows older than the stored ones are merged in, not dropped."""
+    series = Store(str(tmpdir)).ohlc('gdax', 'btcusd', 60)
+    series.append(decode_rows([candle(t, float(t)) for t in (600, 660, 720)],
+                              OHLC_FIELDS))
+    before = series.read()
+    assert series.append(decode_rows([candle(t, float(t))
+                                      for t in (60, 120, 600, 780)],
+                                     OHLC_FIELDS)) == 3
+    assert series.read()['close_time'].tolist() == [60, 120, 600, 660, 720,
+                                                    780]
+    # An earlier snapshot keeps reading its own rows.
+    assert before['close_time'].tolist() == [600, 660, 720]
+
+    trades = Store(str(tmpdir)).trades('gdax', 'btcusd')
+    trades.append(decode_rows([[3, 20, 5.0, 0.1], [4, 30, 5.0, 0.1]],
+                              ('id', 'timestamp', 'price', 'amount')))
+    assert trades.append(decode_rows(
+        [[1, 10, 5.0, 0.1], [2, 20, 4.0, 0.1], [3, 20, 5.0, 0.1]],
+        ('id', 'timestamp', 'price', 'amount'))) == 2
+    assert trades.read()['id'].tolist() == [1, 3, 2, 4]
+
+
+def _write_candles(path, count):
+    """Append candles one at a time, as a collector process would."""
+    series = Store(path).ohlc('gdax', 'btcusd', 60)
+    for close_time in range(60, 60 * (count + 1), 60):
+        # Every candle is written twice, the second time revised.
+        series.append(decode_rows([candle(close_time, 1.0)], OHLC_FIELDS))
+        series.append(decode_rows([candle(close_time, 2.0)], OHLC_FIELDS))
+
+
+def test_reader_snapshots_during_appends(tmpdir):
+    """It reads consistent snapshots while another process appends."""
+    count = 300
+    series = Store(str(tmpdir)).ohlc('gdax', 'btcusd', 60)
+    reader = series.reader()
+    writer = multiprocessing.get_context('fork').Process(
+        target=_write_candles, args=(str(tmpdir), count))
+    writer.start()
+    seen = 0
+    while seen < count:
+        snapshot = reader.snapshot()
+        closed = snapshot.closed
+        assert not len(closed['close']) or not closed['close'].flags.writeable
+        assert len(set(map(len, closed.values()))) == 1
+        assert closed['close_time'].tolist() == list(
+            range(60, 60 * (len(closed['close']) + 1), 60))
+        assert set(closed['close'].tolist()) <= {2.0}
+        seen = len(snapshot)
+    writer.join()
+    assert writer.exitcode == 0
+    assert series.read()['close_time'][-1] == 60 * count
+    assert len(reader.snapshot().read(start=60 * (count - 1))['close']) == 2
+
+
+def _backfill_candles(path, count, middle):
+    """Merge older candles in while appending newer ones."""
+    series = Store(path).ohlc('gdax', 'btcusd', 60)
+    for step in range(1, count + 1):
+        series.append(decode_rows([candle(middle - 60 * step, middle - 60 * step),
+                                   candle(middle + 60 * step, middle + 60 * step)],
+                                  OHLC_FIELDS))
+
+
+def test_snapshots_during_backfill(tmpdir):
+    """Snapshots stay consistent while older rows are merged in."""
+    count, middle = 150, 60 * 1000
+    series = Store(str(tmpdir)).ohlc('gdax', 'btcusd', 60)
+    series.append(decode_rows([candle(middle, middle)], OHLC_FIELDS))
+    reader = series.reader()
+    writer = multiprocessing.get_context('fork').Process(
+        target=_backfill_candles, args=(str(tmpdir), count, middle))
+    writer.start()
+    seen = 0
+    while seen < 2 * count + 1:
+        for snapshot in (series.snapshot(), reader.snapshot()):
+            closed = snapshot.closed
+            assert len(set(map(len, closed.values()))) == 1
+            times = closed['close_time']
+            assert (np.diff(times) == 60).all()
+            np.testing.assert_array_equal(closed['close'], times)
+            seen = len(snapshot)
+    writer.join()
+    assert writer.exitcode == 0
+    assert series.read()['close_time'].tolist() == list(
+        range(middle - 60 * count, middle + 60 * count + 1, 60))
+    assert len(os.listdir(series.path)) == len(OHLC_FIELDS) + 2